@@ -0,0 +1,115 @@
+import os
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from src.model_bundle import DEFAULT_BUNDLE, load_bundle
+from src.numpy_lstm import PRECISIONS
+from src.weather_store import get_store
+from src.field_registry import load_registry
+from src.batch_forecast import forecast_fields
+from src.alerts import AlertLog, build_alerts, dispatch, make_sink
+from src.instrumentation import track_run
+
+# --- AYARLAR ---
+RUN_AT = os.environ.get('AGROFROST_ALERT_AT', '18:30')       # Her akşam bu saatte (yerel saat)
+BUDGET = float(os.environ.get('AGROFROST_ALERT_BUDGET', '600'))  # Tüm bölgenin çalıştırması için süre (sn)
+DEFAULT_SINKS = ['file:data/alerts/alerts.jsonl']
+
+# Kullanım:
+#   python alert_daemon.py tarlalar.csv                               # her akşam 18:30'da
+#   python alert_daemon.py tarlalar.csv --once --sink file:alarmlar.jsonl --sink webhook:http://127.0.0.1:8767/alerts
+#   python alert_daemon.py tarlalar.csv --at 19:00 --budget 300 --sink smtp:ciftci@ornek.com
+# Tarla kaydı her çalıştırmada yeniden okunur; eklenen tarlalar bir sonraki akşam devreye girer.
+
+def run_alerts(registry_path, bundle, sinks, log, budget=BUDGET):
+    '''
+    Tek akşam çalıştırması: tarla kaydı -> istasyon başına tek veri isteği + tek ileri geçiş ->
+    tarla fiziği (rakım + tarla güvenlik payı) -> beyaz/siyah don alarmları -> kanallar.
+    Tüm iş `budget` saniye içinde biter; süre aşılırsa gönderilemeyen alarmlar bir sonraki çalıştırmaya kalır.
+    '''
+    deadline = time.monotonic() + budget
+    with track_run('alerts', registry=registry_path, budget=budget) as run:
+        with run.stage('load_registry') as registry_stage:
+            fields = load_registry(registry_path)
+            registry_stage['fields'] = len(fields)
+
+        # Tahmin ayrı thread'de: ağ takılırsa süre dolunca beklemeyi bırakırız (thread arka planda söner)
+        outcome = {}
+        def forecast():
+            try:
+                outcome['results'] = forecast_fields(fields, bundle, get_store())
+            except Exception as exc:
+                outcome['error'] = exc
+
+        with run.stage('forecast', fields=len(fields)):
+            worker = threading.Thread(target=forecast, daemon=True)
+            worker.start()
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+        if worker.is_alive():
+            print(f"⏰ Tahmin {budget:.0f} sn içinde bitmedi, bu akşam alarm gönderilmiyor.")
+            run.count(timed_out=1)
+            return None
+        if 'error' in outcome:
+            raise outcome['error']
+
+        results = outcome['results']
+        alerts = build_alerts(results)
+        run.count(fields=len(results), alerts=len(alerts))
+        print(f"❄️ {len(results)} tarla, {len(alerts)} don alarmı "
+              f"({(alerts['risk'] == 'siyah_don').sum()} siyah, {(alerts['risk'] == 'beyaz_don').sum()} beyaz)")
+
+        report = dispatch(alerts, sinks, log, deadline=deadline)
+
+    for name, counts in report.items():
+        print(f"🔔 {name}: {counts['sent']} gönderildi, {counts['skipped']} zaten gönderilmiş, "
+              f"{counts['failed']} hata, {counts['late']} süre aşımı")
+    return report
+
+def next_run(at, now=None):
+    '''Bir sonraki `HH:MM` anı (bugün geçtiyse yarın)'''
+    now = now or datetime.now()
+    hour, minute = map(int, at.split(':'))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return target if target > now else target + timedelta(days=1)
+
+def run_daemon(registry_path, sink_specs=DEFAULT_SINKS, at=RUN_AT, budget=BUDGET, once=False,
+               bundle_path=DEFAULT_BUNDLE, precision=None):
+    print("🚨 AgroFrost Gece Don Alarmı Başlıyor...")
+    bundle = load_bundle(bundle_path, precision=precision)
+    sinks = [make_sink(spec) for spec in sink_specs]
+    log = AlertLog()
+    print(f"📦 Model: {bundle.version}, kanallar: {', '.join(sink.name for sink in sinks)}")
+
+    if once:
+        return run_alerts(registry_path, bundle, sinks, log, budget)
+
+    while True:
+        target = next_run(at)
+        print(f"🕰️ Sonraki çalıştırma: {target:%d-%m-%Y %H:%M}")
+        # Uzun tek uyku yerine kısa adımlar: saat değişimi / uyku modu sonrası kayma olmasın
+        while datetime.now() < target:
+            time.sleep(min(60.0, (target - datetime.now()).total_seconds() + 0.1))
+        try:
+            run_alerts(registry_path, bundle, sinks, log, budget)
+        except Exception as exc:
+            # Bir akşamın hatası daemon'u durdurmaz; ertesi akşam tekrar denenir
+            print(f"❌ Alarm çalıştırması başarısız: {exc}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost gece don alarmı (kayıtlı tarlalar için zamanlanmış)")
+    parser.add_argument("registry", help="Tarla kaydı (CSV ya da Parquet)")
+    parser.add_argument("--sink", action="append", default=None,
+                        help="Alarm kanalı: file:yol.jsonl | webhook:url | smtp:alici@ornek.com (birden fazla olabilir)")
+    parser.add_argument("--at", default=RUN_AT, help="Her akşam çalıştırma saati (HH:MM)")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="Bölge çalıştırması için süre sınırı (sn)")
+    parser.add_argument("--once", action="store_true", help="Beklemeden bir kez çalıştır ve çık")
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE, help="Model paketi klasörü")
+    parser.add_argument("--precision", choices=PRECISIONS, default=None,
+                        help="Ağırlık hassasiyeti (varsayılan: AGROFROST_PRECISION ya da float32)")
+    args = parser.parse_args()
+    try:
+        run_daemon(args.registry, args.sink or DEFAULT_SINKS, args.at, args.budget, args.once,
+                   args.bundle, args.precision)
+    except KeyboardInterrupt:
+        print("\n🛑 Alarm servisi durduruldu.")
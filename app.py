@@ -1,12 +1,20 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-from meteostat import Point, Daily
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
-from src.physics_engine import apply_lapse_rate, calculate_dew_point
+from datetime import datetime
+from src.model_bundle import load_bundle
+from src.physics_engine import apply_lapse_rate, calculate_dew_point, classify_frost, FROST_LABELS
+from src.weather_store import get_store
+from src.instrumentation import track_run
+from src.prediction_cache import cached_outlook
+from src.hourly import last_night_humidity
+from src.stations import get_station_index
+
+# --- AYARLAR ---
+HUMIDITY = 45           # Saatlik nem (son gece) alınamazsa varsayım
+HISTORY_DAYS = 45       # Tahmin için depodan okunan gün sayısı
+TREND_DAYS = 30         # Grafikte gösterilen gün sayısı
+FORECAST_CACHE_ITEMS = 1000  # Süreç başına en fazla bu kadar (konum, gün) tahmini bellekte
 
 # --- SAYFA AYARLARI ---
 st.set_page_config(page_title="AgroFrost AI", page_icon="❄️", layout="wide")
@@ -29,55 +37,131 @@ safety_margin = st.sidebar.slider(
 )
 st.sidebar.info(f"Aktif: -{safety_margin}°C düşülüyor.")
 
-# --- ANALİZ FONKSİYONLARI ---
-@st.cache_data
-def get_prediction_data(lat, lon):
-    end = datetime.now()
-    start = end - timedelta(days=45)
-    location = Point(lat, lon)
-    data = Daily(location, start, end)
-    df = data.fetch()
-    df = df.interpolate(method='linear')
-    return df
-
-def run_analysis():
-    with st.spinner('📡 Uydu verileri işleniyor...'):
-        df = get_prediction_data(user_lat, user_lon)
-        
+# --- PAHALI KATMAN: model + istasyon tahmini (oturumlar arası paylaşılır) ---
+@st.cache_resource
+def get_bundle():
+    '''Model paketi süreç başına bir kez yüklenir; tüm oturumlar aynı nesneyi kullanır'''
+    return load_bundle()
+
+@st.cache_data(max_entries=FORECAST_CACHE_ITEMS, show_spinner=False)
+def station_forecast(lat, lon, day, model):
+    '''
+    (istasyon, gün, model) başına bir kez: depodan son günler + model çıktısı.
+    Sadece istasyon koordinatlarıyla çağrılır; aynı bölgedeki tüm kullanıcılar aynı önbellek kaydını paylaşır.
+    Slider / rakım değişikliği bu fonksiyona hiç girmez; `day` ertesi gün yeni tahmin ister,
+    `model` (paket parmak izi) yeni eğitilen modelde eski sonuçları geçersiz kılar.
+    '''
+    # Yerel depo: sadece eksik günler ağdan çekilir
+    bundle = get_bundle()
+    df = get_store().recent(lat, lon, days=HISTORY_DAYS, columns=bundle.features)
     if len(df) < 10:
+        return None
+    # Aynı gün/konum/model için diğer süreçlerin tahmini de kalıcı önbellekten gelir
+    outlook = cached_outlook(bundle, df, lat, lon)
+    return {
+        'last_date': df.index[-1],
+        'outlook': np.asarray(outlook, dtype='float64'),
+        'history': df['tmin'].tail(TREND_DAYS),
+        'humidity': last_night_humidity(lat, lon, HUMIDITY),
+    }
+
+def neighbor_forecast(lat, lon, farm_alt, day, model):
+    '''
+    Tarlanın en yakın istasyonları (KD-ağacı, mikro saniyeler) -> istasyon tahminleri (önbellekten) ->
+    mesafe/rakım ağırlıklı tek tahmin, en yakın istasyonun rakımında. Ham koordinat ağa hiç gitmez.
+    '''
+    index = get_station_index()
+    rows, distances, weights = (values[0] for values in index.query(lat, lon, altitudes=farm_alt))
+    reference = index.altitudes[rows[0]]
+
+    parts = []
+    for row, weight in zip(rows, weights):
+        station = index.stations.iloc[row]
+        forecast = station_forecast(float(station['lat']), float(station['lon']), day, model)
+        if forecast is not None:
+            parts.append((forecast, weight, index.altitudes[row]))
+    if not parts:
+        return None
+    # Verisi geride kalan istasyon birleştirilmez; ağırlıklar kalanlara dağıtılır
+    last_date = max(forecast['last_date'] for forecast, _, _ in parts)
+    parts = [part for part in parts if part[0]['last_date'] == last_date]
+    total = sum(weight for _, weight, _ in parts)
+
+    def blend(key):
+        # Her istasyonun değeri önce referans rakıma taşınır (lapse rate), sonra ağırlıklı ortalanır
+        return sum(apply_lapse_rate(forecast[key], altitude, reference) * weight
+                   for forecast, weight, altitude in parts) / total
+
+    return {
+        'last_date': last_date,
+        'outlook': blend('outlook'),
+        'history': blend('history').dropna(),
+        'humidity': sum(forecast['humidity'] * weight for forecast, weight, _ in parts) / total,
+        'station': index.stations['station'].iloc[rows[0]],
+        'station_altitude': reference,
+        'distance_km': float(distances[0]),
+        'stations_used': len(parts),
+    }
+
+# --- UCUZ KATMAN: fizik + tablo + grafik (her slider hareketinde yeniden) ---
+def field_view(forecast, farm_alt, margin):
+    '''İstasyon tahmininden tarla değerleri; sadece rakım/pay aritmetiği, milisaniyeler'''
+    outlook = forecast['outlook']
+    station_alt = forecast['station_altitude']
+    raw_station = float(outlook[0])
+    safe_station = raw_station - margin
+    farm_raw = float(apply_lapse_rate(raw_station, station_alt, farm_alt))
+    farm_safe = float(apply_lapse_rate(safe_station, station_alt, farm_alt))
+    outlook_farm = apply_lapse_rate(outlook - margin, station_alt, farm_alt)
+    return {
+        'raw_station': raw_station,
+        'safe_station': safe_station,
+        'farm_raw': farm_raw,
+        'farm_safe': farm_safe,
+        'dew_point': float(calculate_dew_point(farm_safe, humidity=forecast['humidity'])),
+        'outlook_farm': outlook_farm,
+        'outlook_risk': classify_frost(outlook_farm, calculate_dew_point(outlook_farm, humidity=forecast['humidity'])),
+        'trend_farm': apply_lapse_rate(forecast['history'].values, station_alt, farm_alt),
+    }
+
+def show_timings(run):
+    '''Bu çalıştırmanın aşama aşama süresi (aynı satır logs/metrics.jsonl'e de yazılır)'''
+    with st.expander(f"⏱️ Zamanlama: {run.seconds * 1000:.0f} ms"):
+        timings = run.table()
+        if timings.empty:
+            return
+        st.bar_chart(timings.set_index('stage')['seconds'])
+        st.dataframe(timings, use_container_width=True)
+
+def run_analysis(lat, lon):
+    with track_run('app', quiet=True, lat=lat, lon=lon, farm_alt=user_alt, margin=safety_margin) as run:
+        render_analysis(run, lat, lon)
+    show_timings(run)
+
+def render_analysis(run, lat, lon):
+    with run.stage('load_bundle'):
+        bundle = get_bundle()
+
+    # Önbellekteyse (aynı istasyonlar/gün daha önce istendiyse) mikro saniyeler
+    with st.spinner('📡 Uydu verileri işleniyor...'):
+        with run.stage('forecast'):
+            forecast = neighbor_forecast(lat, lon, user_alt, datetime.now().date().isoformat(), bundle.fingerprint)
+
+    if forecast is None:
         st.error("Veri alınamadı.")
         return
 
-    # Model Tahmini
-    model = load_model('models/konya_lstm_v1.h5')
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    
-    input_data = df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']].tail(7).values
-    input_scaled = scaler.fit_transform(input_data)
-    X_pred = input_scaled.reshape(1, 7, 5)
-    
-    pred_scaled = model.predict(X_pred, verbose=0)
-    dummy = np.zeros((1, 5))
-    dummy[0, 1] = pred_scaled[0, 0]
-    
-    # HAM İSTASYON TAHMİNİ
-    raw_station_pred = scaler.inverse_transform(dummy)[0, 1]
-    
-    # GÜVENLİ TAHMİN (İstasyon)
-    safe_station_pred = raw_station_pred - safety_margin
-
-    # TARLAYA UYARLAMA (Fizik Motoru)
-    # 1. Ham Veri Tarlada Kaç Derece?
-    farm_raw = apply_lapse_rate(raw_station_pred, 1016, user_alt)
-    # 2. Güvenli Veri Tarlada Kaç Derece? (Kullanıcıya gösterilen ana değer)
-    farm_safe = apply_lapse_rate(safe_station_pred, 1016, user_alt)
-    
-    dew_point = calculate_dew_point(farm_safe, humidity=45)
-    
+    # TARLAYA UYARLAMA (Fizik Motoru) — model tekrar çalışmaz
+    with run.stage('physics'):
+        view = field_view(forecast, user_alt, safety_margin)
+    raw_station_pred, safe_station_pred = view['raw_station'], view['safe_station']
+    farm_raw, farm_safe, dew_point = view['farm_raw'], view['farm_safe'], view['dew_point']
+
     # --- SONUÇ KPI KARTLARI ---
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Yapay Zeka (Ham)", f"{raw_station_pred:.1f}°C", "MGM İstasyonu")
+        st.metric("Yapay Zeka (Ham)", f"{raw_station_pred:.1f}°C",
+                  f"{forecast['station']} ({forecast['distance_km']:.0f} km, {forecast['stations_used']} istasyon)")
     with col2:
         st.metric("Güvenli Tahmin", f"{safe_station_pred:.1f}°C", f"-{safety_margin}°C (Güv. Payı)")
     with col3:
@@ -109,19 +193,35 @@ def run_analysis():
     if farm_raw > 0 and farm_safe < 0:
         st.info("💡 **Bilgi:** Yapay Zeka 'Don Yok' öngörse de, Güvenlik Kalkanı sizi korumak için 'Risk' uyarısı veriyor.")
 
-    # Grafik
+    # --- ÇOK GÜNLÜK GÖRÜNÜM (model birden fazla gün tahmin ediyorsa) ---
+    outlook = forecast['outlook']
+    if len(outlook) > 1:
+        st.subheader(f"📅 {len(outlook)} Günlük Don Görünümü")
+        outlook_dates = pd.date_range(forecast['last_date'] + pd.Timedelta(days=1), periods=len(outlook), freq='D')
+        st.table(pd.DataFrame({
+            "Tarih": outlook_dates.strftime('%d-%m-%Y'),
+            "İstasyon (Ham)": [f"{t:.1f}°C" for t in outlook],
+            "Sizin Tarlanız 🛡️": [f"{t:.1f}°C" for t in view['outlook_farm']],
+            "Risk": [FROST_LABELS[int(r)] for r in view['outlook_risk']],
+        }))
+
+    # Grafik: tarayıcıda çizilir (matplotlib PNG'si her slider hareketinde ~100+ ms sürüyordu)
     st.subheader("📈 Sıcaklık Trendi")
-    dates = df.index[-30:]
-    station_temps = df['tmin'].tail(30).values
-    farm_temps = [apply_lapse_rate(t, 1016, user_alt) for t in station_temps]
-    
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(dates, station_temps, label="İstasyon", linestyle="--", alpha=0.5)
-    ax.plot(dates, farm_temps, label="Sizin Tarlanız (Güvenli Mod)", color="red", linewidth=2)
-    ax.axhline(0, color='black', linewidth=1)
-    ax.fill_between(dates, farm_temps, 0, where=(np.array(farm_temps) < 0), color='red', alpha=0.1)
-    ax.legend()
-    st.pyplot(fig)
+    with run.stage('plot'):
+        history = forecast['history']
+        st.line_chart(pd.DataFrame({
+            "İstasyon": history.values,
+            "Sizin Tarlanız": view['trend_farm'],
+            "Don Eşiği (0°C)": np.zeros(len(history)),
+        }, index=history.index), color=["#3498db", "#e74c3c", "#000000"])
 
+# Buton sadece analizi açar; konum oturumda tutulur, slider/rakım değişince
+# sayfa yeniden çalışsa da sonuç kaybolmaz ve sadece ucuz katman yeniden hesaplanır
 if st.button("Analizi Başlat"):
-    run_analysis()
\ No newline at end of file
+    st.session_state['analysis_point'] = (user_lat, user_lon)
+
+if 'analysis_point' in st.session_state:
+    analysis_lat, analysis_lon = st.session_state['analysis_point']
+    if (analysis_lat, analysis_lon) != (user_lat, user_lon):
+        st.caption("ℹ️ Konum değişti; yeni konum için **Analizi Başlat**'a basın.")
+    run_analysis(analysis_lat, analysis_lon)
@@ -0,0 +1,45 @@
+import os
+import argparse
+from src.model_bundle import DEFAULT_BUNDLE, load_bundle
+from src.numpy_lstm import PRECISIONS
+from src.weather_store import get_store
+from src.field_registry import load_registry
+from src.batch_forecast import forecast_fields
+
+# Kullanım:
+#   python batch_predict.py tarlalar.csv -o tahminler.parquet
+# tarlalar.csv sütunları: field_id, lat, lon, altitude, crop, safety_margin
+
+OUTPUT_COLUMNS = ['field_id', 'crop', 'lat', 'lon', 'altitude', 'safety_margin',
+                  'station', 'station_distance_km', 'stations_used', 'forecast_date',
+                  'station_raw', 'station_safe', 'farm_raw', 'farm_safe', 'humidity', 'dew_point', 'risk', 'model_version']
+
+def run_batch_forecast(registry_path, output_path, bundle_path=DEFAULT_BUNDLE, precision=None):
+    print("🚜 AgroFrost Toplu Tarla Tahmini Başlıyor...")
+    fields = load_registry(registry_path)
+    bundle = load_bundle(bundle_path, precision=precision)
+
+    results = forecast_fields(fields, bundle, get_store())[OUTPUT_COLUMNS]
+
+    if os.path.splitext(output_path)[1].lower() in ('.parquet', '.pq'):
+        results.to_parquet(output_path, index=False)
+    else:
+        results.to_csv(output_path, index=False)
+
+    # --- ÖZET ---
+    print("\n" + "="*60)
+    print(f"📊 {len(results)} tarla değerlendirildi ({results['station'].nunique()} istasyon)")
+    print("="*60)
+    print(results['risk'].value_counts(dropna=False).to_string())
+    print(f"\n✅ Sonuçlar '{output_path}' dosyasına kaydedildi.")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost toplu tarla tahmini")
+    parser.add_argument("registry", help="Tarla kaydı (CSV ya da Parquet)")
+    parser.add_argument("-o", "--output", default="AgroFrost_Tarla_Tahminleri.csv")
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE, help="Model paketi klasörü")
+    parser.add_argument("--precision", choices=PRECISIONS, default=None,
+                        help="Ağırlık hassasiyeti (varsayılan: AGROFROST_PRECISION ya da float32)")
+    args = parser.parse_args()
+    run_batch_forecast(args.registry, args.output, args.bundle, args.precision)
@@ -0,0 +1,248 @@
+import io
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import contextlib
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from src.synthetic import synthetic_daily, synthetic_bundle, SyntheticProvider
+from src.weather_store import WeatherStore, HttpProvider
+from src.async_fetch import prefetch
+from src.fake_weather_server import start_fake_server
+from src.windowing import windowed_views, WindowedSeries
+from src.backtest import run_backtest
+from src.physics_engine import field_conditions
+
+# --- AYARLAR ---
+BASELINE_PATH = 'benchmarks/baseline.json'
+LAST_RUN_PATH = 'benchmarks/last_run.json'
+TOLERANCE = 0.20   # Baseline'dan %20'den fazla yavaşlama = gerileme
+
+# Veri boyutları: (ad, istasyon sayısı, gün sayısı)
+SIZES = {
+    '1y': (1, 365),
+    '25y': (1, 9131),
+    '100st': (100, 9131),
+}
+N_FIELDS = 100       # Fizik motoru ölçümünde istasyon başına tarla sayısı
+TRAIN_BATCHES = 20   # Eğitim adımı ölçümünde batch sayısı
+REMOTE_LATENCY = 0.2   # Sahte sunucuda istek başına gecikme (sn)
+REMOTE_DAYS = 30       # Uzak indirme ölçümü: gece tahmini gibi kısa aralık (ağ beklemesi baskın)
+
+# Kullanım:
+#   python benchmark.py                  # ölç ve baseline ile karşılaştır
+#   python benchmark.py --save-baseline  # bu makinedeki sonuçları baseline olarak kaydet
+#   python benchmark.py --sizes 1y 25y --stages windowing inference
+
+def measure(func, repeat=3):
+    '''En iyi süre (sn) ve o çalıştırmadaki tepe bellek (MB); tracemalloc NumPy tahsislerini de görür'''
+    best_time, best_peak, rows = None, None, None
+    for _ in range(repeat):
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if best_time is None or elapsed < best_time:
+            best_time, best_peak = elapsed, peak / 1e6
+    return {
+        'seconds': round(best_time, 6),
+        'peak_mb': round(best_peak, 3),
+        'rows': int(rows),
+        'rows_per_sec': round(rows / best_time, 1) if best_time > 0 else None,
+    }
+
+# --- AŞAMALAR ---
+# Her aşama (stations, days) alır ve ölçülecek, işlenen satır sayısını dönen bir fonksiyon üretir.
+# Fonksiyonun `close` özelliği varsa ölçümden sonra çağrılır (sunucu vb. kaynaklar sonraki aşamalara kalmasın).
+
+def stage_fetch(stations, days):
+    '''Yerel depo: boş depoya ilk yazım + interpolate (ağ yerine sentetik kaynak)'''
+    def run():
+        root = tempfile.mkdtemp(prefix='agrofrost_bench_')
+        try:
+            store = WeatherStore(root, SyntheticProvider())
+            end = np.datetime64('2000-01-01') + np.timedelta64(days - 1, 'D')
+            # Depo her çekişte konsola yazar; ölçümü kirletmesin
+            with contextlib.redirect_stdout(io.StringIO()):
+                for s in range(stations):
+                    store.daily(37.0 + s * 0.01, 32.0, '2000-01-01', str(end))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        return stations * days
+    return run
+
+def stage_fetch_remote(stations, days):
+    '''Eşzamanlı indirme: yerel sahte HTTP sunucusundan boş depoya (gecikmeli, bağlantı yeniden kullanımlı)'''
+    server, url, _ = start_fake_server(latency=REMOTE_LATENCY)
+    provider = HttpProvider(url)
+    days = min(days, REMOTE_DAYS)
+    end = np.datetime64('2000-01-01') + np.timedelta64(days - 1, 'D')
+    points = [(37.0 + s * 0.01, 32.0) for s in range(stations)]
+    def run():
+        root = tempfile.mkdtemp(prefix='agrofrost_bench_')
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                prefetch(points, '2000-01-01', str(end), store=WeatherStore(root, provider))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        return stations * days
+    def close():
+        provider.session.close()
+        server.shutdown()
+        server.server_close()
+    run.close = close
+    return run
+
+def stage_windowing(stations, days):
+    '''Pencereleme: strided görünüm + eğitimdeki gibi batch batch kopyalama'''
+    series = [np.random.rand(days, 5).astype('float32') for _ in range(stations)]
+    def run():
+        for data in series:
+            windowed_views(data, 7)
+        windowed = WindowedSeries(series, 7)
+        for _ in windowed.batches(np.arange(len(windowed)), batch_size=4096):
+            pass
+        return len(windowed)
+    return run
+
+def stage_inference(stations, days):
+    '''NumPy LSTM ileri geçişi (tüm pencereler, büyük batch'ler)'''
+    bundle = synthetic_bundle()
+    windows = WindowedSeries([np.random.rand(days, 5).astype('float32') for _ in range(stations)], 7)
+    X, _ = windows.take(np.arange(len(windows)))
+    def run():
+        bundle.predict_scaled(X)
+        return len(X)
+    return run
+
+def stage_backtest(stations, days):
+    '''Toplu backtest: ölçekleme + pencereleme + tahmin + ters ölçek (istasyon başına)'''
+    bundle = synthetic_bundle()
+    frames = [synthetic_daily(days, seed=s) for s in range(stations)]
+    def run():
+        return sum(len(run_backtest(df, bundle)) for df in frames)
+    return run
+
+def stage_physics(stations, days):
+    '''Fizik motoru: istasyon başına (gün x tarla) rakım düzeltmesi + çiğ noktası + don sınıfı'''
+    temps = [np.random.normal(2, 5, days) for _ in range(stations)]
+    altitudes = np.random.uniform(900, 1800, N_FIELDS)
+    def run():
+        for station_temps in temps:
+            field_conditions(station_temps, 1016, altitudes, humidity=45, safety_margin=1.5)
+        return stations * days * N_FIELDS
+    return run
+
+def stage_train_step(stations, days):
+    '''Keras eğitim adımı (TRAIN_BATCHES x 32); TensorFlow yoksa atlanır'''
+    try:
+        from src.ai_engine import build_lstm_model
+    except ImportError:
+        return None
+    model = build_lstm_model((7, 5))
+    windows = WindowedSeries([np.random.rand(days, 5).astype('float32') for _ in range(stations)], 7)
+    batches = list(windows.batches(np.arange(min(len(windows), TRAIN_BATCHES * 32)), batch_size=32))
+    model.train_on_batch(*batches[0])  # İlk çağrı graf derlemesi, ölçüme dahil değil
+    def run():
+        for X, y in batches:
+            model.train_on_batch(X, y)
+        return sum(len(y) for _, y in batches)
+    return run
+
+STAGES = {
+    'fetch': stage_fetch,
+    'fetch_remote': stage_fetch_remote,
+    'windowing': stage_windowing,
+    'inference': stage_inference,
+    'backtest': stage_backtest,
+    'physics': stage_physics,
+    'train_step': stage_train_step,
+}
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    '''Baseline'a göre süre oranları; tolerans üstü yavaşlamaları döner'''
+    regressions = []
+    print("\n" + "="*72)
+    print(f"{'AŞAMA':<24} | {'SÜRE (sn)':>10} | {'BASELINE':>10} | {'ORAN':>6} | DURUM")
+    print("-" * 72)
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<24} | {current['seconds']:>10.4f} | {'-':>10} | {'-':>6} | yeni")
+            continue
+        ratio = current['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        status = "✅"
+        if ratio > 1 + tolerance:
+            status = "❌ YAVAŞLADI"
+            regressions.append(key)
+        elif ratio < 1 - tolerance:
+            status = "🚀 hızlandı"
+        print(f"{key:<24} | {current['seconds']:>10.4f} | {base['seconds']:>10.4f} | {ratio:>6.2f} | {status}")
+    print("="*72)
+    return regressions
+
+def run_benchmarks(sizes, stages, repeat=3):
+    print("⏱️ AgroFrost Benchmark (çevrimdışı, sentetik veri)...")
+    results = {}
+    for size in sizes:
+        stations, days = SIZES[size]
+        for stage in stages:
+            func = STAGES[stage](stations, days)
+            if func is None:
+                print(f"⏭️ {stage}/{size}: atlandı (bağımlılık yok)")
+                continue
+            try:
+                result = measure(func, repeat=repeat)
+            finally:
+                if hasattr(func, 'close'):
+                    func.close()
+            results[f"{stage}/{size}"] = result
+            print(f"  {stage:<11} {size:<6} {result['seconds']:>9.4f} sn  "
+                  f"{result['peak_mb']:>9.1f} MB  {result['rows_per_sec']:>14,.0f} satır/sn")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost sıcak yol benchmark'ları")
+    parser.add_argument("--sizes", nargs="*", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--stages", nargs="*", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="Sonuçları baseline olarak kaydet")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.stages, repeat=args.repeat)
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count(), 'numpy': np.__version__},
+        'results': results,
+    }
+
+    os.makedirs(os.path.dirname(LAST_RUN_PATH), exist_ok=True)
+    with open(LAST_RUN_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Baseline kaydedildi: {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} aşamada gerileme: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Gerileme yok.")
+    else:
+        print(f"\nℹ️ Baseline yok; oluşturmak için: python benchmark.py --save-baseline")
@@ -1,11 +1,10 @@
 import matplotlib.pyplot as plt
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from meteostat import Point, Daily
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
+from src.model_bundle import load_bundle
 from src.physics_engine import apply_lapse_rate
+from src.weather_store import get_store
+from src.prediction_cache import cached_outlook
 
 # --- AYARLAR ---
 LAT = 37.8714
@@ -17,33 +16,19 @@ def generate_comparison_report():
     print("🎨 Gelişmiş Grafik Motoru Çalışıyor...")
     
     # 1. Veriyi Çek
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=15) # Son 15 gün yeterli
-    
-    location = Point(LAT, LON)
-    data = Daily(location, start_date, end_date)
-    df = data.fetch()
-    df = df.interpolate(method='linear')
+    df = get_store().recent(LAT, LON, days=15) # Son 15 gün yeterli
     
     dates = df.index
     station_temps = df['tmin'].values
     
     # 2. Tarlayı Hesapla (Fizik Motoru Devrede)
-    # Her günün sıcaklığını Lapse Rate ile tarlaya uyarla
-    farm_temps = [apply_lapse_rate(t, STATION_ALT, FARM_ALT) for t in station_temps]
+    # Tüm günlerin sıcaklığını Lapse Rate ile tek seferde tarlaya uyarla
+    farm_temps = apply_lapse_rate(station_temps, STATION_ALT, FARM_ALT)
     
     # 3. Gelecek Tahmini (AI)
-    model = load_model('models/konya_lstm_v1.h5')
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    
-    input_data = df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']].tail(7).values
-    input_scaled = scaler.fit_transform(input_data)
-    X_pred = input_scaled.reshape(1, 7, 5)
-    
-    pred_scaled = model.predict(X_pred, verbose=0)
-    dummy = np.zeros((1, 5))
-    dummy[0, 1] = pred_scaled[0, 0]
-    pred_station = scaler.inverse_transform(dummy)[0, 1]
+    # Eğitimdeki scaler model paketinden gelir (son 7 güne fit edilmez)
+    bundle = load_bundle()
+    pred_station = float(cached_outlook(bundle, df, LAT, LON)[0])
     
     # Tahmini Tarlaya Uyarlama
     pred_farm = apply_lapse_rate(pred_station, STATION_ALT, FARM_ALT)
@@ -0,0 +1,51 @@
+import argparse
+from src.event_store import get_event_store, CATEGORIES
+from src.evaluation import render_events
+
+# Kullanım:
+#   python events.py --category missed --start 2020-01-01               # son çalıştırmaların kaçırılan donları
+#   python events.py --runs                                             # depodaki çalıştırmalar
+#   python events.py --category caught --all-runs -o yakalanan.csv      # tüm çalıştırmalar, CSV olarak
+
+# Kategori başına CSV/konsol sütun başlıkları (validate.py raporlarıyla aynı)
+COLUMNS = {
+    'caught': ({'actual': "MGM_İstasyon (Gerçek)", 'predicted': "AgroFrost_Tarla (Tahmin)", 'diff': "Fark"},
+               "⚠️ GİZLİ DON YAKALANDI"),
+    'consensus': ({'actual': "MGM_Gerçek", 'predicted': "AgroFrost_Tahmin"}, "✅ DOĞRULANDI"),
+    'missed': ({'actual': "Gerçek_MGM", 'predicted': "Hatalı_Tahmin", 'diff': "Hata_Payı"}, "❌ RİSKLİ HATA"),
+}
+
+def show_events(category, start=None, end=None, station=None, run_id=None, all_runs=False, output=None):
+    events = get_event_store().query(start=start, end=end, category=category, station=station, run_id=run_id,
+                                     latest=not all_runs and run_id is None)
+    print(f"🗂️ {len(events)} olay ({category}, {events['run_id'].nunique() if len(events) else 0} çalıştırma)")
+    if events.empty:
+        return events
+
+    columns, status = COLUMNS[category]
+    table = render_events(events, columns, status)
+    table.insert(1, "İstasyon", events['station'].values)
+    table["Model"] = events['model_version'].values
+    table["Çalıştırma"] = events['run_id'].values
+    print(table.tail(20).to_string(index=False))
+    if output:
+        table.to_csv(output, index=False)
+        print(f"\n✅ '{output}' dosyasına kaydedildi.")
+    return events
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Doğrulama olay deposu sorgusu")
+    parser.add_argument("--category", choices=CATEGORIES, default='missed')
+    parser.add_argument("--start", help="Başlangıç tarihi (YYYY-AA-GG)")
+    parser.add_argument("--end", help="Bitiş tarihi (YYYY-AA-GG)")
+    parser.add_argument("--station", help="İstasyon anahtarı (örn: 37.8714_32.4846)")
+    parser.add_argument("--run-id", help="Sadece bu çalıştırma")
+    parser.add_argument("--all-runs", action="store_true", help="Her istasyon için sadece son çalıştırma değil, hepsi")
+    parser.add_argument("--runs", action="store_true", help="Depodaki çalıştırmaları listele")
+    parser.add_argument("-o", "--output", help="CSV çıktısı")
+    args = parser.parse_args()
+
+    if args.runs:
+        print(get_event_store().runs().to_string(index=False))
+    else:
+        show_events(args.category, args.start, args.end, args.station, args.run_id, args.all_runs, args.output)
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from datetime import datetime
+from src.model_bundle import DEFAULT_BUNDLE, MODEL_FILE, load_bundle
+from src.numpy_lstm import WEIGHTS_FILE, export_h5_weights, quantize_weights, weights_file
+
+# --- AYARLAR ---
+PARITY_SAMPLES = 512   # Karşılaştırma için rastgele pencere sayısı
+PARITY_TOLERANCE = 1e-4  # Ölçekli çıktıda izin verilen en büyük fark
+
+# Doğruluk kapısı: validate_missed.py ile aynı istasyon ve dönem
+GATE_START = datetime(2015, 1, 1)
+GATE_END = datetime(2025, 1, 1)
+
+def export_numpy_weights(bundle_path=DEFAULT_BUNDLE):
+    '''Paketteki .h5 modelden TensorFlow'suz çıkarım için weights.npz üretir'''
+    out_path = os.path.join(bundle_path, WEIGHTS_FILE)
+    export_h5_weights(os.path.join(bundle_path, MODEL_FILE), out_path)
+    print(f"✅ NumPy ağırlıkları yazıldı: {out_path}")
+    return out_path
+
+def check_parity(bundle_path=DEFAULT_BUNDLE, samples=PARITY_SAMPLES, tolerance=PARITY_TOLERANCE):
+    '''Aynı pencereleri Keras ve NumPy motorundan geçirip farkı ölçer'''
+    keras_bundle = load_bundle(bundle_path, engine='keras')
+    numpy_bundle = load_bundle(bundle_path, engine='numpy')
+
+    # Eğitim verisi [0, 1] aralığına ölçeklendiği için rastgele pencereler de o aralıkta
+    rng = np.random.default_rng(42)
+    windows = rng.random((samples, keras_bundle.window_size, len(keras_bundle.features)), dtype='float32')
+
+    expected = keras_bundle.predict_scaled(windows)
+    actual = numpy_bundle.predict_scaled(windows)
+    max_diff = float(np.max(np.abs(expected - actual)))
+
+    print(f"🔬 Keras vs NumPy ({samples} pencere): en büyük fark = {max_diff:.2e} (tolerans {tolerance:.0e})")
+    return max_diff <= tolerance
+
+def export_quantized(bundle_path, precision):
+    '''float32 weights.npz'den float16 / int8 kopya üretir'''
+    src_path = os.path.join(bundle_path, WEIGHTS_FILE)
+    out_path = os.path.join(bundle_path, weights_file(precision))
+    quantize_weights(src_path, out_path, precision)
+    print(f"✅ {precision} ağırlıkları yazıldı: {out_path} "
+          f"({os.path.getsize(out_path) / 1024:.0f} KB, float32: {os.path.getsize(src_path) / 1024:.0f} KB)")
+    return out_path
+
+def gate_metrics(results):
+    '''Kapının baktığı sayılar: kaçırılan don (validate_missed), tarla karışıklık matrisi, hata'''
+    from validate import STATION_ALT, TEST_FARM_ALT
+    from src.evaluation import missed_frosts, confusion_summary
+    summary = confusion_summary(results, STATION_ALT, TEST_FARM_ALT)
+    return {
+        'missed_frosts': int(len(missed_frosts(results))),
+        'tp': summary['tp'], 'fn': summary['fn'], 'fp': summary['fp'], 'tn': summary['tn'],
+        'mae': float((results['actual_tmin'] - results['predicted_tmin']).abs().mean()),
+    }
+
+def accuracy_gate(bundle_path, precision, df):
+    '''
+    Geçmiş backtest'i float32 ve düşük hassasiyetli modelle tekrar oynatır.
+    Geçer: kaçırılan don sayısı ve tarla ölçeğinde kaçırılan (fn) don artmamışsa.
+    Don / don yok kararı değişen günler ve ek yanlış alarmlar raporlanır ama kapıyı düşürmez.
+    '''
+    from src.backtest import run_backtest
+
+    reference = load_bundle(bundle_path, engine='numpy', precision='float32')
+    candidate = load_bundle(bundle_path, precision=precision)
+
+    timings = {}
+    outputs = {}
+    for name, bundle in (('float32', reference), (precision, candidate)):
+        started = time.perf_counter()
+        outputs[name] = run_backtest(df, bundle)
+        timings[name] = time.perf_counter() - started
+
+    ref, cand = outputs['float32'], outputs[precision]
+    ref_frost = ref['predicted_tmin'] < 0
+    cand_frost = cand['predicted_tmin'] < 0
+    before, after = gate_metrics(ref), gate_metrics(cand)
+    passed = after['missed_frosts'] <= before['missed_frosts'] and after['fn'] <= before['fn']
+
+    report = {
+        'precision': precision,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'period': [str(df.index[0].date()), str(df.index[-1].date())],
+        'days': len(ref),
+        'max_abs_diff': float((ref['predicted_tmin'] - cand['predicted_tmin']).abs().max()),
+        'decision_flips': int((ref_frost != cand_frost).sum()),
+        'float32': before,
+        precision: after,
+        'seconds': {name: round(value, 3) for name, value in timings.items()},
+        'size_kb': {
+            'float32': round(os.path.getsize(os.path.join(bundle_path, WEIGHTS_FILE)) / 1024, 1),
+            precision: round(os.path.getsize(os.path.join(bundle_path, weights_file(precision))) / 1024, 1),
+        },
+        'passed': passed,
+    }
+    with open(os.path.join(bundle_path, f'accuracy_gate_{precision}.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*60)
+    print(f"🚦 DOĞRULUK KAPISI: float32 vs {precision} ({report['days']} gün)")
+    print("="*60)
+    print(f"{'':<24} | {'float32':>10} | {precision:>10}")
+    print("-" * 50)
+    for key, title in (('missed_frosts', 'Kaçırılan Don'), ('fn', 'Tarla: Kaçırılan (FN)'),
+                       ('tp', 'Tarla: Yakalanan (TP)'), ('fp', 'Tarla: Yanlış Alarm'), ('mae', 'MAE (°C)')):
+        print(f"{title:<24} | {before[key]:>10.3f} | {after[key]:>10.3f}" if key == 'mae'
+              else f"{title:<24} | {before[key]:>10} | {after[key]:>10}")
+    print("-" * 50)
+    print(f"📏 En büyük tahmin farkı: {report['max_abs_diff']:.4f}°C, karar değişen gün: {report['decision_flips']}")
+    print(f"📦 Boyut: {report['size_kb']['float32']} KB -> {report['size_kb'][precision]} KB")
+    print("✅ Kapı geçti." if passed else "❌ Kapı geçmedi: düşük hassasiyet donları daha çok kaçırıyor.")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model paketini TensorFlow'suz / düşük hassasiyetli çıkarım için dışa aktarır")
+    parser.add_argument("bundle", nargs="?", default=DEFAULT_BUNDLE, help="Model paketi klasörü")
+    parser.add_argument("--quantize", nargs="+", choices=['float16', 'int8'], default=[],
+                        help="Düşük hassasiyetli ağırlıklar üret ve doğruluk kapısından geçir")
+    parser.add_argument("--start", default=GATE_START.strftime('%Y-%m-%d'), help="Kapı backtest başlangıcı")
+    parser.add_argument("--end", default=GATE_END.strftime('%Y-%m-%d'), help="Kapı backtest bitişi")
+    args = parser.parse_args()
+    bundle_path = args.bundle
+
+    # weights.npz zaten varsa kuantalama için TensorFlow gerekmez
+    if not args.quantize or not os.path.exists(os.path.join(bundle_path, WEIGHTS_FILE)):
+        export_numpy_weights(bundle_path)
+        if check_parity(bundle_path):
+            print("✅ Parite testi geçti.")
+        else:
+            print("❌ Parite testi başarısız! NumPy motoru Keras ile uyuşmuyor.")
+            sys.exit(1)
+
+    if args.quantize:
+        from validate import LAT, LON
+        from src.weather_store import get_store
+        df = get_store().daily(LAT, LON, datetime.fromisoformat(args.start), datetime.fromisoformat(args.end))
+
+        failed = []
+        for precision in args.quantize:
+            out_path = export_quantized(bundle_path, precision)
+            if not accuracy_gate(bundle_path, precision, df)['passed']:
+                # Kapıdan geçmeyen dosya pakette kalmaz; yanlışlıkla sahaya çıkmasın
+                os.remove(out_path)
+                failed.append(precision)
+        if failed:
+            print(f"❌ Kapıdan geçemeyen hassasiyetler silindi: {', '.join(failed)}")
+            sys.exit(1)
@@ -1,26 +1,13 @@
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
-from meteostat import Point, Daily
+from src.model_bundle import load_bundle
 from src.physics_engine import apply_lapse_rate, calculate_dew_point
+from src.rolling_state import RollingForecaster
+from src.hourly import last_night_humidity
 
 # --- AYARLAR ---
 STATION_LAT = 37.8714
 STATION_LON = 32.4846
 STATION_ALTITUDE = 1016 # Konya Merkez
 
-def get_live_data():
-    # Son verileri çek
-    end = datetime.now()
-    start = end - timedelta(days=60) 
-    location = Point(STATION_LAT, STATION_LON)
-    data = Daily(location, start, end)
-    df = data.fetch()
-    df = df.interpolate(method='linear')
-    return df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']]
-
 def run_safety_test():
     print("\n🛡️ AGROFROST GÜVENLİK SİMÜLASYONU BAŞLATILIYOR...\n")
     
@@ -29,22 +16,11 @@ def run_safety_test():
     safety_margin = float(input("2. Güvenlik Payı kaç derece olsun? (Örn: 1.5): "))
     
     print("\n📡 Veriler çekiliyor ve analiz yapılıyor...")
-    df = get_live_data()
+    bundle = load_bundle()
     
     # 2. Yapay Zeka Tahmini (HAM)
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df.values)
-    
-    last_7_days = scaled_data[-7:].reshape(1, 7, 5)
-    model = load_model('models/konya_lstm_v1.h5')
-    
-    pred_scaled = model.predict(last_7_days, verbose=0)
-    
-    dummy = np.zeros((1, 5))
-    dummy[0, 1] = pred_scaled[0, 0]
-    
-    # İSTASYONDAKİ HAM TAHMİN
-    raw_station_pred = scaler.inverse_transform(dummy)[0, 1]
+    # İSTASYONDAKİ HAM TAHMİN (kalıcı pencere; sadece son çalıştırmadan beri yeni günler çekilir)
+    raw_station_pred, _ = RollingForecaster(bundle).forecast(STATION_LAT, STATION_LON)
     
     # 3. Güvenlik Payı Uygulanmış Tahmin
     safe_station_pred = raw_station_pred - safety_margin
@@ -57,7 +33,8 @@ def run_safety_test():
     farm_safe = apply_lapse_rate(safe_station_pred, STATION_ALTITUDE, user_alt)
     
     # Çiğ Noktası Hesabı (Risk Türü İçin)
-    dew_point = calculate_dew_point(farm_safe, humidity=45)
+    # Nem: son gecenin saatlik ortalaması (alınamazsa %45)
+    dew_point = calculate_dew_point(farm_safe, humidity=last_night_humidity(STATION_LAT, STATION_LON, default=45))
 
     # --- 5. SONUÇ TABLOSU (ŞEFFAFLIK RAPORU) ---
     print("\n" + "="*50)
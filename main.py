@@ -1,41 +1,84 @@
 import os
-import numpy as np
+import argparse
 from sklearn.preprocessing import MinMaxScaler
+from tensorflow.keras.models import load_model
 from src.data_loader import fetch_historical_data
-from src.ai_engine import create_windowed_dataset, build_lstm_model
+from src.model_bundle import save_bundle, DEFAULT_BUNDLE
+from src.training import train_bundle, FAST_PARAMS, CHECKPOINT_DIR
+from src.instrumentation import track_run
 
 # KONYA AYARLARI
 LAT = 37.8714
 LON = 32.4846
 START_YEAR = 2000
 END_YEAR = 2025
+WINDOW_SIZE = 7
+LEGACY_MODEL = 'models/konya_lstm_v1.h5'
 
-def run_training_pipeline():
+def run_training_pipeline(streaming=False, horizon=1, params=None, resume=True, hourly=False):
     print("🚀 AgroFrost Başlatılıyor...")
+    params = {'window_size': WINDOW_SIZE, 'streaming': streaming, 'horizon': horizon, **(params or {})}
     
     # 1. Klasör Kontrolü
     if not os.path.exists('models'):
         os.makedirs('models')
 
-    # 2. Veri
-    df = fetch_historical_data(LAT, LON, START_YEAR, END_YEAR)
+    with track_run('train', streaming=streaming, horizon=horizon, batch_size=params.get('batch_size'),
+                   hourly=hourly) as run:
+        # 2. Veri
+        with run.stage('fetch') as fetch_stage:
+            df = fetch_historical_data(LAT, LON, START_YEAR, END_YEAR, hourly=hourly)
+            fetch_stage['rows'] = len(df)
+        
+        # 3-4. Ön İşleme + Model Eğitimi
+        # Akış modunda X hiç oluşturulmaz: pencereler batch batch kopyalanır, sıradaki batch önceden hazırlanır
+        # horizon > 1: Dense(H) çıkışı, sonraki H günün tmin'i tek geçişte
+        print(f"🧠 Model Eğitiliyor ({len(df)} gün, {'Akış Modu' if streaming else 'Bellek İçi'}, {horizon} gün ufuk)...")
+        # Her epoch checkpoint'e yazılır: kesilen eğitim aynı komutla kaldığı yerden sürer
+        with run.stage('train'):
+            summary = train_bundle(df, DEFAULT_BUNDLE, params=params,
+                                   checkpoint_dir=CHECKPOINT_DIR if resume else None)
     
-    # 3. Ön İşleme
+    # 5. Kayıt (Model + Scaler + Özellik sırası tek pakette)
+    print(f"✅ Model paketi başarıyla kaydedildi: {DEFAULT_BUNDLE} ({summary['windows']} pencere, "
+          f"{summary['epochs']} epoch, val_loss={summary['val_loss']})")
+
+def migrate_legacy_model():
+    '''
+    Eski tek dosyalık modeli (konya_lstm_v1.h5) pakete çevirir.
+    Scaler aynı eğitim verisiyle yeniden fit edilir (MinMax deterministik, sonuç aynı).
+    '''
+    df = fetch_historical_data(LAT, LON, START_YEAR, END_YEAR)
     scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df.values)
-    
-    X, y = create_windowed_dataset(scaled_data, window_size=7)
-    
-    # 4. Model
-    print(f"🧠 Model Eğitiliyor (Veri Boyutu: {X.shape})...")
-    model = build_lstm_model((X.shape[1], X.shape[2]))
-    
-    model.fit(X, y, epochs=20, batch_size=32, validation_split=0.1)
-    
-    # 5. Kayıt
-    save_path = 'models/konya_lstm_v1.h5'
-    model.save(save_path)
-    print(f"✅ Model başarıyla kaydedildi: {save_path}")
+    scaler.fit(df.values)
+    model = load_model(LEGACY_MODEL, compile=False)
+    save_bundle(DEFAULT_BUNDLE, model, scaler, features=df.columns, window_size=WINDOW_SIZE)
+    print(f"✅ {LEGACY_MODEL} -> {DEFAULT_BUNDLE} dönüştürüldü.")
 
 if __name__ == "__main__":
-    run_training_pipeline()
+    parser = argparse.ArgumentParser(description="AgroFrost model eğitimi")
+    parser.add_argument("--migrate", action="store_true", help="Eski konya_lstm_v1.h5'i pakete çevir")
+    parser.add_argument("--stream", action="store_true", help="Pencereleri batch batch üret (düşük bellek)")
+    parser.add_argument("--horizon", type=int, default=1, help="Tek geçişte tahmin edilecek gün sayısı (örn: 7)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Büyük batch + yüksek öğrenme oranı + erken durdurma (src/training.py FAST_PARAMS)")
+    parser.add_argument("--epochs", type=int, help="En fazla epoch sayısı")
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--lr", type=float, help="Başlangıç öğrenme oranı")
+    parser.add_argument("--lr-schedule", choices=['plateau', 'cosine'])
+    parser.add_argument("--patience", type=int, help="val_loss bu kadar epoch iyileşmezse dur (0: kapalı)")
+    parser.add_argument("--threads", type=int, help="TensorFlow CPU thread sayısı")
+    parser.add_argument("--no-resume", action="store_true", help="Checkpoint kullanma (her seferinde baştan)")
+    parser.add_argument("--hourly", action="store_true",
+                        help="Saatlik veriden gece özelliklerini (gece min., çiğ noktası, nem, rüzgarsız saat) ekle")
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_legacy_model()
+    else:
+        params = dict(FAST_PARAMS) if args.fast else {}
+        overrides = {'epochs': args.epochs, 'batch_size': args.batch_size, 'learning_rate': args.lr,
+                     'lr_schedule': args.lr_schedule, 'patience': args.patience, 'threads': args.threads}
+        params.update({key: value for key, value in overrides.items() if value is not None})
+        run_training_pipeline(streaming=args.stream, horizon=args.horizon, params=params,
+                              resume=not args.no_resume, hourly=args.hourly)
@@ -1,10 +1,9 @@
-import numpy as np
+from src.model_bundle import load_bundle
 import pandas as pd
-from datetime import datetime, timedelta
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
-from meteostat import Point, Daily
-from src.physics_engine import calculate_dew_point, apply_lapse_rate
+from src.physics_engine import calculate_dew_point, apply_lapse_rate, classify_frost, FROST_LABELS
+from src.rolling_state import RollingForecaster
+from src.instrumentation import track_run
+from src.hourly import last_night_humidity
 
 # --- AYARLAR ---
 # Konya İstasyon Bilgileri (Modelin Referans Noktası)
@@ -12,59 +11,36 @@ STATION_LAT = 37.8714
 STATION_LON = 32.4846
 STATION_ALTITUDE = 1016 # Konya Ovası ortalama rakım (metre)
 
-def get_live_data():
-    """
-    Modelin tahmin yapabilmesi için SON 1 YILLIK veriyi çeker.
-    Neden 1 yıl? Çünkü 'Scaler' (Ölçekleyici) kalibrasyonu için 
-    geniş bir aralığa ihtiyacımız var. Sadece dünü çekersek matematik bozulur.
-    """
-    end = datetime.now()
-    start = end - timedelta(days=365) 
-    
-    location = Point(STATION_LAT, STATION_LON)
-    data = Daily(location, start, end)
-    df = data.fetch()
-    
-    # Eksikleri doldur
-    df = df.interpolate(method='linear')
-    
-    # Sonuçta bize sadece son 7 gün lazım ama scaler için hepsini kullandık
-    return df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']]
-
 def make_prediction():
-    print("📡 Canlı meteoroloji verileri alınıyor...")
-    df = get_live_data()
-    
-    # --- VERİ HAZIRLIĞI ---
-    # Veriyi 0 ile 1 arasına sıkıştır (Eğitimdeki mantığın aynısı)
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df.values)
-    
-    # Modelin son 7 güne bakması lazım (Son 7 satırı al)
-    last_7_days = scaled_data[-7:] 
-    
-    # LSTM formatına sok: (1, 7, 5) -> 1 tahmin, 7 gün, 5 özellik
-    X_input = last_7_days.reshape(1, 7, 5)
-    
-    # --- KATMAN 1: YAPAY ZEKA TAHMİNİ ---
-    print("🧠 Yapay Zeka (LSTM) çalıştırılıyor...")
-    model = load_model('models/konya_lstm_v1.h5')
-    prediction_scaled = model.predict(X_input, verbose=0)
-    
-    # Tahmini normal sıcaklığa geri çevir (Inverse Transform)
-    # Scaler 5 sütun bekler, bizde tek çıktı var. Hile yaparak matrisi dolduralım.
-    dummy_matrix = np.zeros((1, 5))
-    dummy_matrix[0, 1] = prediction_scaled[0, 0] # 1. indeks tmin idi
-    prediction_actual = scaler.inverse_transform(dummy_matrix)[0, 1]
-    
+    # Aşama süreleri logs/metrics.jsonl'e yazılır (AGROFROST_PROFILE=cprofile|memory ile profil)
+    with track_run('predict') as run:
+        # Model + eğitimdeki scaler + özellik sırası tek pakette
+        with run.stage('load_bundle'):
+            bundle = load_bundle()
+        
+        # --- KATMAN 1: YAPAY ZEKA TAHMİNİ ---
+        # Kalıcı pencere: ölçekli son 7 gün diskte durur, sadece dünden bu yana yeni gün(ler) çekilir
+        # ve ölçeklenir; (1, 7, 5) pencere modele verilir, tahmin tekrar °C'ye çevrilir
+        # Çok günlük modelde tüm ufuk (H gün) aynı tek geçişten gelir
+        print("📡 Yeni günler alınıyor, 🧠 Yapay Zeka (LSTM) çalıştırılıyor...")
+        outlook, state = RollingForecaster(bundle).outlook(STATION_LAT, STATION_LON)
+    
+    prediction_actual = float(outlook[0])
     print(f"\n--- 🌡️ İSTASYON TAHMİNİ (MERKEZ) ---")
     print(f"Yarın için Öngörülen Min. Sıcaklık: {prediction_actual:.2f}°C")
     
-    return prediction_actual, df.iloc[-1] # Tahmin ve son günün verisi
+    dates = pd.date_range(state.last_date + pd.Timedelta(days=1), periods=len(outlook), freq='D')
+    if len(outlook) > 1:
+        print(f"\n📅 {len(outlook)} Günlük Görünüm:")
+        for day, temp in zip(dates, outlook):
+            print(f"   {day:%d-%m-%Y}: {temp:>6.2f}°C")
+    
+    # Tahmin, son günün verisi ve (tarih indeksli) çok günlük görünüm
+    return prediction_actual, state.last_row(), pd.Series(outlook, index=dates)
 
 # --- ANA PROGRAM ---
 if __name__ == "__main__":
-    base_pred, last_day_data = make_prediction()
+    base_pred, last_day_data, outlook = make_prediction()
     
     print("\n🚜 --- KATMAN 2: TARLA ÖZEL ANALİZİ ---")
     user_alt = float(input("Lütfen tarlanızın rakımını (metre) girin: "))
@@ -73,9 +49,8 @@ if __name__ == "__main__":
     field_temp = apply_lapse_rate(base_pred, STATION_ALTITUDE, user_alt)
     
     # 2. Çiğ Noktası Riski (Siyah Don)
-    # Eğer nem verisi yoksa Konya ortalaması %40 al
-    humidity = 40 
-    # Not: Meteostat ücretsiz sürümde bazen nem vermez, burada varsayım yaptık.
+    # Nem: son gecenin saatlik ortalaması; saatlik veri yoksa Konya ortalaması %40
+    humidity = last_night_humidity(STATION_LAT, STATION_LON, default=40)
     
     dew_point = calculate_dew_point(field_temp, humidity)
     
@@ -94,4 +69,12 @@ if __name__ == "__main__":
             print("☠️ KRİTİK RİSK: SİYAH DON! Havadaki nem donmadan bitki donacak.")
             print("   (Sulama sistemlerini şimdiden hazırlayın!)")
     else:
-        print("✅ Güvendesiniz. Don riski düşük.")
\ No newline at end of file
+        print("✅ Güvendesiniz. Don riski düşük.")
+    
+    # Sonraki günler (çok günlük model varsa): aynı düzeltmeler tüm ufka tek seferde
+    if len(outlook) > 1:
+        field_outlook = apply_lapse_rate(outlook.values, STATION_ALTITUDE, user_alt)
+        risks = classify_frost(field_outlook, calculate_dew_point(field_outlook, humidity))
+        print(f"\n📅 TARLA GÖRÜNÜMÜ ({len(outlook)} gün):")
+        for day, temp, risk in zip(outlook.index, field_outlook, risks):
+            print(f"   {day:%d-%m-%Y}: {temp:>6.2f}°C  {FROST_LABELS[int(risk)]}")
@@ -0,0 +1,68 @@
+import argparse
+from datetime import datetime, timedelta
+from src.raster_engine import DemSource, build_risk_raster, render_risk_map, TILE_SIZE
+from src.instrumentation import track_run
+
+# --- AYARLAR ---
+# Konya İstasyonu (Modelin Referans Noktası)
+STATION_LAT = 37.8714
+STATION_LON = 32.4846
+STATION_ALTITUDE = 1016
+HUMIDITY = 45  # Nem verisi yoksa varsayım (app.py ile aynı)
+OUTPUT = 'AgroFrost_Risk_Haritasi'
+
+# Kullanım:
+#   python risk_map.py data/dem/konya_30m.npy                 # yarının istasyon tahmini ile
+#   python risk_map.py data/dem/konya_30m.tif --station-temp -1.5 --margin 1.0 -o harita
+# .npy DEM için transform/nodata isteğe bağlı olarak yanındaki .json'dan okunur:
+#   {"transform": [x0, 30, 0, y0, 0, -30], "nodata": -32768, "crs": "EPSG:32636"}
+
+def station_forecast():
+    '''Yarının istasyon tmin tahmini (model paketi + yerel depo)'''
+    from src.model_bundle import load_bundle
+    from src.weather_store import get_store
+    bundle = load_bundle()
+    df = get_store().recent(STATION_LAT, STATION_LON, days=2 * bundle.window_size, columns=bundle.features)
+    return bundle.predict_next(df), df.index[-1] + timedelta(days=1)
+
+def run_risk_map(dem_path, output=OUTPUT, station_temp=None, humidity=HUMIDITY, safety_margin=0.0,
+                 tile_size=TILE_SIZE):
+    print("🗺️ AgroFrost Bölgesel Risk Haritası Hazırlanıyor...")
+    with track_run('risk_map', dem=dem_path) as run:
+        with run.stage('forecast'):
+            if station_temp is None:
+                station_temp, forecast_date = station_forecast()
+            else:
+                forecast_date = datetime.now().date() + timedelta(days=1)
+        print(f"🌡️ İstasyon tahmini ({forecast_date:%d-%m-%Y}): {station_temp:.2f}°C, güvenlik payı -{safety_margin}°C")
+
+        dem = DemSource(dem_path)
+        print(f"⛰️ DEM: {dem.shape[0]} x {dem.shape[1]} hücre, {tile_size} hücrelik karolar halinde işleniyor...")
+        with run.stage('raster', cells=dem.shape[0] * dem.shape[1]):
+            meta = build_risk_raster(dem, f"{output}.npy", station_temp, STATION_ALTITUDE, humidity,
+                                     safety_margin=safety_margin, tile_size=tile_size)
+        dem.close()
+
+        with run.stage('render'):
+            render_risk_map(f"{output}.npy", f"{output}.png",
+                            title=f"AgroFrost Don Risk Haritası ({forecast_date:%d-%m-%Y}, -{safety_margin}°C)")
+
+    print("\n" + "="*50)
+    print("📊 RİSK DAĞILIMI")
+    print("="*50)
+    for label, cells in meta['cells'].items():
+        area = f"  ({meta['area_km2'][label]:,.1f} km²)" if meta['area_km2'] else ""
+        print(f"{label:<12}: {cells:>12,} hücre{area}")
+    print(f"\n✅ Risk raster'ı: {output}.npy (+ {output}.json), harita: {output}.png")
+    return meta
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DEM üzerinde hücre hücre don riski haritası")
+    parser.add_argument("dem", help="Yükseklik modeli (.npy ya da GeoTIFF)")
+    parser.add_argument("-o", "--output", default=OUTPUT, help="Çıktı adı (uzantısız)")
+    parser.add_argument("--station-temp", type=float, default=None, help="İstasyon tahmini (°C); verilmezse model çalışır")
+    parser.add_argument("--humidity", type=float, default=HUMIDITY)
+    parser.add_argument("--margin", type=float, default=0.0, help="Güvenlik payı (°C)")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="Karo kenarı (hücre)")
+    args = parser.parse_args()
+    run_risk_map(args.dem, args.output, args.station_temp, args.humidity, args.margin, args.tile)
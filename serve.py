@@ -0,0 +1,86 @@
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.model_bundle import DEFAULT_BUNDLE, load_bundle
+from src.numpy_lstm import PRECISIONS
+from src.weather_store import get_store
+from src.inference_service import ForecastService, MAX_BATCH, MAX_WAIT_MS
+
+# --- AYARLAR ---
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Kullanım:
+#   python serve.py
+#   curl -X POST localhost:8765/predict -d '{"lat": 37.87, "lon": 32.48, "altitude": 1250, "safety_margin": 1.5}'
+#   curl localhost:8765/stats
+
+def make_handler(service):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'model_version': service.bundle.version})
+            elif self.path == '/stats':
+                self._send(200, service.stats())
+            else:
+                self._send(404, {'error': 'bulunamadı'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': 'bulunamadı'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                # Tek tarla (dict) ya da tarla listesi kabul edilir
+                if isinstance(payload, list):
+                    self._send(200, service.forecast(payload))
+                else:
+                    self._send(200, service.forecast([payload])[0])
+            except (KeyError, ValueError, TypeError) as exc:
+                # İstek doğrulama hatası: sadece bu istemciye 400
+                self._send(400, {'error': str(exc)})
+            except Exception as exc:
+                # Depo / ağ / model hatası: bağlantı kopmasın, JSON hata dönsün
+                self._send(500, {'error': f"{type(exc).__name__}: {exc}"})
+
+        def log_message(self, format, *args):
+            # Her isteği konsola basma (yük altında darboğaz olur); istatistikler /stats'ta
+            pass
+
+    return ForecastHandler
+
+def run_server(host=HOST, port=PORT, bundle_path=DEFAULT_BUNDLE, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS,
+               precision=None):
+    print("🧠 Model bir kez yükleniyor...")
+    bundle = load_bundle(bundle_path, precision=precision)
+    service = ForecastService(bundle, get_store(), max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"✅ AgroFrost tahmin servisi hazır: http://{host}:{port} (motor: {bundle.engine}/{bundle.precision}, model: {bundle.version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servis durduruldu.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost kalıcı tahmin servisi")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE, help="Model paketi klasörü")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--precision", choices=PRECISIONS, default=None,
+                        help="Ağırlık hassasiyeti (varsayılan: AGROFROST_PRECISION ya da float32)")
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.bundle, args.max_batch, args.max_wait_ms, args.precision)
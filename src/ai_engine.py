@@ -1,21 +1,98 @@
-import numpy as np
+import time
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import Callback
+from src.windowing import WindowedSeries, windowed_views
 
-def create_windowed_dataset(data, window_size=7):
-    X, y = [], []
-    for i in range(len(data) - window_size):
-        X.append(data[i:(i + window_size), :])
-        # Hedef: tmin (1. indeks olduğunu varsayıyoruz)
-        y.append(data[i + window_size, 1]) 
-    return np.array(X), np.array(y)
+def create_windowed_dataset(data, window_size=7, horizon=1):
+    # Hedef: tmin (1. indeks olduğunu varsayıyoruz); horizon > 1 ise sonraki H günün tmin'i (N, H)
+    # Pencereler kopyalanmaz, strided görünüm olarak döner (bellek: veri kadar)
+    return windowed_views(data, window_size, horizon=horizon)
 
-def build_lstm_model(input_shape):
+def create_streaming_dataset(data, window_size=7, batch_size=32, validation_split=0.1, shuffle=True, horizon=1):
+    '''
+    X'i bellekte hiç oluşturmadan batch batch besleyen tf.data akışları (eğitim, doğrulama).
+    `data` tek seri ya da istasyon serilerinin listesi olabilir.
+    '''
+    series = WindowedSeries(data, window_size, horizon=horizon)
+    train_idx, val_idx = series.split(validation_split)
+
+    signature = (
+        tf.TensorSpec(shape=(None, window_size, series.n_features), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,) if horizon == 1 else (None, horizon), dtype=tf.float32),
+    )
+
+    def make(indices, shuffle_batches):
+        # Her epoch'ta üretici baştan çağrılır (karıştırma da her epoch yenilenir)
+        dataset = tf.data.Dataset.from_generator(
+            lambda: series.batches(indices, batch_size, shuffle=shuffle_batches),
+            output_signature=signature,
+        )
+        # Model bir batch üzerinde çalışırken sıradaki batch hazırlanır
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    return make(train_idx, shuffle), make(val_idx, False), len(series)
+
+def create_cached_dataset(data, window_size=7, batch_size=32, validation_split=0.1, shuffle=True, horizon=1):
+    '''
+    Bellek içi eğitim için tf.data akışları (eğitim, doğrulama): pencereler bir kez kopyalanır ve
+    önbelleğe alınır, her epoch sadece karıştırılıp batch'lenir, sıradaki batch önceden hazırlanır.
+    Doğrulama create_streaming_dataset gibi her serinin son kısmı (karıştırılmadan).
+    '''
+    series = WindowedSeries(data, window_size, horizon=horizon)
+    train_idx, val_idx = series.split(validation_split)
+
+    def make(indices, shuffle_batches):
+        X, y = series.take(indices)
+        dataset = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+        if shuffle_batches:
+            dataset = dataset.shuffle(len(indices), reshuffle_each_iteration=True)
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    return make(train_idx, shuffle), (make(val_idx, False) if len(val_idx) else None), len(series)
+
+class ThroughputLogger(Callback):
+    '''
+    Epoch başına süre, saniyedeki örnek sayısı ve öğrenme oranı.
+    `on_epoch(kayıt)` verilirse her epoch sonunda çağrılır (checkpoint geçmişi için).
+    '''
+
+    def __init__(self, n_samples, on_epoch=None, verbose=1):
+        super().__init__()
+        self.n_samples = n_samples
+        self.on_epoch = on_epoch
+        self.verbose = verbose
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._started
+        record = {
+            'epoch': epoch + 1,
+            'seconds': round(seconds, 3),
+            'samples_per_second': round(self.n_samples / seconds, 1) if seconds > 0 else None,
+            'learning_rate': float(self.model.optimizer.learning_rate),
+            **{key: float(value) for key, value in (logs or {}).items() if key != 'learning_rate'},
+        }
+        self.epochs.append(record)
+        if self.on_epoch is not None:
+            self.on_epoch(record)
+        if self.verbose:
+            print(f"⏱️ Epoch {record['epoch']}: {seconds:.2f} sn, {record['samples_per_second']:,.0f} örnek/sn, "
+                  f"lr={record['learning_rate']:.2e}")
+
+def build_lstm_model(input_shape, horizon=1, learning_rate=0.001):
+    # horizon > 1: tek ileri geçişte sonraki H günün tmin'i (özyinelemeli besleme yok)
+    # learning_rate: sabit değer ya da Keras öğrenme oranı takvimi (örn. CosineDecay)
     model = Sequential()
     model.add(LSTM(units=50, return_sequences=True, input_shape=input_shape))
     model.add(Dropout(0.2))
     model.add(LSTM(units=50, return_sequences=False))
     model.add(Dropout(0.2))
-    model.add(Dense(units=1))
-    model.compile(optimizer='adam', loss='mean_squared_error')
+    model.add(Dense(units=horizon))
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mean_squared_error')
     return model
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import smtplib
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from email.message import EmailMessage
+from src.physics_engine import FROST_WHITE, FROST_BLACK, FROST_LABELS
+from src.instrumentation import stage
+
+# --- AYARLAR ---
+DEFAULT_ALERT_LOG = os.environ.get('AGROFROST_ALERT_LOG', 'data/alerts/sent.sqlite')
+DEFAULT_OUTBOX = 'data/alerts/outbox'   # SMTP sunucusu verilmezse e-postalar buraya .eml olarak yazılır
+SINK_TIMEOUT = 10.0                      # Tek gönderim için en fazla bekleme (sn); kalan süre daha azsa o kadar
+# SMTP sunucusu (boşsa stub: e-postalar gönderilmez, DEFAULT_OUTBOX'a yazılır)
+SMTP_HOST = os.environ.get('AGROFROST_SMTP_HOST', '')
+SMTP_PORT = int(os.environ.get('AGROFROST_SMTP_PORT', '25'))
+
+# Alarm verilen sınıflar ve önem sırası (büyük = daha ağır; siyah don bitkiyi kırağısız dondurur)
+ALERT_LEVELS = {FROST_LABELS[FROST_WHITE]: 1, FROST_LABELS[FROST_BLACK]: 2}
+ALERT_COLUMNS = ['field_id', 'crop', 'lat', 'lon', 'altitude', 'safety_margin', 'station', 'forecast_date',
+                 'farm_safe', 'humidity', 'dew_point', 'risk', 'model_version']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS alerts (
+    field_id TEXT NOT NULL,
+    forecast_date TEXT NOT NULL,
+    sink TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    risk TEXT NOT NULL,
+    farm_safe REAL NOT NULL,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (field_id, forecast_date, sink)
+)
+'''
+
+
+def build_alerts(results):
+    '''forecast_fields çıktısından beyaz/siyah don eşiğini geçen tarlalar; en ağır riskler önce'''
+    risky = results[results['risk'].astype('object').isin(list(ALERT_LEVELS))]
+    alerts = risky[[c for c in ALERT_COLUMNS if c in risky.columns]].copy()
+    alerts['risk'] = alerts['risk'].astype(str)
+    alerts['level'] = alerts['risk'].map(ALERT_LEVELS).astype('int64')
+    alerts['forecast_date'] = pd.to_datetime(alerts['forecast_date']).dt.strftime('%Y-%m-%d')
+    alerts['field_id'] = alerts['field_id'].astype(str)
+    return alerts.sort_values(['level', 'farm_safe'], ascending=[False, True]).reset_index(drop=True)
+
+
+def alert_text(alert):
+    return (f"❄️ AgroFrost: {alert['field_id']} ({alert['crop'] or 'tarla'}) için {alert['forecast_date']} gecesi "
+            f"{alert['risk'].replace('_', ' ').upper()} riski: tarla {alert['farm_safe']:.1f}°C "
+            f"(çiğ noktası {alert['dew_point']:.1f}°C, güvenlik payı {alert['safety_margin']:.1f}°C, "
+            f"istasyon {alert['station']})")
+
+
+def _payload(alerts):
+    records = alerts.to_dict(orient='records')
+    for record in records:
+        record['message'] = alert_text(record)
+    return records
+
+
+# --- Gönderim kanalları: her biri send(alerts, timeout) ile bir grup alarmı iletir, hata exception ---
+class FileSink:
+    '''Alarmları JSONL dosyasına ekler (satır başına bir alarm)'''
+
+    def __init__(self, path):
+        self.name = f"file:{path}"
+        self.path = path
+
+    def send(self, alerts, timeout=SINK_TIMEOUT):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in _payload(alerts):
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    '''Alarmları tek JSON POST isteğiyle gönderir ({"alerts": [...]}); 2xx dışı yanıt hata sayılır'''
+
+    def __init__(self, url):
+        self.name = f"webhook:{url}"
+        self.url = url
+
+    def send(self, alerts, timeout=SINK_TIMEOUT):
+        body = json.dumps({'alerts': _payload(alerts)}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json; charset=utf-8'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            if not 200 <= response.status < 300:
+                raise RuntimeError(f"webhook yanıtı {response.status}")
+
+
+class SmtpSink:
+    '''
+    Alarm başına bir e-posta. host verilmezse (stub) gönderilmez, `outbox` klasörüne .eml yazılır;
+    böylece SMTP sunucusu olmadan da içerik kontrol edilebilir.
+    '''
+
+    def __init__(self, recipients, host=SMTP_HOST, port=SMTP_PORT, sender='agrofrost@localhost',
+                 outbox=DEFAULT_OUTBOX):
+        self.recipients = list(recipients)
+        self.name = f"smtp:{','.join(self.recipients)}"
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.outbox = outbox
+
+    def _messages(self, alerts):
+        for record in _payload(alerts):
+            message = EmailMessage()
+            message['From'] = self.sender
+            message['To'] = ', '.join(self.recipients)
+            message['Subject'] = f"AgroFrost don uyarısı: {record['field_id']} ({record['forecast_date']})"
+            message.set_content(record['message'])
+            yield record, message
+
+    def send(self, alerts, timeout=SINK_TIMEOUT):
+        if not self.host:
+            os.makedirs(self.outbox, exist_ok=True)
+            for record, message in self._messages(alerts):
+                path = os.path.join(self.outbox, f"{record['forecast_date']}_{record['field_id']}.eml")
+                with open(path, 'wb') as f:
+                    f.write(bytes(message))
+            return
+        with smtplib.SMTP(self.host, self.port, timeout=timeout) as server:
+            for _, message in self._messages(alerts):
+                server.send_message(message)
+
+
+def make_sink(spec):
+    '''
+    Komut satırı tanımından kanal:
+      file:alarmlar.jsonl | webhook:http://127.0.0.1:8767/alerts | smtp:ciftci@ornek.com,kooperatif@ornek.com
+    SMTP sunucusu AGROFROST_SMTP_HOST / AGROFROST_SMTP_PORT ile verilir; yoksa stub (.eml dosyaları).
+    '''
+    kind, _, target = spec.partition(':')
+    if kind == 'file':
+        return FileSink(target)
+    if kind == 'webhook':
+        return WebhookSink(target)
+    if kind == 'smtp':
+        return SmtpSink(target.split(','))
+    raise ValueError(f"❌ Bilinmeyen alarm kanalı: {spec} (file:..., webhook:..., smtp:...)")
+
+
+class AlertLog:
+    '''
+    Gönderilmiş alarmlar (SQLite): (tarla, tahmin gecesi, kanal) başına bir satır.
+    Aynı gece için aynı ya da daha hafif risk tekrar gönderilmez; risk ağırlaşırsa (beyaz -> siyah) gönderilir.
+    '''
+
+    def __init__(self, path=DEFAULT_ALERT_LOG):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def pending(self, alerts, sink):
+        '''Bu kanala henüz gönderilmemiş (ya da ağırlaşmış) alarmlar'''
+        if alerts.empty:
+            return alerts
+        days = alerts['forecast_date']
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT field_id, forecast_date, level FROM alerts WHERE sink = ? AND forecast_date BETWEEN ? AND ?',
+                (sink, days.min(), days.max())).fetchall()
+        sent = {(field_id, day): level for field_id, day, level in rows}
+        previous = np.array([sent.get(key, 0) for key in zip(alerts['field_id'], alerts['forecast_date'])])
+        return alerts[alerts['level'].values > previous]
+
+    def record(self, alerts, sink):
+        sent_at = datetime.now().isoformat(timespec='seconds')
+        rows = [(a.field_id, a.forecast_date, sink, int(a.level), a.risk, float(a.farm_safe), sent_at)
+                for a in alerts.itertuples()]
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            self._db.commit()
+
+
+def dispatch(alerts, sinks, log, deadline=None, batch_size=500):
+    '''
+    Alarmları tüm kanallara gönderir; her kanal için sadece bekleyenler, en ağırlar önce, gruplar halinde.
+    deadline (time.monotonic) geçerse kalan gruplar gönderilmez ve kayda geçmez (sonraki çalıştırmada tekrar denenir).
+    Dönen: kanal başına {'sent', 'skipped' (zaten gönderilmiş), 'failed', 'late'} sayıları.
+    '''
+    report = {}
+    for sink in sinks:
+        pending = log.pending(alerts, sink.name)
+        counts = {'sent': 0, 'skipped': len(alerts) - len(pending), 'failed': 0, 'late': 0}
+        with stage('send', sink=sink.name, alerts=len(pending)) as send_stage:
+            for i in range(0, len(pending), batch_size):
+                group = pending.iloc[i:i + batch_size]
+                remaining = deadline - time.monotonic() if deadline is not None else SINK_TIMEOUT
+                if remaining <= 0:
+                    counts['late'] += len(pending) - i
+                    break
+                try:
+                    sink.send(group, timeout=min(SINK_TIMEOUT, remaining))
+                except Exception as exc:
+                    print(f"❌ {sink.name}: {len(group)} alarm gönderilemedi ({exc})")
+                    counts['failed'] += len(group)
+                    continue
+                log.record(group, sink.name)
+                counts['sent'] += len(group)
+            send_stage.update(counts)
+        report[sink.name] = counts
+    return report
@@ -0,0 +1,192 @@
+import time
+import random
+import argparse
+import shutil
+import asyncio
+import tempfile
+import threading
+import concurrent.futures
+import pandas as pd
+from src.weather_store import point_key, get_store, WeatherStore, FEATURES
+from src.instrumentation import stage
+
+# --- AYARLAR ---
+CONCURRENCY = 8     # Aynı anda en fazla bu kadar istek (Meteostat'a nazik ol)
+RETRIES = 3         # İlk denemeden sonra en fazla bu kadar tekrar
+BACKOFF = 0.5       # Üstel bekleme tabanı (sn): 0.5, 1, 2 ... (+ rastgele sapma)
+
+# Kullanım (istek birleştirme kontrolü, ağa çıkmaz):
+#   python -m src.async_fetch --check
+
+# Süreç genelinde uçuştaki istekler: (kaynak, nokta, başlangıç, bitiş) -> concurrent.futures.Future.
+# Her prefetch kendi event loop'unda koşar; asyncio görevi yerine thread-safe Future ile loop'lar arası paylaşılır
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def is_transient(exc):
+    '''
+    Tekrar denemeye değer mi: sadece sunucu hataları (5xx) ve bağlantı / zaman aşımı hataları.
+    4xx (yanlış istek, bulunamadı) ve kod hataları tekrar denenmez.
+    '''
+    # requests.HTTPError -> response.status_code, urllib.error.HTTPError -> code
+    status = getattr(getattr(exc, 'response', None), 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int):
+        return status >= 500
+    # requests.ConnectionError / Timeout ve urllib.error.URLError da OSError alt sınıfı
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+class AsyncFetcher:
+    '''
+    Senkron bir kaynağı (Meteostat, HTTP, fixture, sentetik) eşzamanlı kullanır:
+    sınırlı eşzamanlılık, retry/backoff (sadece 5xx ve bağlantı hataları) ve istek birleştirme
+    (aynı kaynaktan aynı nokta/aralığı isteyen iki çağıran, farklı prefetch çağrılarında olsalar da tek isteği paylaşır).
+    Kaynak çağrıları thread havuzunda koşar; bekleme ağda olduğu için GIL sorun değil.
+    '''
+
+    def __init__(self, provider, concurrency=CONCURRENCY, retries=RETRIES, backoff=BACKOFF):
+        self.provider = provider
+        self.concurrency = concurrency
+        # HTTP kaynağının bağlantı havuzu eşzamanlılık kadar olmalı
+        if hasattr(provider, 'resize'):
+            provider.resize(concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = None
+        self.counters = {'requests': 0, 'coalesced': 0, 'retries': 0, 'failures': 0}
+
+    def _limit(self):
+        # Semaphore çalışan event loop'a bağlanır; ilk kullanımda oluşturulur
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def fetch(self, lat, lon, start, end):
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        key = (id(self.provider), point_key(lat, lon), start, end)
+
+        with _inflight_lock:
+            shared = _inflight.get(key)
+            owner = shared is None
+            if owner:
+                shared = _inflight[key] = concurrent.futures.Future()
+        if owner:
+            task = asyncio.ensure_future(self._fetch_with_retry(lat, lon, start, end))
+            task.add_done_callback(lambda done: _settle(key, shared, done))
+        else:
+            self.counters['coalesced'] += 1
+        # shield: bir çağıran iptal edilirse ortak istek diğerleri için sürer
+        return await asyncio.shield(asyncio.wrap_future(shared))
+
+    async def _fetch_with_retry(self, lat, lon, start, end):
+        for attempt in range(self.retries + 1):
+            self.counters['requests'] += 1
+            try:
+                async with self._limit():
+                    return await asyncio.to_thread(self.provider.fetch, lat, lon, start, end)
+            except Exception as exc:
+                if attempt == self.retries or not is_transient(exc):
+                    self.counters['failures'] += 1
+                    raise
+                self.counters['retries'] += 1
+                # Beklerken yer tutulmaz: diğer istekler bu sürede devam eder
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"🔁 {lat}, {lon}: {exc} — {delay:.1f} sn sonra tekrar ({attempt + 1}/{self.retries})")
+                await asyncio.sleep(delay)
+
+
+
+def _settle(key, shared, task):
+    '''Sahibi olan loop'taki görev bitti: sonucu bekleyen tüm çağıranlara (her loop'tan) ilet'''
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if shared.done():
+        return
+    if task.cancelled():
+        shared.cancel()
+    elif task.exception() is not None:
+        shared.set_exception(task.exception())
+    else:
+        shared.set_result(task.result())
+
+
+async def update_points(store, fetcher, points, start, end):
+    '''
+    Noktaların depoda eksik aralıklarını eşzamanlı çeker ve depoya yazar.
+    Dönen: {nokta anahtarı: None (başarılı) | hata}.
+    '''
+    async def update_point(lat, lon):
+        gaps = store.plan(lat, lon, start, end)
+        if not gaps:
+            return None
+        parts = await asyncio.gather(*(fetcher.fetch(lat, lon, gap_start, gap_end)
+                                       for gap_start, gap_end in gaps))
+        # Parquet yazımı da thread'de; depo kendi kilidiyle yazımları sıraya koyar
+        await asyncio.to_thread(store.ingest, lat, lon, start, end, parts)
+        return None
+
+    keys = [point_key(lat, lon) for lat, lon in points]
+    outcomes = await asyncio.gather(*(update_point(lat, lon) for lat, lon in points), return_exceptions=True)
+    return dict(zip(keys, outcomes))
+
+
+def prefetch(points, start, end, store=None, provider=None, concurrency=CONCURRENCY, retries=RETRIES):
+    '''
+    Senkron giriş noktası: birçok istasyonun [start, end] verisini depoya eşzamanlı indirir.
+    Sonrasında store.daily(...) çağrıları ağa çıkmadan depodan okur.
+    '''
+    store = store or get_store()
+    fetcher = AsyncFetcher(provider or store.provider, concurrency=concurrency, retries=retries)
+    points = list(dict.fromkeys((float(lat), float(lon)) for lat, lon in points))
+
+    with stage('prefetch', points=len(points)) as prefetch_stage:
+        outcomes = asyncio.run(update_points(store, fetcher, points, start, end))
+        prefetch_stage.update(fetcher.counters)
+
+    failed = {key: exc for key, exc in outcomes.items() if exc is not None}
+    print(f"📡 {len(points)} nokta: {fetcher.counters['requests']} istek, "
+          f"{fetcher.counters['coalesced']} birleşik, {fetcher.counters['retries']} tekrar, {len(failed)} hata")
+    for key, exc in failed.items():
+        print(f"❌ {key}: {exc}")
+    return failed
+
+
+class _CountingProvider:
+    '''Kontrol için: her çağrıyı sayar ve ağ gecikmesi gibi bekler'''
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def fetch(self, lat, lon, start, end):
+        self.calls += 1
+        time.sleep(self.delay)
+        return pd.DataFrame(1.0, index=pd.date_range(start, end, name='time'), columns=FEATURES)
+
+
+def check_coalescing(callers=2, delay=0.3):
+    '''Aynı noktayı aynı anda isteyen `callers` ayrı prefetch çağrısı kaynağa tek istek göndermeli'''
+    root = tempfile.mkdtemp(prefix='agrofrost_coalesce_')
+    provider = _CountingProvider(delay)
+    try:
+        store = WeatherStore(root, provider)
+        threads = [threading.Thread(target=prefetch, args=([(37.0, 32.0)], '2000-01-01', '2000-01-31'),
+                                    kwargs={'store': store}) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print(f"🔬 {callers} eşzamanlı prefetch -> {provider.calls} kaynak isteği (beklenen 1)")
+    return provider.calls == 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost eşzamanlı indirici")
+    parser.add_argument("--check", action="store_true", help="İstek birleştirmeyi sahte kaynakla kontrol et")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(0 if check_coalescing() else 1)
+    parser.print_help()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from src.windowing import windowed_views
+from src.instrumentation import stage, count
+from src.prediction_cache import cached_predict_horizon
+
+# Sonuç tablosunun sütun tipleri (CSV'deki "°C" metinleri yerine sayısal değerler)
+RESULT_DTYPES = {
+    'actual_tmin': 'float64',
+    'predicted_tmin': 'float64',
+}
+
+
+def build_windows(scaled_data, window_size=7):
+    '''Her gün için önceki `window_size` günü tek seferde pencereler: (N, window_size, özellik)'''
+    # Kopya yok (strided görünüm); son pencerenin hedef günü yok (yarın), o yüzden dahil değil
+    windows, _ = windowed_views(scaled_data, window_size)
+    return windows
+
+
+def run_backtest(df, bundle, batch_size=4096, cache=None, station=None):
+    '''
+    Geçmiş veride gün gün tahmin yerine tüm pencereleri toplu (batch) çalıştırır.
+    Ölçekleme model paketindeki (eğitimdeki) scaler ile yapılır.
+    Dönen tablo: tarih indeksli, her gün için gerçek ve modelin istasyon tahmini.
+    Çok günlük modelde ayrıca `predicted_tmin_d{h}`: o güne h gün önceden yapılan tahmin.
+    cache + station verilirse daha önce hesaplanmış günler modelden geçirilmez.
+    '''
+    window_size = bundle.window_size
+    with stage('scale', rows=len(df)):
+        scaled_data = bundle.transform(df[bundle.features].values)
+        windows = build_windows(scaled_data, window_size)
+    count(rows=len(df), windows=len(windows))
+
+    if len(windows) == 0:
+        predictions = np.empty((0, bundle.horizon), dtype='float64')
+    else:
+        # Model tek çağrıda büyük batch'lerle çalışsın (gün başına ayrı çağrı yok)
+        # Çok günlük modelde tüm ufuk aynı geçişten gelir
+        with stage('predict', windows=len(windows)):
+            if cache is not None and station is not None:
+                predictions = cached_predict_horizon(bundle, cache, station, df.index[window_size:], windows,
+                                                     batch_size=batch_size)
+            else:
+                predictions = bundle.predict_horizon(windows, batch_size=batch_size)
+
+    results = pd.DataFrame({
+        'actual_tmin': df['tmin'].values[window_size:],
+        'predicted_tmin': predictions[:, 0],
+    }, index=df.index[window_size:])
+
+    # h gün önceden yapılan tahmin, hedef günün satırına hizalanır (ilk h-1 gün için tahmin yok)
+    for h in range(2, bundle.horizon + 1):
+        lead = np.full(len(results), np.nan)
+        lead[h - 1:] = predictions[:len(results) - (h - 1), h - 1]
+        results[f'predicted_tmin_d{h}'] = lead
+
+    results.index.name = 'date'
+    return results.astype(RESULT_DTYPES)
+
+
+def format_celsius(values):
+    '''Rapor/CSV için sayısal sıcaklıkları "-3.2°C" biçimine çevirir'''
+    return [f"{t:.1f}°C" for t in values]
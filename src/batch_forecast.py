@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from src.stations import StationIndex, get_station_index, K_NEIGHBORS
+from src.async_fetch import prefetch
+from src.weather_store import point_key
+from src.hourly import last_night_humidity, humidity_nights, prefetch_nightly
+from src.physics_engine import apply_lapse_rate, calculate_dew_point, classify_frost, FROST_LABELS
+
+DEFAULT_HUMIDITY = 45  # İstasyonun saatlik nemi (son gece) alınamazsa varsayım (app.py ile aynı)
+
+
+def station_forecasts(stations, bundle, store, humidity=DEFAULT_HUMIDITY):
+    '''
+    Her istasyonun son günlerini bir kez okur, tüm pencereleri tek ileri geçişte çalıştırır.
+    Dönen tablo: istasyon başına yarının ham tmin tahmini, tahmin tarihi ve son gecenin ölçülen nemi
+    (saatlik veri yoksa `humidity`).
+    '''
+    # Eksik son günler ve son geceler tüm istasyonlar için eşzamanlı indirilir; döngü sadece depodan okur
+    end = datetime.now()
+    points = list(zip(stations['lat'], stations['lon']))
+    prefetch(points, end - timedelta(days=2 * bundle.window_size), end, store=store)
+    # Gece verisi alınamayan istasyonlar döngüde tekrar (sırayla) sorulmaz, varsayılan nem kullanılır
+    no_nights = prefetch_nightly(points, *humidity_nights())
+
+    windows, rows = [], []
+    for row in stations.itertuples():
+        df = store.recent(row.lat, row.lon, days=2 * bundle.window_size, columns=bundle.features)
+        if len(df) < bundle.window_size:
+            print(f"⚠️ {row.station}: yeterli veri yok ({len(df)} gün), atlanıyor.")
+            continue
+        windows.append(bundle.transform(df.values[-bundle.window_size:]))
+        rows.append({'station': row.station, 'forecast_date': df.index[-1] + timedelta(days=1),
+                     'humidity': humidity if point_key(row.lat, row.lon) in no_nights
+                                 else last_night_humidity(row.lat, row.lon, humidity)})
+
+    result = pd.DataFrame(rows, columns=['station', 'forecast_date', 'humidity'])
+    result['station_raw'] = bundle.predict_windows(np.stack(windows)) if windows else np.empty(0)
+    return result
+
+
+def combine_stations(index, distance, weights, per_station, stations):
+    '''
+    (M, k) komşu istasyon -> nokta başına birleşik istasyon tahmini.
+    Her komşunun tahmini önce en yakın istasyonun rakımına taşınır (lapse rate), sonra ağırlıklı ortalanır;
+    tahmini olmayan (ya da eski tarihli) komşuların ağırlığı diğerlerine dağıtılır.
+    '''
+    latest = per_station['forecast_date'].max() if not per_station.empty else pd.NaT
+    current = per_station[per_station['forecast_date'] == latest]
+    for station in per_station.loc[per_station['forecast_date'] != latest, 'station']:
+        print(f"⚠️ {station}: verisi güncel değil, komşu istasyonlarla birleştirilmiyor.")
+    by_station = current.set_index('station').reindex(stations['station'].values)
+    raw = by_station['station_raw'].values[index]
+    station_humidity = by_station['humidity'].values.astype('float64')[index]
+
+    altitudes = stations['altitude'].values.astype('float64')
+    reference = altitudes[index[:, 0]]
+    adjusted = apply_lapse_rate(raw, altitudes[index], reference[:, np.newaxis])
+    available = ~np.isnan(adjusted)
+    weights = np.where(available, weights, 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        combined = (np.where(available, adjusted, 0.0) * weights).sum(axis=1) / total
+        humidity = (np.where(available, station_humidity, 0.0) * weights).sum(axis=1) / total
+
+    return pd.DataFrame({
+        'station': stations['station'].values[index[:, 0]],
+        'station_altitude': reference,
+        'station_distance_km': distance[:, 0],
+        'stations_used': available.sum(axis=1),
+        'forecast_date': pd.Series(latest, index=range(len(index))).where(total > 0),
+        'station_raw': np.where(total > 0, combined, np.nan),
+        'humidity': np.where(total > 0, humidity, np.nan),
+    })
+
+
+def forecast_fields(fields, bundle, store, stations=None, humidity=DEFAULT_HUMIDITY, k=K_NEIGHBORS):
+    '''
+    Tarla kaydı -> tarla başına tahmin tablosu. Çiğ noktası komşu istasyonların son gece nemiyle
+    (aynı ağırlıklarla) hesaplanır; `humidity` sadece saatlik verisi olmayan istasyonlar için varsayım.
+    Her tarla en yakın `k` istasyona (KD-ağacı) bağlanır; model sadece kullanılan istasyon sayısı kadar
+    pencere görür, tahminler mesafe/rakım ağırlıklarıyla tarlaya yayılır. Tamamen vektörel.
+    '''
+    station_index = StationIndex(stations) if stations is not None else get_station_index()
+    stations = station_index.stations
+    index, distance, weights = station_index.query(fields['lat'].values, fields['lon'].values, k=k,
+                                                   altitudes=fields['altitude'].values)
+
+    used = stations.iloc[np.unique(index)]
+    print(f"📡 {len(fields)} tarla -> {len(used)} istasyon için tahmin yapılıyor...")
+    per_station = station_forecasts(used, bundle, store, humidity)
+
+    results = pd.concat([fields.reset_index(drop=True),
+                         combine_stations(index, distance, weights, per_station, stations)], axis=1)
+
+    # --- Fizik Motoru (Tüm tarlalar tek seferde) ---
+    results['station_safe'] = results['station_raw'] - results['safety_margin']
+    results['farm_raw'] = apply_lapse_rate(results['station_raw'], results['station_altitude'], results['altitude'])
+    results['farm_safe'] = apply_lapse_rate(results['station_safe'], results['station_altitude'], results['altitude'])
+    results['dew_point'] = calculate_dew_point(results['farm_safe'], results['humidity'])
+
+    risk = classify_frost(results['farm_safe'].values, results['dew_point'].values)
+    results['risk'] = pd.Categorical.from_codes(risk, categories=[FROST_LABELS[code] for code in sorted(FROST_LABELS)])
+    # İstasyon verisi alınamayan tarlalar için risk bilinmiyor
+    results.loc[results['station_raw'].isna(), 'risk'] = np.nan
+    results['model_version'] = bundle.version
+    return results
@@ -1,22 +1,45 @@
-import pandas as pd
 from datetime import datetime
-from meteostat import Point, Daily
+from src.weather_store import get_store, FEATURES
 
-def fetch_historical_data(lat, lon, start_year, end_year):
-    print(f"📡 Veri çekiliyor: {lat}, {lon} ({start_year}-{end_year})...")
-    location = Point(lat, lon)
+def fetch_historical_data(lat, lon, start_year, end_year, hourly=False):
+    print(f"📡 Veri hazırlanıyor: {lat}, {lon} ({start_year}-{end_year})...")
     start = datetime(start_year, 1, 1)
     end = datetime(end_year, 12, 31)
     
-    data = Daily(location, start, end)
-    df = data.fetch()
+    # Yerel depo: sadece eksik günler Meteostat'tan çekilir, interpolate depoda bir kez yapılır
+    # tavg: Ortalama, tmin: En düşük, tmax: En yüksek, prcp: Yağış, wspd: Rüzgar
+    # hourly=True: saatlik veriden gece özellikleri de (gece minimumu, çiğ noktası, nem, rüzgarsız saat)
+    # parça parça hesaplanıp eklenir; 25 yıllık saatlik veri hiçbir zaman tamamen belleğe alınmaz
+    columns = FEATURES
+    if hourly:
+        from src.hourly import NIGHT_FEATURES
+        columns = FEATURES + NIGHT_FEATURES
+    df = get_store().daily(lat, lon, start, end, columns=columns)
     
     if df.empty:
         raise ValueError("❌ Veri bulunamadı! Koordinatları veya tarihleri kontrol et.")
 
-    df = df.interpolate(method='linear')
-    print(f"✅ Veri başarıyla çekildi: {len(df)} gün")
-    
-    # Gerekli sütunları seç (Meteostat sütun isimleri)
-    # tavg: Ortalama, tmin: En düşük, tmax: En yüksek, prcp: Yağış, wspd: Rüzgar
-    return df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']]
+    print(f"✅ Veri hazır: {len(df)} gün")
+    return df
+
+def fetch_many_historical(points, start_year, end_year, concurrency=8):
+    '''
+    Birçok istasyon için fetch_historical_data: eksik aralıklar önce eşzamanlı indirilir,
+    sonra her nokta depodan okunur. Dönen: {(lat, lon): DataFrame}; verisi olmayanlar dahil edilmez.
+    '''
+    from src.async_fetch import prefetch
+    start = datetime(start_year, 1, 1)
+    end = datetime(end_year, 12, 31)
+    points = list(dict.fromkeys(points))
+
+    print(f"📡 {len(points)} nokta eşzamanlı hazırlanıyor ({start_year}-{end_year}, en fazla {concurrency} istek)...")
+    prefetch(points, start, end, concurrency=concurrency)
+
+    frames = {}
+    for lat, lon in points:
+        df = get_store().daily(lat, lon, start, end)
+        if df.empty:
+            print(f"⚠️ {lat}, {lon}: veri bulunamadı, atlanıyor.")
+            continue
+        frames[(lat, lon)] = df
+    return frames
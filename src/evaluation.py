@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from src.physics_engine import apply_lapse_rate
+from src.backtest import format_celsius
+
+# Doğrulama kriterleri (eski validate_* scriptlerindeki sabitler)
+CAUGHT_MARGIN = 0.5     # İstasyon bu değerin üstündeyse "güvenli" sayılır
+MISSED_MARGIN = 0.5     # Model bu değerin üstündeyse "don yok" demiş sayılır
+CONSENSUS_TOLERANCE = 3.0  # Gerçek ile tahmin arası fark bundan azsa "tam isabet"
+
+
+def caught_frosts(results, station_alt, farm_alt, threshold=0.0):
+    '''İstasyon güvenli (> eşik + 0.5) ama tarla tahmini don diyor: Gizli Don'''
+    farm_pred = apply_lapse_rate(results['predicted_tmin'], station_alt, farm_alt)
+    mask = (results['actual_tmin'] > threshold + CAUGHT_MARGIN) & (farm_pred < threshold)
+    return pd.DataFrame({
+        'actual': results['actual_tmin'][mask],
+        'predicted': farm_pred[mask],
+        'diff': (results['actual_tmin'] - farm_pred)[mask],
+    })
+
+
+def consensus_frosts(results, station_alt, farm_alt, threshold=0.0):
+    '''Hem istasyon hem tarla tahmini don diyor ve fark toleransın içinde'''
+    farm_pred = apply_lapse_rate(results['predicted_tmin'], station_alt, farm_alt)
+    diff = (results['actual_tmin'] - farm_pred).abs()
+    mask = (results['actual_tmin'] < threshold) & (farm_pred < threshold) & (diff < CONSENSUS_TOLERANCE)
+    return pd.DataFrame({
+        'actual': results['actual_tmin'][mask],
+        'predicted': farm_pred[mask],
+        'diff': diff[mask],
+    })
+
+
+def missed_frosts(results, threshold=0.0):
+    '''İstasyonda gerçekten don var ama model "don yok" demiş (büyük hata en üstte)'''
+    diff = (results['actual_tmin'] - results['predicted_tmin']).abs()
+    mask = (results['actual_tmin'] < threshold) & (results['predicted_tmin'] > threshold + MISSED_MARGIN)
+    events = pd.DataFrame({
+        'actual': results['actual_tmin'][mask],
+        'predicted': results['predicted_tmin'][mask],
+        'diff': diff[mask],
+    })
+    return events.sort_values(by='diff', ascending=False)
+
+
+def render_events(events, columns, status):
+    '''Sayısal olay tablosunu eski CSV formatına ("-3.2°C" metinleri) çevirir'''
+    table = {"Tarih": events.index.strftime('%d-%m-%Y')}
+    for source, title in columns.items():
+        table[title] = format_celsius(events[source])
+    table["Durum"] = status
+    return pd.DataFrame(table)
+
+
+def confusion_summary(results, station_alt, farm_alt, safety_margin=0.0, threshold=0.0):
+    '''
+    Tarla ölçeğinde karışıklık matrisi.
+    Gerçek: istasyon gerçeğinin tarlaya taşınmış hali, Tahmin: güvenlik payı düşülmüş tarla tahmini.
+    '''
+    sweep = threshold_sweep(results, station_alt, [safety_margin], [farm_alt], [threshold])
+    summary = sweep.iloc[0].to_dict()
+    for key in ('tp', 'fn', 'fp', 'tn'):
+        summary[key] = int(summary[key])
+    return summary
+
+
+def threshold_sweep(results, station_alt, margins, altitudes, thresholds):
+    '''
+    Güvenlik payı x tarla rakımı x don eşiği ızgarasını önbellekteki tahminler
+    üzerinden tek seferde (broadcast) değerlendirir. Model tekrar çalışmaz.
+    '''
+    actual = results['actual_tmin'].to_numpy(dtype='float64')
+    predicted = results['predicted_tmin'].to_numpy(dtype='float64')
+    margins = np.asarray(margins, dtype='float64')
+    altitudes = np.asarray(altitudes, dtype='float64')
+    thresholds = np.asarray(thresholds, dtype='float64')
+
+    # Eksenler: (marj, rakım, eşik, gün)
+    m = margins[:, None, None, None]
+    a = altitudes[None, :, None, None]
+    t = thresholds[None, None, :, None]
+
+    farm_actual = apply_lapse_rate(actual[None, None, None, :], station_alt, a)
+    farm_pred = apply_lapse_rate(predicted[None, None, None, :] - m, station_alt, a)
+
+    actual_frost = farm_actual < t
+    pred_frost = farm_pred < t
+
+    tp = np.sum(actual_frost & pred_frost, axis=-1)
+    fn = np.sum(actual_frost & ~pred_frost, axis=-1)
+    fp = np.sum(~actual_frost & pred_frost, axis=-1)
+    tn = np.sum(~actual_frost & ~pred_frost, axis=-1)
+
+    grid = np.stack(np.meshgrid(margins, altitudes, thresholds, indexing='ij'), axis=-1).reshape(-1, 3)
+    sweep = pd.DataFrame(grid, columns=['safety_margin', 'farm_alt', 'threshold'])
+    sweep['tp'] = tp.ravel()
+    sweep['fn'] = fn.ravel()
+    sweep['fp'] = fp.ravel()
+    sweep['tn'] = tn.ravel()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Hit rate (POD): yakalanan donların oranı
+        sweep['hit_rate'] = sweep['tp'] / (sweep['tp'] + sweep['fn'])
+        # False alarm rate (POFD): don olmayan günlerde boşuna alarm oranı
+        sweep['false_alarm_rate'] = sweep['fp'] / (sweep['fp'] + sweep['tn'])
+        # False alarm ratio (FAR): verilen alarmların ne kadarı boşa çıktı
+        sweep['false_alarm_ratio'] = sweep['fp'] / (sweep['tp'] + sweep['fp'])
+    return sweep
+
+
+NO_RATE = '—'  # Payda sıfır (örn. hiç don yok / hiç alarm yok): oran tanımsız
+
+
+def format_rate(value):
+    '''Oranı yüzde olarak yazar; tanımsızsa (NaN) "nan%" yerine NO_RATE'''
+    return NO_RATE if pd.isna(value) else f"{value:.1%}"
@@ -0,0 +1,206 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime
+from src.instrumentation import current_run, new_run_id
+
+# --- AYARLAR ---
+DEFAULT_EVENTS_DIR = os.environ.get('AGROFROST_EVENTS_DIR', 'data/events')
+
+# Doğrulama olay kategorileri (validate.py raporları)
+CATEGORIES = ('caught', 'consensus', 'missed')
+
+# Çalıştırma kayıtları (olay üretmeyen çalıştırmalar dahil); '_' ile başladığı için olay veri kümesine karışmaz
+RUNS_DIR = '_runs'
+
+# Klasör bölümleme: station=.../category=.../year=... (sorgular sadece ilgili klasörleri okur)
+PARTITIONING = ds.partitioning(pa.schema([
+    ('station', pa.string()),
+    ('category', pa.string()),
+    ('year', pa.int16()),
+]), flavor='hive')
+
+# Sıcaklıklar sayısal (°C); "-3.2°C" metinleri sadece CSV/konsol gösteriminde üretilir
+SCHEMA = pa.schema([
+    ('date', pa.date32()),
+    ('actual', pa.float64()),       # İstasyonda ölçülen tmin
+    ('predicted', pa.float64()),    # caught/consensus: tarla tahmini, missed: istasyon tahmini
+    ('diff', pa.float64()),
+    ('safety_margin', pa.float64()),
+    ('altitude', pa.float64()),     # Tahminin ait olduğu rakım (tarla ya da istasyon)
+    ('threshold', pa.float64()),
+    ('model_version', pa.string()),
+    ('run_id', pa.string()),
+    ('created_at', pa.timestamp('s')),
+    ('station', pa.string()),
+    ('category', pa.string()),
+    ('year', pa.int16()),
+])
+
+# (çalıştırma, istasyon, kategori) başına bir satır: "en son çalıştırma" buradan, zamana göre seçilir
+RUNS_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('station', pa.string()),
+    ('category', pa.string()),
+    ('model_version', pa.string()),
+    ('events', pa.int64()),
+    ('created_at', pa.timestamp('us')),
+])
+
+
+class EventStore:
+    '''
+    Doğrulama olaylarının tipli, bölümlenmiş Parquet deposu.
+    Her çalıştırma kendi dosyalarını ekler (üzerine yazmaz); çalıştırmalar arası sorgu yapılabilir.
+    '''
+
+    def __init__(self, root=DEFAULT_EVENTS_DIR):
+        self.root = root
+
+    def append(self, events, category, station, model_version, altitude, safety_margin=0.0, threshold=0.0,
+               run_id=None):
+        '''
+        evaluation.py olay tablosu (tarih indeksli; actual, predicted, diff) -> depo.
+        run_id verilmezse aktif çalıştırmanınki (track_run) kullanılır. Dönen: yazılan tipli tablo.
+        '''
+        if category not in CATEGORIES:
+            raise ValueError(f"❌ Bilinmeyen olay kategorisi: {category} ({', '.join(CATEGORIES)})")
+        if run_id is None:
+            run = current_run()
+            run_id = run.run_id if run is not None else new_run_id('events')
+
+        created_at = pd.Timestamp(datetime.now())
+        dates = pd.DatetimeIndex(events.index)
+        frame = pd.DataFrame({
+            'date': dates.date,
+            'actual': events['actual'].to_numpy(dtype='float64'),
+            'predicted': events['predicted'].to_numpy(dtype='float64'),
+            'diff': events['diff'].to_numpy(dtype='float64'),
+            'safety_margin': float(safety_margin),
+            'altitude': float(altitude),
+            'threshold': float(threshold),
+            'model_version': model_version,
+            'run_id': run_id,
+            'created_at': created_at.floor('s'),
+            'station': station,
+            'category': category,
+            'year': dates.year.astype('int16'),
+        })
+        # Olay bulamayan çalıştırma da kaydedilir: latest=True onun (boş) sonucunu döner, eskisini değil
+        self._record_run(run_id, station, category, model_version, len(frame), created_at)
+        if frame.empty:
+            return self._to_frame(frame)
+
+        table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+        # Dosya adı çalıştırmaya özgü: aynı bölüme yazan önceki çalıştırmalar ezilmez
+        ds.write_dataset(table, self.root, format='parquet', partitioning=PARTITIONING,
+                         basename_template=f"{run_id}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+        return self._to_frame(frame)
+
+    def _record_run(self, run_id, station, category, model_version, n_events, created_at):
+        folder = os.path.join(self.root, RUNS_DIR)
+        os.makedirs(folder, exist_ok=True)
+        row = pa.Table.from_pylist([{'run_id': run_id, 'station': station, 'category': category,
+                                     'model_version': model_version, 'events': n_events,
+                                     'created_at': created_at.to_pydatetime()}], schema=RUNS_SCHEMA)
+        pq.write_table(row, os.path.join(folder, f"{run_id}-{station}-{category}.parquet"))
+
+    def _run_table(self):
+        '''Çalıştırma kayıtları; kayıt tablosundan önce yazılmış olaylar için olaylardan türetilir'''
+        folder = os.path.join(self.root, RUNS_DIR)
+        runs = (ds.dataset(folder, format='parquet', schema=RUNS_SCHEMA).to_table().to_pandas()
+                if os.path.exists(folder) else pd.DataFrame(columns=RUNS_SCHEMA.names))
+        events = ds.dataset(self.root, format='parquet', partitioning=PARTITIONING, schema=SCHEMA) \
+            .to_table(columns=['run_id', 'station', 'category', 'model_version', 'created_at']).to_pandas()
+        if not events.empty:
+            for column in ('station', 'category'):
+                events[column] = events[column].astype(str)
+            legacy = (events.groupby(['run_id', 'station', 'category'], as_index=False)
+                      .agg(model_version=('model_version', 'first'), events=('created_at', 'size'),
+                           created_at=('created_at', 'max')))
+            known = set(zip(runs['run_id'], runs['station'], runs['category']))
+            legacy = legacy[[key not in known for key in zip(legacy['run_id'], legacy['station'], legacy['category'])]]
+            runs = pd.concat([runs, legacy], ignore_index=True) if not runs.empty else legacy
+        runs['created_at'] = pd.to_datetime(runs['created_at'])
+        return runs.sort_values(['created_at', 'run_id'], kind='stable').reset_index(drop=True)
+
+    def query(self, start=None, end=None, category=None, station=None, run_id=None, model_version=None,
+              latest=False):
+        '''
+        Tarih aralığı / kategori / istasyon / çalıştırma / model sürümüne göre olaylar (tarihe göre sıralı).
+        category ve station tek değer ya da liste olabilir.
+        latest=True: her (istasyon, kategori) için sadece en son çalıştırmanın olayları.
+        '''
+        if not os.path.exists(self.root):
+            return self._to_frame(pd.DataFrame(columns=SCHEMA.names))
+
+        conditions = []
+        for column, value in (('category', category), ('station', station), ('run_id', run_id),
+                              ('model_version', model_version)):
+            if value is not None:
+                values = [value] if isinstance(value, str) else list(value)
+                conditions.append(ds.field(column).isin(values))
+        # Yıl bölümü ayrıca süzülür: aralık dışındaki yıl klasörleri hiç açılmaz
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions.append(ds.field('year') >= start.year)
+            conditions.append(ds.field('date') >= pa.scalar(start.date(), pa.date32()))
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions.append(ds.field('year') <= end.year)
+            conditions.append(ds.field('date') <= pa.scalar(end.date(), pa.date32()))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        dataset = ds.dataset(self.root, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+        frame = dataset.to_table(filter=expression).to_pandas()
+
+        if latest and not frame.empty:
+            # En son = en geç kaydedilen çalıştırma (run_id metni değil: önek betik adı, zaman değil)
+            runs = self._run_table().drop_duplicates(['station', 'category'], keep='last')
+            last = set(zip(runs['station'], runs['category'], runs['run_id']))
+            keys = zip(frame['station'].astype(str), frame['category'].astype(str), frame['run_id'])
+            frame = frame[[key in last for key in keys]]
+        return self._to_frame(frame)
+
+    def runs(self):
+        '''Depodaki çalıştırmaların özeti (zamana göre): run_id, model, kategori başına olay sayısı'''
+        if not os.path.exists(self.root):
+            return pd.DataFrame(columns=['run_id', 'model_version', 'station', 'created_at'])
+        runs = self._run_table()
+        if runs.empty:
+            return runs
+        table = (runs.pivot_table(index=['run_id', 'model_version', 'station'], columns='category',
+                                  values='events', aggfunc='sum', fill_value=0).reset_index())
+        table.columns.name = None
+        started = runs.groupby('run_id')['created_at'].min()
+        table.insert(3, 'created_at', table['run_id'].map(started))
+        return table.sort_values('created_at', kind='stable').reset_index(drop=True)
+
+    @staticmethod
+    def _to_frame(frame):
+        '''Sorgu çıktısı: tarih indeksli (evaluation.py olay tablolarıyla aynı biçim)'''
+        frame = frame.copy()
+        frame['date'] = pd.to_datetime(frame['date'])
+        if 'year' in frame:
+            frame['year'] = frame['year'].astype('int16')
+        for column in ('station', 'category'):
+            if column in frame and isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(str)
+        return frame.sort_values(['date', 'station', 'category'], kind='stable').set_index('date')
+
+
+_default_events = None
+
+
+def get_event_store():
+    '''Süreç genelinde paylaşılan olay deposu'''
+    global _default_events
+    if _default_events is None:
+        _default_events = EventStore()
+    return _default_events
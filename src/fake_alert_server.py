@@ -0,0 +1,75 @@
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- AYARLAR ---
+HOST = '127.0.0.1'
+PORT = 8767
+
+# Kullanım (webhook kanalını gerçek servis olmadan denemek için):
+#   python -m src.fake_alert_server --output data/alerts/webhook.jsonl
+#   python alert_daemon.py tarlalar.csv --once --sink webhook:http://127.0.0.1:8767/alerts
+
+
+def make_handler(received, output=None):
+    lock = threading.Lock()
+
+    class FakeAlertHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != '/alerts':
+                self._send(404, {'error': 'bulunamadı'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                alerts = json.loads(self.rfile.read(length))['alerts']
+            except (ValueError, KeyError) as exc:
+                self._send(400, {'error': str(exc)})
+                return
+            with lock:
+                received.extend(alerts)
+                if output:
+                    with open(output, 'a', encoding='utf-8') as f:
+                        for alert in alerts:
+                            f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+            self._send(200, {'received': len(alerts)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeAlertHandler
+
+
+def start_fake_alert_server(host=HOST, port=0, output=None):
+    '''
+    Arka planda (daemon thread) sahte webhook alıcısı başlatır.
+    Dönen: (server, url, received); received gelen alarmların listesi, kapatmak için server.shutdown().
+    '''
+    received = []
+    server = ThreadingHTTPServer((host, port), make_handler(received, output))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/alerts", received
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost yerel sahte alarm webhook'u")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--output", default=None, help="Gelen alarmların ekleneceği JSONL dosyası")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler([], args.output))
+    print(f"🔔 Sahte alarm webhook'u: http://{args.host}:{args.port}/alerts")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Sunucu durduruldu.")
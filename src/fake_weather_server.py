@@ -0,0 +1,95 @@
+import time
+import random
+import argparse
+import threading
+import pandas as pd
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.synthetic import SyntheticProvider
+
+# --- AYARLAR ---
+HOST = '127.0.0.1'
+PORT = 8766
+LATENCY = 0.2       # İstek başına yapay gecikme (sn): gerçek ağ beklemesinin yerine
+FAILURE_RATE = 0.0  # Bu oranda istek 503 döner (retry/backoff denemek için)
+
+# Kullanım:
+#   python -m src.fake_weather_server --latency 0.3 --failure-rate 0.1
+#   AGROFROST_WEATHER_URL=http://127.0.0.1:8766 python train_region.py
+
+
+def make_handler(provider, latency=LATENCY, failure_rate=FAILURE_RATE, stats=None):
+    stats = stats if stats is not None else {}
+    lock = threading.Lock()
+
+    class FakeWeatherHandler(BaseHTTPRequestHandler):
+        # Keep-alive: istemci bağlantıyı yeniden kullanabilsin
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body, content_type='text/csv'):
+            body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/daily':
+                self._send(404, 'bulunamadı', 'text/plain')
+                return
+            with lock:
+                stats['requests'] = stats.get('requests', 0) + 1
+
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                with lock:
+                    stats['failures'] = stats.get('failures', 0) + 1
+                self._send(503, 'geçici hata', 'text/plain')
+                return
+
+            try:
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                df = provider.fetch(float(query['lat']), float(query['lon']),
+                                    pd.Timestamp(query['start']), pd.Timestamp(query['end']))
+            except (KeyError, ValueError) as exc:
+                self._send(400, str(exc), 'text/plain')
+                return
+            self._send(200, df.to_csv(index_label='time') if not df.empty else '')
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeWeatherHandler
+
+
+def start_fake_server(host=HOST, port=0, latency=LATENCY, failure_rate=FAILURE_RATE, provider=None):
+    '''
+    Arka planda (daemon thread) sahte hava durumu sunucusu başlatır.
+    port=0: boş bir port seçilir. Dönen: (server, base_url, stats); kapatmak için server.shutdown().
+    '''
+    stats = {}
+    handler = make_handler(provider or SyntheticProvider(), latency, failure_rate, stats)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}", stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost yerel sahte hava durumu sunucusu (sentetik veri)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=LATENCY, help="İstek başına gecikme (sn)")
+    parser.add_argument("--failure-rate", type=float, default=FAILURE_RATE, help="503 dönme oranı (0-1)")
+    args = parser.parse_args()
+
+    handler = make_handler(SyntheticProvider(), args.latency, args.failure_rate)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"🌦️ Sahte hava durumu sunucusu: http://{args.host}:{args.port}/daily "
+          f"(gecikme {args.latency} sn, hata oranı {args.failure_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Sunucu durduruldu.")
@@ -0,0 +1,31 @@
+import os
+import pandas as pd
+
+REQUIRED_COLUMNS = ['lat', 'lon', 'altitude']
+DEFAULT_SAFETY_MARGIN = 2.0  # app.py slider varsayılanı ile aynı
+
+
+def load_registry(path):
+    '''
+    Tarla kaydını okur (CSV ya da Parquet).
+    Zorunlu: lat, lon, altitude. İsteğe bağlı: field_id, crop, safety_margin.
+    '''
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        fields = pd.read_parquet(path)
+    else:
+        fields = pd.read_csv(path)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in fields.columns]
+    if missing:
+        raise ValueError(f"❌ Tarla kaydında eksik sütun(lar): {', '.join(missing)} ({path})")
+
+    fields = fields.dropna(subset=REQUIRED_COLUMNS).reset_index(drop=True)
+    if 'field_id' not in fields.columns:
+        fields['field_id'] = fields.index.astype(str)
+    if 'crop' not in fields.columns:
+        fields['crop'] = ''
+    if 'safety_margin' not in fields.columns:
+        fields['safety_margin'] = DEFAULT_SAFETY_MARGIN
+    fields['safety_margin'] = fields['safety_margin'].fillna(DEFAULT_SAFETY_MARGIN)
+
+    return fields.astype({'lat': 'float64', 'lon': 'float64', 'altitude': 'float64', 'safety_margin': 'float64'})
@@ -0,0 +1,307 @@
+import os
+import json
+import threading
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from src.weather_store import point_key, point_lock, write_atomic, DEFAULT_FIXTURE_DIR, TAIL_REFRESH
+from src.instrumentation import stage
+
+# --- AYARLAR ---
+DEFAULT_HOURLY_DIR = os.environ.get('AGROFROST_HOURLY_DIR', 'data/hourly')
+# Gece saatleri yerel saattir; Meteostat Hourly varsayılan olarak UTC döner (Konya UTC+3)
+TIMEZONE = os.environ.get('AGROFROST_TIMEZONE', 'Europe/Istanbul')
+CHUNK_DAYS = 92          # Saatlik veri bu kadar günlük parçalar halinde çekilir ve işlenir (bellek sabit)
+NIGHT_START_HOUR = 18    # Gece (yerel saat): önceki gün 18:00 ...
+NIGHT_END_HOUR = 8       # ... o gün 08:00 (dahil). Gece, sabahın tarihiyle etiketlenir (günlük tmin ile aynı gün)
+CALM_WIND = 5.0          # km/sa; altındaki saatler "rüzgarsız" (radyasyon donu için kritik)
+MIN_NIGHT_HOURS = 8      # Bundan az ölçümlü gece eksik sayılır (sonra interpolasyonla doldurulur)
+HUMIDITY_NIGHTS = 3      # Son gece nemi için bakılan geceler (son gece eksikse bir öncekine düşülür)
+CONCURRENCY = 8          # prefetch_nightly: aynı anda en fazla bu kadar nokta (async_fetch.CONCURRENCY ile aynı)
+
+# Gece özellikleri (günlük FEATURES'a eklenerek modele girer)
+NIGHT_FEATURES = ['night_tmin', 'night_dwpt', 'night_rhum', 'calm_hours']
+HOURLY_COLUMNS = ['temp', 'dwpt', 'rhum', 'wspd']
+
+
+class MeteostatHourlyProvider:
+    '''Canlı kaynak: Meteostat Hourly (ağ erişimi gerekir); saatler `timezone` yerel saatine çevrilir'''
+
+    def __init__(self, timezone=TIMEZONE):
+        self.timezone = timezone
+
+    def fetch(self, lat, lon, start, end):
+        from meteostat import Point, Hourly
+        data = Hourly(Point(lat, lon), start.to_pydatetime(), (end + timedelta(hours=23)).to_pydatetime(),
+                      timezone=self.timezone).fetch()
+        # Yerel saate çevrilmiş indeks saat dilimsiz tutulur (gece penceresi ve fixture'larla aynı)
+        if getattr(data.index, 'tz', None) is not None:
+            data.index = data.index.tz_localize(None)
+        return data
+
+
+class HourlyFixtureProvider:
+    '''
+    Çevrimdışı kaynak: `<fixture_dir>/<anahtar>.hourly.csv` (Meteostat Hourly formatında, `time` sütunlu).
+    `time` yerel saattir (TIMEZONE, saat dilimi eki olmadan); UTC fixture gece penceresini kaydırır.
+    '''
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+
+    def fetch(self, lat, lon, start, end):
+        path = os.path.join(self.fixture_dir, f"{point_key(lat, lon)}.hourly.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col='time', parse_dates=['time'])
+        return df.loc[start:end + timedelta(hours=23)]
+
+
+def night_labels(index):
+    '''Saat -> ait olduğu gecenin (sabahın) tarihi: 18:00 ve sonrası ertesi güne, 08:00'e kadar o güne'''
+    return (index + pd.Timedelta(hours=24 - NIGHT_START_HOUR)).normalize()
+
+
+def aggregate_nights(hours):
+    '''
+    Gece saatleri (sadece gece penceresindeki satırlar) -> gece başına özellikler.
+    Vektörel groupby; satır satır döngü yok.
+    '''
+    if hours.empty:
+        return pd.DataFrame(columns=NIGHT_FEATURES + ['night_hours'], index=pd.DatetimeIndex([], name='time'))
+
+    labels = night_labels(hours.index)
+    groups = hours.groupby(labels)
+    nights = pd.DataFrame({
+        'night_tmin': groups['temp'].min(),
+        'night_dwpt': groups['dwpt'].mean(),
+        'night_rhum': groups['rhum'].mean(),
+        'calm_hours': (hours['wspd'] < CALM_WIND).groupby(labels).sum().astype('float64'),
+        'night_hours': groups['temp'].count().astype('float64'),
+    })
+    nights.index.name = 'time'
+    nights.loc[nights['night_hours'] < MIN_NIGHT_HOURS, NIGHT_FEATURES] = np.nan
+    return nights
+
+
+class NightlyAggregator:
+    '''
+    Akış halinde gece özeti: saatlik parçalar sırayla verilir, tamamlanan geceler hemen döner.
+    Parça sınırına denk gelen yarım gece (örn. 18:00-23:00) bir sonraki parçaya taşınır;
+    bellekte en fazla bir parça + bir yarım gece durur.
+    '''
+
+    def __init__(self):
+        self._carry = None
+
+    def feed(self, hourly, until):
+        '''hourly: saatlik parça, until: parçanın kapsadığı son an (veri eksik olsa da)'''
+        hourly = hourly.reindex(columns=HOURLY_COLUMNS)
+        hour = hourly.index.hour
+        night = hourly[(hour >= NIGHT_START_HOUR) | (hour <= NIGHT_END_HOUR)]
+        if self._carry is not None and not self._carry.empty:
+            night = pd.concat([self._carry, night])
+
+        # Bitiş saati (sabah 08:00) geçilmiş geceler tamamdır
+        ends = night_labels(night.index) + pd.Timedelta(hours=NIGHT_END_HOUR)
+        complete = ends <= pd.Timestamp(until)
+        self._carry = night[~complete]
+        return aggregate_nights(night[complete])
+
+    def close(self):
+        '''Kalan yarım gece (kaynak bitti); MIN_NIGHT_HOURS altındaysa özellikleri NaN'''
+        rest, self._carry = self._carry, None
+        return aggregate_nights(rest if rest is not None else pd.DataFrame(columns=HOURLY_COLUMNS))
+
+
+def stream_nightly(provider, lat, lon, start, end, chunk_days=CHUNK_DAYS):
+    '''
+    [start, end] gecelerinin özellikleri, saatlik veri `chunk_days` günlük parçalarla çekilerek.
+    Üretici: her parçadan sonra tamamlanan geceleri verir. Bellek kullanımı toplam süreden bağımsız.
+    '''
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    aggregator = NightlyAggregator()
+    # İlk gecenin akşam saatleri bir önceki günde
+    chunk_start = start - timedelta(days=1)
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        with stage('hourly_fetch') as fetch_stage:
+            hourly = provider.fetch(lat, lon, chunk_start, chunk_end)
+            fetch_stage['rows'] = len(hourly)
+        nights = aggregator.feed(hourly, chunk_end + timedelta(hours=23))
+        yield nights.loc[start:end]
+        chunk_start = chunk_end + timedelta(days=1)
+    yield aggregator.close().loc[start:end]
+
+
+class NightlyStore:
+    '''
+    Gece özellikleri için yerel Parquet deposu (saatlik ham veri saklanmaz, sadece gece başına bir satır).
+    WeatherStore gibi: sadece depoda olmayan baş/kuyruk geceleri için saatlik veri çekilir.
+    '''
+
+    def __init__(self, root=DEFAULT_HOURLY_DIR, provider=None, offline=False):
+        self.root = root
+        if provider is None:
+            provider = HourlyFixtureProvider() if offline else MeteostatHourlyProvider()
+        self.provider = provider
+        self._frames = {}
+        self._lock = threading.Lock()
+        self._point_locks = {}  # anahtar -> Lock: farklı noktalar eşzamanlı güncellenir, aynı nokta sırayla
+
+    def _point_lock(self, key):
+        with self._lock:
+            return self._point_locks.setdefault(key, threading.Lock())
+
+    def _paths(self, key):
+        folder = os.path.join(self.root, key)
+        return folder, os.path.join(folder, 'nightly.parquet'), os.path.join(folder, 'meta.json')
+
+    def _read(self, key):
+        _, data_path, meta_path = self._paths(key)
+        if not os.path.exists(meta_path):
+            return None, {}
+        # Bellekteki kopya sadece meta.json değişmemişse kullanılır (başka süreç depoyu uzatmış olabilir)
+        stamp = os.stat(meta_path).st_mtime_ns
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        with open(meta_path) as f:
+            meta = json.load(f)
+        nights = pd.read_parquet(data_path) if os.path.exists(data_path) else None
+        self._frames[key] = (stamp, nights, meta)
+        return nights, meta
+
+    def _write(self, key, nights, meta):
+        folder, data_path, meta_path = self._paths(key)
+        os.makedirs(folder, exist_ok=True)
+        if nights is not None:
+            write_atomic(data_path, nights.to_parquet)
+        def dump(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(meta, f)
+        write_atomic(meta_path, dump)
+        self._frames[key] = (os.stat(meta_path).st_mtime_ns, nights, meta)
+
+    def _missing_ranges(self, meta, start, end):
+        '''WeatherStore ile aynı kural: sorulmamış baş/kuyruk her zaman çekilir, tekrar sorma sadece süreyle'''
+        if 'first' not in meta:
+            return [(start, end)]
+        ranges = []
+        last = pd.Timestamp(meta['last'])
+        checked_from = pd.Timestamp(meta.get('checked_from', meta['first']))
+        checked_until = pd.Timestamp(meta.get('checked_until', meta['last']))
+        if start < checked_from:
+            ranges.append((start, checked_from - timedelta(days=1)))
+        # Son gece yarım hesaplanmış olabilir (veri geç gelir); kuyruk o geceden itibaren yeniden hesaplanır
+        partial = meta.get('last_partial', False)
+        tail_from = last if partial else last + timedelta(days=1)
+        checked_at = pd.Timestamp(meta.get('checked_at', '1970-01-01'))
+        stale = datetime.now() - checked_at > TAIL_REFRESH
+        if end > checked_until or ((end > last or (end == last and partial)) and stale):
+            ranges.append((tail_from, end))
+        return ranges
+
+    def update(self, lat, lon, start, end):
+        '''Eksik geceleri parça parça hesaplar ve depoya ekler'''
+        key = point_key(lat, lon)
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        with self._point_lock(key), point_lock(self._paths(key)[0]):
+            # Kilit alındıktan sonra okunur (meta.json değiştiyse _read diskten yeniden yükler)
+            nights, meta = self._read(key)
+            # Başka saat diliminde (eski sürümde UTC) hesaplanmış geceler bir kez baştan hesaplanır
+            timezone = getattr(self.provider, 'timezone', TIMEZONE)
+            if meta and meta.get('timezone') != timezone:
+                nights, meta = None, {}
+            ranges = self._missing_ranges(meta, start, end)
+            if not ranges:
+                return key
+
+            parts = [] if nights is None else [nights]
+            for gap_start, gap_end in ranges:
+                print(f"🌙 Saatlik veri işleniyor: {lat}, {lon} ({gap_start.date()} - {gap_end.date()}, "
+                      f"{CHUNK_DAYS} günlük parçalar)...")
+                with stage('nightly', days=(gap_end - gap_start).days + 1):
+                    parts.extend(part for part in stream_nightly(self.provider, lat, lon, gap_start, gap_end)
+                                 if not part.empty)
+
+            # Sorulan aralık işaretlenir (veri gelmese bile aynı boşluk hemen tekrar sorulmaz)
+            checked_from = min(start, pd.Timestamp(meta.get('checked_from', start)))
+            checked_until = max(end, pd.Timestamp(meta.get('checked_until', end)))
+            meta = {**meta, 'lat': lat, 'lon': lon, 'timezone': timezone, 'checked_from': str(checked_from.date()),
+                    'checked_until': str(checked_until.date()),
+                    'checked_at': datetime.now().isoformat(timespec='seconds')}
+            if len(parts) == (0 if nights is None else 1):
+                self._write(key, nights, meta)
+                return key
+
+            merged = pd.concat(parts)
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            meta.update({'first': str(merged.index[0].date()), 'last': str(merged.index[-1].date()),
+                         'last_partial': bool(merged['night_hours'].iloc[-1] < MIN_NIGHT_HOURS)})
+            self._write(key, merged, meta)
+        return key
+
+    def nightly(self, lat, lon, start, end):
+        '''[start, end] gecelerinin özellikleri; eksik geceler doğrusal interpolasyonla doldurulur'''
+        key = self.update(lat, lon, start, end)
+        nights, _ = self._read(key)
+        if nights is None or nights.empty:
+            return pd.DataFrame(columns=NIGHT_FEATURES)
+        nights = nights[NIGHT_FEATURES].interpolate(method='linear', limit_direction='both')
+        return nights.loc[pd.Timestamp(start).normalize():pd.Timestamp(end).normalize()]
+
+
+def last_night_humidity(lat, lon, default):
+    '''
+    Son gecenin ortalama bağıl nemi (%); çiğ noktası için sabit varsayım (%40-45) yerine.
+    Saatlik veri alınamazsa `default` döner.
+    '''
+    try:
+        nights = get_nightly_store().nightly(lat, lon, *humidity_nights())
+    except Exception as exc:
+        print(f"⚠️ Saatlik nem alınamadı ({exc}), varsayılan %{default} kullanılıyor.")
+        return default
+    humidity = nights['night_rhum'].dropna() if 'night_rhum' in nights else nights
+    return float(humidity.iloc[-1]) if len(humidity) else default
+
+
+def humidity_nights():
+    '''last_night_humidity'nin baktığı geceler: (başlangıç, bugün)'''
+    today = pd.Timestamp(datetime.now()).normalize()
+    return today - timedelta(days=HUMIDITY_NIGHTS), today
+
+
+def prefetch_nightly(points, start, end, store=None, concurrency=CONCURRENCY):
+    '''
+    Birçok noktanın [start, end] gecelerini eşzamanlı (thread havuzunda) hesaplayıp depoya yazar;
+    sonrasında nightly() / last_night_humidity() çağrıları ağa çıkmadan depodan okur.
+    Dönen: {nokta anahtarı: hata} (sadece başarısızlar).
+    '''
+    store = store or get_nightly_store()
+    points = list(dict.fromkeys((float(lat), float(lon)) for lat, lon in points))
+    failed = {}
+    with stage('prefetch_nightly', points=len(points)) as prefetch_stage:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = {pool.submit(store.update, lat, lon, start, end): point_key(lat, lon) for lat, lon in points}
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception() is not None:
+                    failed[futures[future]] = future.exception()
+        prefetch_stage['failures'] = len(failed)
+    print(f"🌙 {len(points)} nokta için gece verisi hazır, {len(failed)} hata")
+    for key, exc in failed.items():
+        print(f"❌ {key}: {exc}")
+    return failed
+
+
+_default_nightly = None
+
+
+def get_nightly_store():
+    '''Süreç genelinde paylaşılan gece deposu (AGROFROST_OFFLINE=1: fixture, yoksa Meteostat Hourly)'''
+    global _default_nightly
+    if _default_nightly is None:
+        offline = os.environ.get('AGROFROST_OFFLINE', '0') == '1'
+        _default_nightly = NightlyStore(offline=offline)
+    return _default_nightly
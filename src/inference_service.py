@@ -0,0 +1,165 @@
+import time
+import queue
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from src.physics_engine import apply_lapse_rate, calculate_dew_point, classify_frost, FROST_LABELS
+
+# Mikro-batch ayarları
+MAX_BATCH = 256        # Tek ileri geçişe en fazla kaç istek girer
+MAX_WAIT_MS = 5        # İlk istek geldikten sonra diğerleri için en fazla bekleme
+STATS_WINDOW = 2048    # Gecikme istatistikleri için saklanan son istek sayısı
+
+DEFAULT_STATION_ALT = 1016  # Konya Merkez
+DEFAULT_HUMIDITY = 45       # Nem verisi yoksa kullanılan varsayım (app.py ile aynı)
+
+
+class MicroBatcher:
+    '''
+    Eşzamanlı gelen pencereleri toplayıp tek `predict_windows` çağrısında çalıştırır.
+    Her istek bir Future alır; arka plandaki tek işçi thread modeli kullanır.
+    '''
+
+    def __init__(self, bundle, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.bundle = bundle
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._requests = 0
+        self._batches = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, window):
+        '''Ölçeklenmemiş (window_size, özellik) pencere -> Future[istasyon tmin °C]'''
+        future = Future()
+        self._queue.put((np.asarray(window, dtype='float64'), future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _predict_each(self, items):
+        '''Batch başarısızsa istekler tek tek: hata sadece kendi isteğine döner, diğerleri etkilenmez'''
+        for window, future, _ in items:
+            try:
+                value = self.bundle.predict_windows(self.bundle.transform(window[np.newaxis]))[0]
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(float(value))
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                windows = self.bundle.transform(np.stack([w for w, _, _ in items]))
+                predictions = self.bundle.predict_windows(windows)
+            except Exception:
+                self._predict_each(items)
+                predictions = None
+
+            done = time.perf_counter()
+            if predictions is not None:
+                for (_, future, started), value in zip(items, predictions):
+                    future.set_result(float(value))
+
+            with self._stats_lock:
+                self._requests += len(items)
+                self._batches += 1
+                self._batch_sizes.append(len(items))
+                self._latencies.extend((done - started) * 1000.0 for _, _, started in items)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = np.asarray(self._latencies)
+            sizes = np.asarray(self._batch_sizes)
+            requests, batches = self._requests, self._batches
+
+        summary = {'requests': requests, 'batches': batches, 'engine': self.bundle.engine,
+                   'model_version': self.bundle.version}
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            summary['latency_ms'] = {'p50': round(p50, 3), 'p95': round(p95, 3),
+                                     'p99': round(p99, 3), 'max': round(float(latencies.max()), 3)}
+        if len(sizes):
+            summary['batch_size'] = {'mean': round(float(sizes.mean()), 2), 'max': int(sizes.max())}
+        return summary
+
+
+class ForecastService:
+    '''
+    Modeli bellekte tutan tahmin servisi.
+    Tarla isteğini istasyon penceresine çevirir, mikro-batch'e verir, fizik motoruyla tarlaya uyarlar.
+    '''
+
+    def __init__(self, bundle, store, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.bundle = bundle
+        self.store = store
+        self.batcher = MicroBatcher(bundle, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    def _window(self, request):
+        if 'history' in request:
+            # İstemci son günleri kendisi gönderebilir: [[tavg, tmin, tmax, prcp, wspd], ...]
+            history = np.asarray(request['history'], dtype='float64')
+        else:
+            df = self.store.recent(request['lat'], request['lon'], days=2 * self.bundle.window_size,
+                                   columns=self.bundle.features)
+            history = df.values
+        n_features = len(self.bundle.features)
+        if history.ndim != 2 or history.shape[1] != n_features:
+            raise ValueError(f"Geçmiş (gün, {n_features}) biçiminde olmalı: {self.bundle.features} "
+                             f"(gelen: {history.shape}).")
+        if len(history) < self.bundle.window_size:
+            raise ValueError(f"En az {self.bundle.window_size} günlük veri gerekli (gelen: {len(history)}).")
+        return history[-self.bundle.window_size:]
+
+    def submit(self, request):
+        '''Tek tarla isteği -> Future[istasyon ham tahmini]'''
+        return self.batcher.submit(self._window(request))
+
+    def finalize(self, request, station_raw):
+        '''Güvenlik payı + rakım düzeltmesi + çiğ noktası (src/physics_engine)'''
+        margin = float(request.get('safety_margin', 0.0))
+        station_alt = float(request.get('station_altitude', DEFAULT_STATION_ALT))
+        farm_alt = float(request.get('altitude', station_alt))
+        humidity = float(request.get('humidity', DEFAULT_HUMIDITY))
+
+        station_safe = station_raw - margin
+        farm_raw = apply_lapse_rate(station_raw, station_alt, farm_alt)
+        farm_safe = apply_lapse_rate(station_safe, station_alt, farm_alt)
+        dew_point = calculate_dew_point(farm_safe, humidity)
+
+        risk = FROST_LABELS[int(classify_frost(farm_safe, dew_point))]
+
+        return {
+            'station_raw': round(station_raw, 3),
+            'station_safe': round(station_safe, 3),
+            'farm_raw': round(float(farm_raw), 3),
+            'farm_safe': round(float(farm_safe), 3),
+            'dew_point': round(float(dew_point), 3),
+            'risk': risk,
+            'model_version': self.bundle.version,
+        }
+
+    def forecast(self, requests):
+        '''Birden çok tarla: hepsi aynı anda kuyruğa girer, aynı batch'te çalışabilir'''
+        futures = [self.submit(r) for r in requests]
+        return [self.finalize(r, f.result()) for r, f in zip(requests, futures)]
+
+    def stats(self):
+        return self.batcher.stats()
@@ -0,0 +1,229 @@
+import os
+import io
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import tracemalloc
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- AYARLAR ---
+# Her çalıştırma bu dosyaya tek satır JSON olarak eklenir (boş bırakılırsa yazılmaz)
+DEFAULT_METRICS_PATH = os.environ.get('AGROFROST_METRICS', 'logs/metrics.jsonl')
+PROFILE_DIR = os.environ.get('AGROFROST_PROFILE_DIR', 'logs/profiles')
+# İsteğe bağlı profil: 'cprofile' (fonksiyon bazında süre) veya 'memory' (aşama bazında tepe bellek)
+DEFAULT_PROFILE = os.environ.get('AGROFROST_PROFILE') or None
+PROFILE_TOP = 15
+
+# Aktif çalıştırma; alt modüller (depo, backtest, eğitim) parametre almadan aşamalarını buraya yazar
+_current_run = contextvars.ContextVar('agrofrost_run', default=None)
+
+
+def new_run_id(name='run'):
+    '''Sıralanabilir, çakışmayan çalıştırma kimliği: <ad>-<zaman>-<6 hex>'''
+    return f"{name}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+class RunMetrics:
+    '''Tek bir çalıştırmanın (tahmin, eğitim, doğrulama...) aşama süreleri ve sayaçları'''
+
+    def __init__(self, name, profile=DEFAULT_PROFILE, metrics_path=DEFAULT_METRICS_PATH, **tags):
+        if profile not in (None, 'cprofile', 'memory'):
+            raise ValueError(f"❌ Bilinmeyen profil türü: {profile}")
+        self.name = name
+        self.profile = profile
+        self.metrics_path = metrics_path
+        self.tags = tags
+        # Çalıştırmanın kimliği; aynı çalıştırmanın ürettiği kayıtlar (örn. doğrulama olayları) bununla bağlanır
+        self.run_id = new_run_id(name)
+        self.stages = []
+        self.counts = {}
+        self.status = 'ok'
+        self.profile_path = None
+        self._stack = []
+        self._open = []
+        self._profiler = None
+        self._owns_tracemalloc = False
+        self._started = None
+        self._started_at = None
+        self.seconds = None
+        self.peak_mb = None
+
+    # --- Yaşam döngüsü ---
+    def start(self):
+        self._started_at = datetime.now()
+        if self.profile == 'memory' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def finish(self, status='ok'):
+        self.seconds = time.perf_counter() - self._started
+        self.status = status
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._save_profile()
+        if self.profile == 'memory':
+            self.peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        self._write()
+        return self
+
+    # --- Aşamalar ve sayaçlar ---
+    @contextmanager
+    def stage(self, name, **counts):
+        '''
+        Adlandırılmış aşamayı ölçer. Dönen sözlüğe satır/pencere sayısı eklenebilir:
+            with run.stage('fetch') as s: df = ...; s['rows'] = len(df)
+        İç içe aşamalar "dış/iç" adıyla kaydedilir.
+        '''
+        full_name = '/'.join(self._stack + [name])
+        record = {'stage': full_name, **counts}
+        self._stack.append(name)
+        # Giriş sırasına göre eklenir: dış aşama, iç aşamalarından önce listelenir
+        self.stages.append(record)
+        self._open.append(record)
+        if self.profile == 'memory':
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - started, 6)
+            self._stack.pop()
+            self._open.pop()
+            if self.profile == 'memory':
+                # İç aşamalar tepe sayacını sıfırlar; dış aşama kendi tepesini iç aşamalarla birleştirir
+                peak = max(tracemalloc.get_traced_memory()[1] / 1e6, record.pop('_child_peak', 0.0))
+                record['peak_mb'] = round(peak, 3)
+                if self._open:
+                    parent = self._open[-1]
+                    parent['_child_peak'] = max(parent.get('_child_peak', 0.0), peak)
+
+    def count(self, **counts):
+        '''Çalıştırma geneli sayaçlar (toplanarak): run.count(rows=365, windows=358)'''
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + int(value)
+
+    # --- Çıktılar ---
+    def to_dict(self):
+        record = {
+            'run': self.name,
+            'run_id': self.run_id,
+            'started_at': self._started_at.isoformat(timespec='seconds') if self._started_at else None,
+            'status': self.status,
+            'seconds': round(self.seconds, 6) if self.seconds is not None else None,
+            'stages': self.stages,
+            'counts': self.counts,
+            **self.tags,
+        }
+        if self.peak_mb is not None:
+            record['peak_mb'] = round(self.peak_mb, 3)
+        if self.profile_path:
+            record['profile'] = self.profile_path
+        return record
+
+    def table(self):
+        '''Aşama tablosu (Streamlit / konsol için); payı, toplam süreye göre'''
+        import pandas as pd
+        df = pd.DataFrame(self.stages)
+        if df.empty:
+            return df
+        # Çalıştırma bitmemişse pay, üst düzey aşamaların toplamına göre hesaplanır
+        top_level = df.loc[~df['stage'].str.contains('/'), 'seconds'].sum()
+        total = self.seconds or top_level
+        df['share'] = (df['seconds'] / total).round(3) if total else 0.0
+        return df
+
+    def print_summary(self):
+        print(f"\n⏱️ {self.name}: toplam {self.seconds:.2f} sn")
+        for record in self.stages:
+            extras = ', '.join(f"{k}={v}" for k, v in record.items() if k not in ('stage', 'seconds'))
+            indent = '  ' * record['stage'].count('/')
+            print(f"   {indent}{record['stage']:<28} {record['seconds']:>9.3f} sn  {extras}")
+
+    def _write(self):
+        if not self.metrics_path:
+            return
+        folder = os.path.dirname(self.metrics_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Tek satır = tek çalıştırma (JSON-lines); eşzamanlı yazımlarda satırlar karışmaz
+        with open(self.metrics_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+    def _save_profile(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = self._started_at.strftime('%Y%m%d_%H%M%S')
+        self.profile_path = os.path.join(PROFILE_DIR, f"{self.name}_{stamp}.prof")
+        self._profiler.dump_stats(self.profile_path)
+
+        # En pahalı fonksiyonlar konsola da (snakeviz vb. için .prof dosyası duruyor)
+        buffer = io.StringIO()
+        pstats.Stats(self._profiler, stream=buffer).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        print(buffer.getvalue())
+
+
+@contextmanager
+def track_run(name, profile=DEFAULT_PROFILE, metrics_path=DEFAULT_METRICS_PATH, quiet=False, **tags):
+    '''
+    Bir çalıştırmayı başlatır, aktif çalıştırma yapar ve sonunda metrik satırını yazar.
+    Hata olursa da (status='error') yazılır.
+    '''
+    run = RunMetrics(name, profile=profile, metrics_path=metrics_path, **tags).start()
+    token = _current_run.set(run)
+    status = 'error'
+    try:
+        yield run
+        status = 'ok'
+    finally:
+        _current_run.reset(token)
+        run.finish(status)
+        if not quiet:
+            run.print_summary()
+
+
+def current_run():
+    return _current_run.get()
+
+
+@contextmanager
+def stage(name, **counts):
+    '''Aktif çalıştırma varsa aşamayı ona yazar; yoksa hiçbir şey ölçmez (ek yük yok)'''
+    run = _current_run.get()
+    if run is None:
+        yield dict(counts)
+        return
+    with run.stage(name, **counts) as record:
+        yield record
+
+
+def count(**counts):
+    run = _current_run.get()
+    if run is not None:
+        run.count(**counts)
+
+
+def read_metrics(path=DEFAULT_METRICS_PATH, run=None):
+    '''JSON-lines dosyasından aşama satırları (çalıştırma başına bir değil, aşama başına bir satır)'''
+    import pandas as pd
+    rows = []
+    if not os.path.exists(path):
+        return pd.DataFrame(rows)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if run is not None and record.get('run') != run:
+                continue
+            for item in record.get('stages', []):
+                rows.append({'run': record['run'], 'started_at': record['started_at'],
+                             'status': record['status'], **item})
+    return pd.DataFrame(rows)
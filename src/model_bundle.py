@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import numpy as np
+from datetime import datetime
+from src.numpy_lstm import NumpyLSTM, WEIGHTS_FILE, export_h5_weights, weights_file
+
+BUNDLE_FORMAT = 1
+DEFAULT_BUNDLE = 'models/konya_lstm_v2'
+# Çıkarım hassasiyeti (float32 | float16 | int8); düşük hassasiyetli dosyalar export_model.py --quantize ile üretilir
+DEFAULT_PRECISION = os.environ.get('AGROFROST_PRECISION', 'float32')
+
+# Bundle klasörü içeriği
+MODEL_FILE = 'model.h5'
+META_FILE = 'bundle.json'
+
+
+class ForecastBundle:
+    '''
+    Eğitilmiş model + eğitimdeki ölçekleyici + özellik sırası + pencere boyu.
+    Canlı tahmin için scaler tekrar fit edilmez; sadece son `window_size` gün yeterli.
+    '''
+
+    def __init__(self, path, meta, model):
+        self.path = path
+        self.engine = 'numpy' if isinstance(model, NumpyLSTM) else 'keras'
+        self.precision = getattr(model, 'precision', 'float32')
+        self.meta = meta
+        self.model = model
+        self.version = meta['version']
+        self.features = list(meta['features'])
+        self.target_index = self.features.index(meta['target'])
+        self.window_size = int(meta['window_size'])
+        # Eski paketlerde yok: tek günlük model
+        self.horizon = int(meta.get('horizon', 1))
+
+        scaler = meta['scaler']
+        self.min_ = np.asarray(scaler['min'], dtype='float64')
+        self.scale_ = np.asarray(scaler['scale'], dtype='float64')
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        '''
+        Paket içeriğinin kısa özeti (meta + ağırlıklar + çıkarım motoru/hassasiyet).
+        Yeniden eğitilen model farklı özet verir; tahmin önbelleği bu sayede kendiliğinden geçersizleşir.
+        '''
+        if self._fingerprint is None:
+            digest = hashlib.sha256(json.dumps(self.meta, sort_keys=True).encode())
+            digest.update(f"{self.engine}:{getattr(self.model, 'dtype', '')}:{self.precision}".encode())
+            if isinstance(self.model, NumpyLSTM):
+                for name in sorted(self.model.arrays):
+                    digest.update(name.encode())
+                    digest.update(self.model.arrays[name].tobytes())
+            else:
+                with open(os.path.join(self.path, MODEL_FILE), 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    # --- Ölçekleme (MinMaxScaler ile birebir aynı formül) ---
+    def transform(self, values):
+        return np.asarray(values, dtype='float64') * self.scale_ + self.min_
+
+    def inverse_target(self, scaled_values):
+        scaled_values = np.asarray(scaled_values, dtype='float64')
+        return (scaled_values - self.min_[self.target_index]) / self.scale_[self.target_index]
+
+    # --- Tahmin ---
+    def predict_horizon_scaled(self, windows, batch_size=4096):
+        '''(N, window_size, özellik) ölçekli pencereler -> (N, horizon) ölçekli tahmin'''
+        windows = np.ascontiguousarray(windows, dtype='float32')
+        return self.model.predict(windows, batch_size=batch_size, verbose=0)
+
+    def predict_scaled(self, windows, batch_size=4096):
+        '''(N, window_size, özellik) ölçekli pencereler -> (N,) ölçekli yarın tahmini'''
+        return self.predict_horizon_scaled(windows, batch_size)[:, 0]
+
+    def predict_horizon(self, windows, batch_size=4096):
+        '''(N, window_size, özellik) ölçekli pencereler -> (N, horizon) °C; sütun h = h+1 gün sonrası'''
+        return self.inverse_target(self.predict_horizon_scaled(windows, batch_size))
+
+    def predict_windows(self, windows, batch_size=4096):
+        '''(N, window_size, özellik) ölçekli pencereler -> (N,) °C cinsinden tmin tahmini'''
+        return self.inverse_target(self.predict_scaled(windows, batch_size))
+
+    def predict_outlook(self, df):
+        '''DataFrame'in son `window_size` gününden sonraki `horizon` günün istasyon tmin tahmini (°C), tek geçiş'''
+        values = df[self.features].values[-self.window_size:]
+        if len(values) < self.window_size:
+            raise ValueError(f"❌ Tahmin için en az {self.window_size} günlük veri gerekli (gelen: {len(values)}).")
+        window = self.transform(values)[np.newaxis, :, :]
+        return self.predict_horizon(window)[0]
+
+    def predict_next(self, df):
+        '''DataFrame'in son `window_size` gününden yarının istasyon tmin tahmini (°C)'''
+        return float(self.predict_outlook(df)[0])
+
+
+def save_bundle(path, model, scaler, features, target='tmin', window_size=7, version=None, horizon=1):
+    '''Modeli ve fit edilmiş MinMaxScaler parametrelerini tek klasöre yazar'''
+    os.makedirs(path, exist_ok=True)
+    model.save(os.path.join(path, MODEL_FILE))
+    # TensorFlow'suz çıkarım için ağırlıkların NumPy kopyası
+    export_h5_weights(os.path.join(path, MODEL_FILE), os.path.join(path, WEIGHTS_FILE))
+
+    meta = {
+        'format': BUNDLE_FORMAT,
+        'version': version or os.path.basename(os.path.normpath(path)),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'features': list(features),
+        'target': target,
+        'window_size': int(window_size),
+        'horizon': int(horizon),
+        'scaler': {
+            'feature_range': list(scaler.feature_range),
+            'data_min': scaler.data_min_.tolist(),
+            'data_max': scaler.data_max_.tolist(),
+            'min': scaler.min_.tolist(),
+            'scale': scaler.scale_.tolist(),
+        },
+    }
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def read_bundle_meta(path=DEFAULT_BUNDLE):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"❌ Desteklenmeyen model paketi formatı: {meta.get('format')} ({path})")
+    return meta
+
+
+def load_bundle(path=DEFAULT_BUNDLE, engine='auto', precision=None):
+    '''
+    Model paketini yükler ve kullanıma hazır ForecastBundle döner.
+    engine='numpy': TensorFlow import edilmez (weights.npz), 'keras': orijinal .h5,
+    'auto': NumPy ağırlıkları varsa onları kullanır.
+    precision: float32 | float16 | int8 (verilmezse AGROFROST_PRECISION); düşük hassasiyet sadece NumPy motorunda.
+    '''
+    meta = read_bundle_meta(path)
+    precision = precision or DEFAULT_PRECISION
+    weights_path = os.path.join(path, weights_file(precision))
+
+    if precision != 'float32':
+        if engine == 'keras':
+            raise ValueError(f"❌ {precision} hassasiyet sadece NumPy motorunda kullanılabilir.")
+        if not os.path.exists(weights_path):
+            raise FileNotFoundError(f"❌ {weights_path} yok. Önce: python export_model.py {path} --quantize {precision}")
+        engine = 'numpy'
+
+    if engine == 'auto':
+        engine = 'numpy' if os.path.exists(weights_path) else 'keras'
+
+    if engine == 'numpy':
+        model = NumpyLSTM.load(weights_path)
+    elif engine == 'keras':
+        # TensorFlow sadece gerçekten istenirse yüklenir (birkaç saniye + yüzlerce MB)
+        from tensorflow.keras.models import load_model
+        model = load_model(os.path.join(path, MODEL_FILE), compile=False)
+    else:
+        raise ValueError(f"❌ Bilinmeyen çıkarım motoru: {engine}")
+    return ForecastBundle(path, meta, model)
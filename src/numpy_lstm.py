@@ -0,0 +1,180 @@
+import json
+import numpy as np
+
+# Bundle içindeki NumPy ağırlık dosyası
+WEIGHTS_FILE = 'weights.npz'
+
+# Ağırlık hassasiyetleri: float32 (eğitimdeki), float16 (yarı boyut), int8 (çeyrek boyut)
+PRECISIONS = ('float32', 'float16', 'int8')
+# int8 dosyalarında her matrisin yanında çıkış sütunu başına ölçek: w ≈ q * scale
+SCALE_SUFFIX = '__scale'
+
+# Çıkarımda etkisi olmayan katmanlar (Dropout sadece eğitimde çalışır)
+SKIPPED_LAYERS = ('InputLayer', 'Dropout')
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'linear': lambda x: x,
+}
+
+
+def export_h5_weights(h5_path, out_path):
+    '''
+    Keras .h5 dosyasındaki LSTM/Dense ağırlıklarını TensorFlow yüklemeden (h5py ile) okur
+    ve `.npz` olarak yazar. Katman sırası ve ayarları model_config'den alınır.
+    '''
+    import h5py
+
+    with h5py.File(h5_path, 'r') as f:
+        config = json.loads(f.attrs['model_config'])
+        weights = f['model_weights']
+
+        layers, arrays = [], {}
+        for layer in config['config']['layers']:
+            kind = layer['class_name']
+            if kind in SKIPPED_LAYERS:
+                continue
+            if kind not in ('LSTM', 'Dense'):
+                raise ValueError(f"❌ NumPy motoru bu katmanı desteklemiyor: {kind}")
+
+            cfg = layer['config']
+            group = weights[cfg['name']]
+            # Keras sırası her zaman: kernel, (recurrent_kernel), bias
+            values = [np.asarray(group[name]) for name in group.attrs['weight_names']]
+
+            i = len(layers)
+            spec = {'type': kind, 'activation': cfg.get('activation', 'linear')}
+            if kind == 'LSTM':
+                spec['recurrent_activation'] = cfg.get('recurrent_activation', 'sigmoid')
+                spec['return_sequences'] = bool(cfg.get('return_sequences', False))
+                arrays[f'{i}_kernel'], arrays[f'{i}_recurrent'], arrays[f'{i}_bias'] = values
+            else:
+                arrays[f'{i}_kernel'], arrays[f'{i}_bias'] = values
+            layers.append(spec)
+
+    np.savez(out_path, layers=json.dumps(layers), **arrays)
+    return out_path
+
+
+def weights_file(precision='float32'):
+    '''Hassasiyete göre paketteki ağırlık dosyasının adı'''
+    if precision not in PRECISIONS:
+        raise ValueError(f"❌ Bilinmeyen hassasiyet: {precision} ({', '.join(PRECISIONS)})")
+    return WEIGHTS_FILE if precision == 'float32' else f'weights_{precision}.npz'
+
+
+def quantize_weights(src_path, out_path, precision):
+    '''
+    float32 weights.npz -> düşük hassasiyetli kopya.
+    float16: tüm diziler yarı hassasiyet. int8: kernel/recurrent matrisleri çıkış sütunu başına
+    simetrik ölçekle [-127, 127]'ye; bias'lar zaten küçük olduğu için float32 kalır.
+    '''
+    with np.load(src_path) as data:
+        layers = str(data['layers'])
+        arrays = {k: data[k] for k in data.files if k not in ('layers', 'precision')}
+
+    out = {}
+    for name, values in arrays.items():
+        if precision == 'float16':
+            out[name] = values.astype('float16')
+        elif precision == 'int8' and values.ndim == 2:
+            scale = np.max(np.abs(values), axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            out[name] = np.clip(np.round(values / scale), -127, 127).astype('int8')
+            out[name + SCALE_SUFFIX] = scale.astype('float32')
+        else:
+            out[name] = values.astype('float32')
+
+    np.savez(out_path, layers=layers, precision=precision, **out)
+    return out_path
+
+
+def lstm_forward(x, kernel, recurrent, bias, activation=np.tanh,
+                 recurrent_activation=_sigmoid, return_sequences=False):
+    '''
+    Keras LSTM ile aynı ileri geçiş (kapı sırası: i, f, c, o).
+    x: (N, T, özellik) -> (N, T, birim) veya (N, birim)
+    '''
+    n, steps, _ = x.shape
+    units = recurrent.shape[0]
+
+    # Girdi projeksiyonu tüm zaman adımları için tek matris çarpımı
+    x_proj = x @ kernel + bias
+
+    h = np.zeros((n, units), dtype=x.dtype)
+    c = np.zeros((n, units), dtype=x.dtype)
+    outputs = np.empty((n, steps, units), dtype=x.dtype) if return_sequences else None
+
+    for t in range(steps):
+        z = x_proj[:, t] + h @ recurrent
+        i = recurrent_activation(z[:, :units])
+        f = recurrent_activation(z[:, units:2 * units])
+        g = activation(z[:, 2 * units:3 * units])
+        o = recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * activation(c)
+        if return_sequences:
+            outputs[:, t] = h
+
+    return outputs if return_sequences else h
+
+
+class NumpyLSTM:
+    '''
+    TensorFlow'suz çıkarım motoru. Keras modelinin `predict` arayüzünü taklit eder,
+    böylece ForecastBundle içinde doğrudan yerine geçer.
+    '''
+
+    def __init__(self, layers, arrays, dtype='float32'):
+        self.layers = layers
+        self.precision = 'float32'   # Ağırlıkların saklandığı hassasiyet (load ile gelir)
+        self.dtype = np.dtype(dtype)
+        self.arrays = {k: np.asarray(v, dtype=self.dtype) for k, v in arrays.items()}
+
+    @classmethod
+    def load(cls, path, dtype='float32'):
+        with np.load(path) as data:
+            layers = json.loads(str(data['layers']))
+            precision = str(data['precision']) if 'precision' in data.files else 'float32'
+            stored = {k: data[k] for k in data.files if k not in ('layers', 'precision')}
+
+        # Düşük hassasiyetli ağırlıklar yüklemede bir kez açılır; hesap yine BLAS'lı
+        # float32 matris çarpımında kalır (NumPy'da float16/int8 çarpımı BLAS'sız ve yavaş)
+        arrays = {}
+        for name, values in stored.items():
+            if name.endswith(SCALE_SUFFIX):
+                continue
+            scale = stored.get(name + SCALE_SUFFIX)
+            arrays[name] = values.astype('float32') * scale if scale is not None else values
+
+        model = cls(layers, arrays, dtype=dtype)
+        model.precision = precision
+        return model
+
+    def _forward(self, x):
+        for i, spec in enumerate(self.layers):
+            act = ACTIVATIONS[spec['activation']]
+            if spec['type'] == 'LSTM':
+                x = lstm_forward(
+                    x, self.arrays[f'{i}_kernel'], self.arrays[f'{i}_recurrent'], self.arrays[f'{i}_bias'],
+                    activation=act,
+                    recurrent_activation=ACTIVATIONS[spec['recurrent_activation']],
+                    return_sequences=spec['return_sequences'],
+                )
+            else:
+                x = act(x @ self.arrays[f'{i}_kernel'] + self.arrays[f'{i}_bias'])
+        return x
+
+    def predict(self, x, batch_size=4096, verbose=0):
+        x = np.asarray(x, dtype=self.dtype)
+        if len(x) <= batch_size:
+            return self._forward(x)
+        # Büyük girdilerde bellek sınırlı kalsın diye parça parça
+        return np.concatenate([self._forward(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
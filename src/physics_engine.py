@@ -1,16 +1,68 @@
 import numpy as np
 
+# Standart atmosfer: her 100 m yükselişte 0.65°C soğuma
+LAPSE_RATE = 0.65
+
+# Don risk sınıfları (classify_frost çıktısı)
+FROST_SAFE = 0      # Güvenli
+FROST_BORDER = 1    # Sınırda (0 < T <= 2°C)
+FROST_WHITE = 2     # Beyaz Don (Kırağı): T <= 0 ve T <= çiğ noktası
+FROST_BLACK = 3     # Siyah Don: T <= 0 ama hava kuru, kırağı oluşmadan bitki donar
+FROST_LABELS = {
+    FROST_SAFE: 'guvenli',
+    FROST_BORDER: 'sinirda',
+    FROST_WHITE: 'beyaz_don',
+    FROST_BLACK: 'siyah_don',
+}
+
 def calculate_dew_point(temp, humidity):
-    '''Magnus-Tetens Formülü ile Çiğ Noktası Hesabı'''
+    '''Magnus-Tetens Formülü ile Çiğ Noktası Hesabı (skaler ya da dizi, broadcast edilir)'''
     A = 17.27
     B = 237.7
-    humidity = max(humidity, 1.0) 
+    humidity = np.maximum(humidity, 1.0)
     alpha = ((A * temp) / (B + temp)) + np.log(humidity / 100.0)
     dew_point = (B * alpha) / (A - alpha)
     return dew_point
 
 def apply_lapse_rate(base_temp, base_altitude, target_altitude):
-    '''Rakım farkına göre sıcaklık düzeltmesi'''
+    '''Rakım farkına göre sıcaklık düzeltmesi (skaler ya da dizi, broadcast edilir)'''
     diff = target_altitude - base_altitude
-    correction = (diff / 100.0) * 0.65
+    correction = (diff / 100.0) * LAPSE_RATE
     return base_temp - correction
+
+def classify_frost(farm_temp, dew_point, border=2.0):
+    '''
+    Sıcaklık/çiğ noktası ızgarasından risk sınıfı ızgarası (FROST_* kodları, int8).
+    Skaler girişte 0-boyutlu dizi döner; int() ile sayıya çevrilebilir.
+    '''
+    farm_temp = np.asarray(farm_temp)
+    dew_point = np.asarray(dew_point)
+    freezing = farm_temp <= 0
+    return np.select(
+        [freezing & (farm_temp <= dew_point), freezing, farm_temp <= border],
+        [FROST_WHITE, FROST_BLACK, FROST_BORDER],
+        default=FROST_SAFE,
+    ).astype(np.int8)
+
+def field_conditions(station_temps, station_altitude, field_altitudes, humidity, safety_margin=0.0):
+    '''
+    (N gün) istasyon tahmini + (M tarla) rakım vektörü -> (N x M) tarla sıcaklığı,
+    çiğ noktası ve don sınıfı ızgaraları. Python döngüsü yok, her şey broadcast.
+    humidity: skaler, (N,) gün başına ya da (N, M). safety_margin: skaler ya da (M,) tarla başına.
+    '''
+    station_temps = np.asarray(station_temps, dtype='float64')
+    field_altitudes = np.asarray(field_altitudes, dtype='float64')[np.newaxis, :]
+    safety_margin = np.asarray(safety_margin, dtype='float64')
+    humidity = np.asarray(humidity, dtype='float64')
+    if station_temps.ndim == 1:
+        station_temps = station_temps[:, np.newaxis]
+    if humidity.ndim == 1:
+        humidity = humidity[:, np.newaxis]
+
+    farm_temps = apply_lapse_rate(station_temps - safety_margin, station_altitude, field_altitudes)
+    dew_points = calculate_dew_point(farm_temps, humidity)
+    return {
+        'farm_temp': farm_temps,
+        'dew_point': dew_points,
+        'risk': classify_frost(farm_temps, dew_points),
+    }
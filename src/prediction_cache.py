@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from src.weather_store import point_key
+from src.instrumentation import stage, count
+
+# --- AYARLAR ---
+# Boş bırakılırsa (AGROFROST_PREDICTION_CACHE=) önbellek kapalı, her şey yeniden hesaplanır
+DEFAULT_CACHE_PATH = os.environ.get('AGROFROST_PREDICTION_CACHE', 'data/cache/predictions.sqlite')
+MEMORY_ITEMS = 50_000      # Bellek katmanında en fazla bu kadar tahmin (LRU)
+DISK_MAX_ROWS = 2_000_000  # Diskte bunu aşınca en eski tahminler silinir
+DISK_EVICT_TO = 0.9        # Silme bu orana kadar yapılır: sıralı silme (tablo taraması) her yazımda değil, arada bir
+DISK_RECOUNT_EVERY = 1000  # Satır sayacı bu kadar yazımda bir diskten yeniden sayılır (diğer süreçlerin eklediği satırlar)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS predictions (
+    station TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    window_hash TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    vals BLOB NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (station, target_date, model)
+)
+'''
+
+
+def window_hashes(windows):
+    '''
+    Her girdi penceresinin kısa özeti. Anahtar (istasyon, tarih, model) aynı kalsa da
+    geçmiş veri düzeltilmişse (geç yayınlanan gözlem) özet değişir ve tahmin yeniden hesaplanır.
+    '''
+    windows = np.ascontiguousarray(windows, dtype='float32')
+    return [hashlib.blake2b(w.tobytes(), digest_size=8).hexdigest() for w in windows]
+
+
+class PredictionCache:
+    '''
+    (istasyon, hedef gün, model parmak izi) -> tahmin ufku (°C).
+    Bellekte LRU, diskte SQLite. Yeni eğitilen modelin parmak izi farklı olduğu için
+    eski tahminler kendiliğinden kullanılmaz olur (ayrıca silmeye gerek yok).
+    '''
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_items=MEMORY_ITEMS, disk_max_rows=DISK_MAX_ROWS):
+        self.path = path
+        self.memory_items = memory_items
+        self.disk_max_rows = disk_max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Streamlit / servis thread'lerinden de kullanılır; erişim kilitle sıraya konur
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        # Her yazımda COUNT(*) (tam tablo taraması) yerine sayaç: bir kez sayılır, ekleme/silmeyle güncellenir
+        self._disk_rows = self._count_rows()
+        self._puts = 0
+
+    # --- Bellek katmanı ---
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- Toplu okuma / yazma ---
+    def get_many(self, station, model, target_dates, hashes):
+        '''
+        Tarih listesi için önbellekteki tahminler: {sıra: (horizon,) dizi}.
+        Pencere özeti tutmayan kayıtlar ıskalama sayılır.
+        '''
+        found, missing = {}, []
+        with self._lock:
+            for i, (day, digest) in enumerate(zip(target_dates, hashes)):
+                cached = self._memory.get((station, day, model))
+                if cached is not None and cached[0] == digest:
+                    self._memory.move_to_end((station, day, model))
+                    found[i] = cached[1]
+                else:
+                    missing.append(i)
+
+            if missing:
+                # Tek aralık sorgusu (binlerce IN parametresi yerine)
+                days = [target_dates[i] for i in missing]
+                rows = self._db.execute(
+                    'SELECT target_date, window_hash, vals FROM predictions '
+                    'WHERE station = ? AND model = ? AND target_date BETWEEN ? AND ?',
+                    (station, model, min(days), max(days))).fetchall()
+                on_disk = {day: (digest, np.frombuffer(blob, dtype='float64')) for day, digest, blob in rows}
+                for i in missing:
+                    cached = on_disk.get(target_dates[i])
+                    if cached is not None and cached[0] == hashes[i]:
+                        found[i] = cached[1]
+                        self._remember((station, target_dates[i], model), cached)
+
+            self.hits += len(found)
+            self.misses += len(target_dates) - len(found)
+        return found
+
+    def put_many(self, station, model, target_dates, hashes, values):
+        values = np.asarray(values, dtype='float64')
+        created_at = datetime.now().isoformat(timespec='seconds')
+        rows = [(station, day, model, digest, values.shape[1], row.tobytes(), created_at)
+                for day, digest, row in zip(target_dates, hashes, values)]
+        with self._lock:
+            added = self._count_new(station, model, target_dates)
+            self._db.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            for day, digest, row in zip(target_dates, hashes, values):
+                self._remember((station, day, model), (digest, row.copy()))
+            self._puts += 1
+            self._disk_rows = self._count_rows() if self._puts % DISK_RECOUNT_EVERY == 0 else self._disk_rows + added
+            self._evict_disk()
+            self._db.commit()
+
+    def _count_rows(self):
+        return self._db.execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+
+    def _count_new(self, station, model, target_dates):
+        '''Yazılacak tarihlerden diskte henüz olmayanlar (REPLACE edilenler sayacı artırmaz); birincil anahtar aralığı'''
+        days = set(target_dates)
+        if not days:
+            return 0
+        rows = self._db.execute(
+            'SELECT target_date FROM predictions WHERE station = ? AND model = ? AND target_date BETWEEN ? AND ?',
+            (station, model, min(days), max(days))).fetchall()
+        return len(days - {day for (day,) in rows})
+
+    def _evict_disk(self):
+        if self._disk_rows > self.disk_max_rows:
+            deleted = self._db.execute(
+                'DELETE FROM predictions WHERE rowid IN '
+                '(SELECT rowid FROM predictions ORDER BY created_at LIMIT ?)',
+                (self._disk_rows - int(self.disk_max_rows * DISK_EVICT_TO),)).rowcount
+            self._disk_rows -= deleted
+
+    def stats(self):
+        with self._lock:
+            rows = self._count_rows()
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 4) if total else None,
+                'memory_items': len(self._memory), 'disk_rows': rows}
+
+
+def cached_predict_horizon(bundle, cache, station, target_dates, windows, batch_size=4096):
+    '''
+    bundle.predict_horizon ile aynı (N, horizon) çıktı; önbellekte olmayan pencereler
+    tek batch'te çalıştırılıp yazılır. cache None ise doğrudan modeli çalıştırır.
+    '''
+    if cache is None or len(windows) == 0:
+        return bundle.predict_horizon(windows, batch_size=batch_size)
+
+    target_dates = [str(pd.Timestamp(day).date()) for day in target_dates]
+    hashes = window_hashes(windows)
+    model = bundle.fingerprint
+
+    with stage('cache_lookup', windows=len(windows)) as lookup_stage:
+        found = cache.get_many(station, model, target_dates, hashes)
+        lookup_stage['hits'] = len(found)
+
+    result = np.empty((len(windows), bundle.horizon), dtype='float64')
+    for i, values in found.items():
+        result[i] = values
+
+    missing = np.array([i for i in range(len(windows)) if i not in found], dtype='int64')
+    count(cache_hits=len(found), cache_misses=len(missing))
+    if len(missing):
+        predictions = bundle.predict_horizon(np.asarray(windows)[missing], batch_size=batch_size)
+        result[missing] = predictions
+        cache.put_many(station, model, [target_dates[i] for i in missing], [hashes[i] for i in missing], predictions)
+    return result
+
+
+def cached_outlook(bundle, df, lat, lon, cache=None):
+    '''bundle.predict_outlook'un önbellekli hali: DataFrame'in son penceresi, hedef = son gün + 1'''
+    cache = cache if cache is not None else get_prediction_cache()
+    values = df[bundle.features].values[-bundle.window_size:]
+    if len(values) < bundle.window_size:
+        raise ValueError(f"❌ Tahmin için en az {bundle.window_size} günlük veri gerekli (gelen: {len(values)}).")
+    window = bundle.transform(values)[np.newaxis, :, :]
+    target = df.index[-1] + timedelta(days=1)
+    return cached_predict_horizon(bundle, cache, point_key(lat, lon), [target], window)[0]
+
+
+_default_cache = None
+
+
+def get_prediction_cache():
+    '''Süreç genelinde paylaşılan önbellek; AGROFROST_PREDICTION_CACHE boşsa None (kapalı)'''
+    global _default_cache
+    if not DEFAULT_CACHE_PATH:
+        return None
+    if _default_cache is None:
+        _default_cache = PredictionCache()
+    return _default_cache
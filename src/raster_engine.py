@@ -0,0 +1,172 @@
+import os
+import json
+import numpy as np
+from src.physics_engine import (apply_lapse_rate, calculate_dew_point, classify_frost,
+                                FROST_LABELS, FROST_SAFE, FROST_BORDER, FROST_WHITE, FROST_BLACK)
+
+# --- AYARLAR ---
+TILE_SIZE = 1024     # Karo kenarı (hücre); 1024x1024 float32 ≈ 4 MB, ara diziler dahil birkaç on MB
+RISK_NODATA = -1     # DEM'de verisi olmayan hücrelerin risk kodu
+MAX_RENDER_PIXELS = 2000  # Harita çiziminde uzun kenar en fazla bu kadar piksel (seyreltilerek)
+
+# Harita renkleri (FROST_* sırasıyla)
+RISK_COLORS = {
+    FROST_SAFE: '#2ecc71',
+    FROST_BORDER: '#f1c40f',
+    FROST_WHITE: '#85c1e9',
+    FROST_BLACK: '#8e44ad',
+}
+
+
+class DemSource:
+    '''
+    Sayısal yükseklik modeli (DEM). Hücreler karo karo okunur, tamamı belleğe alınmaz.
+    .npy: np.load(mmap_mode='r') ile doğrudan disk sayfalarından; yanındaki `<ad>.json`
+    varsa transform (sol üst köşe + hücre boyu) ve nodata oradan okunur.
+    .tif: rasterio kuruluysa pencereli okuma (window) ile.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._dataset = None
+        ext = os.path.splitext(path)[1].lower()
+
+        if ext == '.npy':
+            self._array = np.load(path, mmap_mode='r')
+            if self._array.ndim != 2:
+                raise ValueError(f"❌ DEM 2 boyutlu olmalı: {self._array.shape}")
+            meta = {}
+            sidecar = os.path.splitext(path)[0] + '.json'
+            if os.path.exists(sidecar):
+                with open(sidecar) as f:
+                    meta = json.load(f)
+            self.shape = self._array.shape
+            self.nodata = meta.get('nodata')
+            self.transform = meta.get('transform')   # [x0, hücre_x, 0, y0, 0, -hücre_y] (GDAL sırası)
+            self.crs = meta.get('crs')
+        elif ext in ('.tif', '.tiff'):
+            try:
+                import rasterio
+            except ImportError:
+                raise ImportError("❌ GeoTIFF için rasterio gerekli (pip install rasterio) ya da DEM'i .npy olarak verin.")
+            self._dataset = rasterio.open(path)
+            self.shape = (self._dataset.height, self._dataset.width)
+            self.nodata = self._dataset.nodata
+            self.transform = list(self._dataset.transform.to_gdal())
+            self.crs = self._dataset.crs.to_string() if self._dataset.crs else None
+        else:
+            raise ValueError(f"❌ Desteklenmeyen DEM formatı: {ext} (.npy, .tif)")
+
+    @property
+    def cell_area_km2(self):
+        '''Hücre alanı (projeksiyonlu, metre cinsinden transform varsayılır); bilinmiyorsa None'''
+        if not self.transform:
+            return None
+        return abs(self.transform[1] * self.transform[5]) / 1e6
+
+    def read(self, rows, cols):
+        '''Bir karo: (rows, cols) dilimleri -> float32 rakım, nodata hücreleri NaN'''
+        if self._dataset is not None:
+            from rasterio.windows import Window
+            window = Window(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)
+            tile = self._dataset.read(1, window=window).astype('float32')
+        else:
+            # Sadece bu karonun sayfaları diskten okunur
+            tile = np.asarray(self._array[rows, cols], dtype='float32')
+        if self.nodata is not None:
+            tile[tile == self.nodata] = np.nan
+        return tile
+
+    def close(self):
+        if self._dataset is not None:
+            self._dataset.close()
+
+
+def iter_tiles(shape, tile_size=TILE_SIZE):
+    '''Raster'ı (satır dilimi, sütun dilimi) karolarına böler'''
+    height, width = shape
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield slice(row, min(row + tile_size, height)), slice(col, min(col + tile_size, width))
+
+
+def risk_tile(altitudes, station_temp, station_altitude, humidity, safety_margin=0.0):
+    '''Bir karo rakım -> int8 risk kodları (fizik motoru, tamamen vektörel); NaN hücreler RISK_NODATA'''
+    farm_temp = apply_lapse_rate(np.float32(station_temp - safety_margin), np.float32(station_altitude), altitudes)
+    dew_point = calculate_dew_point(farm_temp, np.float32(humidity))
+    risk = classify_frost(farm_temp, dew_point)
+    risk[np.isnan(altitudes)] = RISK_NODATA
+    return risk
+
+
+def build_risk_raster(dem, out_path, station_temp, station_altitude, humidity, safety_margin=0.0,
+                      tile_size=TILE_SIZE):
+    '''
+    DEM'in her hücresi için don riski. Çıktı int8 .npy (open_memmap: disk üzerinde, RAM'de değil)
+    + `<ad>.json` (transform, sınıf etiketleri, forecast parametreleri).
+    Bellek kullanımı DEM boyutundan bağımsız, karo boyutu kadardır.
+    Dönen: sınıf başına hücre sayısı (ve alan biliniyorsa km²).
+    '''
+    folder = os.path.dirname(out_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    risk = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.int8, shape=dem.shape)
+
+    counts = np.zeros(len(FROST_LABELS) + 1, dtype=np.int64)  # son eleman: nodata
+    for rows, cols in iter_tiles(dem.shape, tile_size):
+        tile = risk_tile(dem.read(rows, cols), station_temp, station_altitude, humidity, safety_margin)
+        risk[rows, cols] = tile
+        counts += np.bincount(tile.ravel() % len(counts), minlength=len(counts))
+    risk.flush()
+    del risk
+
+    summary = {FROST_LABELS[code]: int(counts[code]) for code in FROST_LABELS}
+    summary['nodata'] = int(counts[-1])
+    cell_area = dem.cell_area_km2
+    meta = {
+        'shape': list(dem.shape),
+        'transform': dem.transform,
+        'crs': dem.crs,
+        'nodata': RISK_NODATA,
+        'classes': {str(code): label for code, label in FROST_LABELS.items()},
+        'station_temp': float(station_temp),
+        'station_altitude': float(station_altitude),
+        'humidity': float(humidity),
+        'safety_margin': float(safety_margin),
+        'cells': summary,
+        'area_km2': {label: round(n * cell_area, 2) for label, n in summary.items()} if cell_area else None,
+    }
+    with open(os.path.splitext(out_path)[0] + '.json', 'w') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    return meta
+
+
+def render_risk_map(risk_path, png_path, title=None, max_pixels=MAX_RENDER_PIXELS):
+    '''
+    Risk raster'ından PNG harita. Büyük raster'lar adım adım seyreltilir (strided görünüm, kopya yok),
+    böylece il ölçeğinde bile çizim sadece birkaç milyon hücre görür.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap, BoundaryNorm
+    from matplotlib.patches import Patch
+
+    risk = np.load(risk_path, mmap_mode='r')
+    step = max(1, int(np.ceil(max(risk.shape) / max_pixels)))
+    preview = np.ma.masked_equal(np.asarray(risk[::step, ::step]), RISK_NODATA)
+
+    codes = sorted(RISK_COLORS)
+    cmap = ListedColormap([RISK_COLORS[code] for code in codes])
+    norm = BoundaryNorm(np.arange(len(codes) + 1) - 0.5, cmap.N)
+
+    fig, ax = plt.subplots(figsize=(10, 10 * preview.shape[0] / max(preview.shape[1], 1) + 1))
+    ax.imshow(preview, cmap=cmap, norm=norm, interpolation='nearest')
+    ax.set_axis_off()
+    ax.set_title(title or "AgroFrost Don Risk Haritası", fontsize=14)
+    ax.legend(handles=[Patch(color=RISK_COLORS[code], label=FROST_LABELS[code]) for code in codes],
+              loc='lower right', framealpha=0.9)
+    fig.tight_layout()
+    fig.savefig(png_path, dpi=120)
+    plt.close(fig)
+    return png_path
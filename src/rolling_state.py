@@ -0,0 +1,185 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from src.weather_store import point_key, get_store, FEATURES
+from src.instrumentation import stage
+from src.prediction_cache import get_prediction_cache, window_hashes
+
+# --- AYARLAR ---
+STATE_DIR = os.environ.get('AGROFROST_STATE_DIR', 'data/state')
+# Durum bu kadar günden eskiyse pencere baştan kurulur (küçük boşluklar sadece eksik günlerle kapatılır)
+MAX_GAP_DAYS = 30
+
+
+class StationState:
+    '''
+    Bir istasyonun son `window_size` günü: ham değerler, ölçekli hali ve tarihleri.
+    Her gece sadece yeni gün(ler) eklenir ve sadece onlar ölçeklenir.
+    '''
+
+    def __init__(self, dates, raw, scaled, meta):
+        self.dates = dates      # (W,) datetime64[D]
+        self.raw = raw          # (W, F) float64, özellik sırası paketteki gibi
+        self.scaled = scaled    # (W, F) float32, modele giden pencere
+        self.meta = meta        # lat, lon, bundle sürümü, özellikler
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1])
+
+    def last_row(self):
+        '''Son gözlem günü (predict.py'nin eski df.iloc[-1] çıktısı ile aynı biçim)'''
+        return pd.Series(self.raw[-1], index=self.meta['features'], name=self.last_date)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, dates=self.dates, raw=self.raw, scaled=self.scaled, meta=json.dumps(self.meta))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(data['dates'], data['raw'], data['scaled'], json.loads(str(data['meta'])))
+
+
+class RollingForecaster:
+    '''
+    Kalıcı kayan pencere ile gecelik tahmin.
+    İlk çalıştırmada pencere yerel depodan kurulur; sonraki çalıştırmalarda istasyon başına
+    sadece son durumdan bu yana eksik günler (genelde tek gün) kaynaktan istenir.
+    '''
+
+    def __init__(self, bundle, store=None, state_dir=STATE_DIR, cache='default'):
+        self.bundle = bundle
+        self.store = store or get_store()
+        self.state_dir = state_dir
+        self.cache = get_prediction_cache() if cache == 'default' else cache
+
+    def _path(self, lat, lon):
+        return os.path.join(self.state_dir, f"{point_key(lat, lon)}.npz")
+
+    def _compatible(self, state, lat, lon):
+        meta = state.meta
+        return (meta.get('bundle_version') == self.bundle.version
+                and meta.get('features') == self.bundle.features
+                and len(state.dates) == self.bundle.window_size
+                and meta.get('key') == point_key(lat, lon))
+
+    def _bootstrap(self, lat, lon, today):
+        '''Pencereyi sıfırdan kurar (ilk çalıştırma, model değişikliği ya da uzun boşluk)'''
+        window_size = self.bundle.window_size
+        df = self.store.daily(lat, lon, today - timedelta(days=2 * window_size), today,
+                              columns=self.bundle.features)
+        if len(df) < window_size:
+            raise ValueError(f"❌ {lat}, {lon}: pencere için en az {window_size} gün gerekli (gelen: {len(df)}).")
+        df = df.iloc[-window_size:]
+        meta = {'key': point_key(lat, lon), 'lat': lat, 'lon': lon,
+                'bundle_version': self.bundle.version, 'features': self.bundle.features}
+        return StationState(df.index.values.astype('datetime64[D]'), df.values.astype('float64'),
+                            self.bundle.transform(df.values).astype('float32'), meta)
+
+    def _append(self, state, new_rows):
+        '''
+        Yeni günleri pencereye ekler. Aradaki eksik günler depodaki gibi doğrusal interpolasyonla
+        doldurulur; sadece yeni satırlar ölçeklenir, pencere kaydırılır.
+        '''
+        window_size = self.bundle.window_size
+        history = pd.DataFrame(state.raw, index=pd.DatetimeIndex(state.dates), columns=state.meta['features'])
+        combined = pd.concat([history, new_rows[state.meta['features']]])
+        combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+        combined = combined.asfreq('D').interpolate(method='linear')
+
+        added = combined.loc[combined.index > state.last_date]
+        raw = np.concatenate([state.raw, added.values])[-window_size:]
+        scaled = np.concatenate([state.scaled, self.bundle.transform(added.values).astype('float32')])[-window_size:]
+        dates = np.concatenate([state.dates, added.index.values.astype('datetime64[D]')])[-window_size:]
+        return StationState(dates, raw, scaled, state.meta)
+
+    def update(self, lat, lon, today=None):
+        '''İstasyon durumunu bugüne getirir; dönen: (durum, çekilen gün sayısı)'''
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        path = self._path(lat, lon)
+        state = StationState.load(path)
+
+        if state is None or not self._compatible(state, lat, lon) \
+                or (today - state.last_date).days > MAX_GAP_DAYS:
+            with stage('bootstrap'):
+                state = self._bootstrap(lat, lon, today)
+            state.save(path)
+            return state, len(state.dates)
+
+        if state.last_date >= today:
+            return state, 0
+
+        # Tek küçük istek: son durumdan bugüne kadar (boşluk varsa onu da kapsar)
+        start = state.last_date + timedelta(days=1)
+        with stage('fetch_new_days') as fetch_stage:
+            try:
+                if all(feature in FEATURES for feature in self.bundle.features):
+                    new_rows = self.store.provider.fetch(lat, lon, start, today)
+                else:
+                    # Gece özellikli model: yeni günler depo üzerinden (günlük + saatlikten gece özeti)
+                    new_rows = self.store.daily(lat, lon, start, today, columns=self.bundle.features)
+            except Exception as exc:
+                # Ağ yoksa eldeki pencereyle devam (tahmin bir gün eski veriye dayanır)
+                print(f"⚠️ {lat}, {lon}: yeni günler alınamadı ({exc}), son durum ({state.last_date.date()}) kullanılıyor.")
+                return state, 0
+            fetch_stage['rows'] = len(new_rows)
+
+        # Hedefi henüz yayınlanmamış son günler alınmaz; bir sonraki çalıştırmada tekrar sorulur
+        target = self.bundle.features[self.bundle.target_index]
+        last_valid = new_rows[target].last_valid_index() if not new_rows.empty else None
+        if last_valid is None:
+            return state, 0
+        new_rows = new_rows.loc[:last_valid]
+
+        state = self._append(state, new_rows)
+        state.save(path)
+        return state, len(new_rows)
+
+    def forecast(self, lat, lon, today=None):
+        '''Yarının istasyon tmin tahmini (°C) ve güncel durum'''
+        outlooks, states = self.outlook_many([(lat, lon)], today=today)
+        return float(outlooks[0, 0]), states[0]
+
+    def outlook(self, lat, lon, today=None):
+        '''Son gözlem gününden sonraki `horizon` günün tmin tahmini (°C) ve güncel durum'''
+        outlooks, states = self.outlook_many([(lat, lon)], today=today)
+        return outlooks[0], states[0]
+
+    def forecast_many(self, points, today=None):
+        outlooks, states = self.outlook_many(points, today)
+        return outlooks[:, 0], states
+
+    def outlook_many(self, points, today=None):
+        '''Birçok istasyon: her biri güncellenir, tüm pencereler (ve tüm ufuk) tek ileri geçişte çalışır'''
+        states = [self.update(lat, lon, today)[0] for lat, lon in points]
+        windows = np.stack([state.scaled for state in states])
+        targets = [str((state.last_date + timedelta(days=1)).date()) for state in states]
+        hashes = window_hashes(windows)
+        model = self.bundle.fingerprint
+
+        # Önbellekte olmayan istasyonlar (aynı gece ikinci çalıştırmada hiçbiri) tek geçişte
+        outlooks = np.empty((len(states), self.bundle.horizon), dtype='float64')
+        missing = []
+        for i, state in enumerate(states):
+            found = self.cache.get_many(state.meta['key'], model, [targets[i]], [hashes[i]]) if self.cache else {}
+            if found:
+                outlooks[i] = found[0]
+            else:
+                missing.append(i)
+
+        if missing:
+            with stage('predict', windows=len(missing)):
+                outlooks[missing] = self.bundle.predict_horizon(windows[missing])
+            if self.cache is not None:
+                for i in missing:
+                    self.cache.put_many(states[i].meta['key'], model, [targets[i]], [hashes[i]], outlooks[i:i + 1])
+        return outlooks, states
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# İç Anadolu referans istasyonları (yaklaşık koordinat ve rakımlar).
+# Veri Meteostat'tan bu noktalar için çekilir; Konya modelin eğitildiği referans nokta.
+STATIONS = pd.DataFrame([
+    # station,     lat,     lon,     altitude (m)
+    ('konya',      37.8714, 32.4846, 1016),
+    ('karaman',    37.1759, 33.2287, 1025),
+    ('eregli',     37.5127, 34.0467, 1044),
+    ('aksaray',    38.3687, 34.0370,  965),
+    ('nigde',      37.9667, 34.6833, 1208),
+    ('nevsehir',   38.6244, 34.7239, 1260),
+    ('kayseri',    38.7312, 35.4787, 1094),
+    ('kirsehir',   39.1425, 34.1709, 1007),
+    ('cihanbeyli', 38.6581, 32.9253,  969),
+    ('beysehir',   37.6773, 31.7253, 1141),
+    ('aksehir',    38.3575, 31.4164, 1002),
+    ('ankara',     39.9334, 32.8597,  891),
+], columns=['station', 'lat', 'lon', 'altitude'])
+
+EARTH_RADIUS_KM = 6371.0
+
+# --- AYARLAR ---
+# İstasyon listesi CSV'si (station, lat, lon, altitude); boşsa yukarıdaki yerleşik tablo
+STATIONS_PATH = os.environ.get('AGROFROST_STATIONS', '')
+K_NEIGHBORS = 3             # Bir noktanın tahmini en yakın bu kadar istasyondan birleştirilir
+IDW_POWER = 2.0             # Ters mesafe ağırlığı: w = 1 / d^p
+ELEVATION_KM_PER_M = 0.1    # Rakım farkı mesafeye eklenir: 100 m fark ~ 10 km uzaklık gibi sayılır
+MIN_DISTANCE_KM = 0.1       # İstasyonun üstündeki nokta: sonsuz ağırlık yerine bu mesafe
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    '''Büyük daire mesafesi (km), diziler broadcast edilir'''
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def unit_vectors(lats, lons):
+    '''Enlem/boylam -> birim küre üzerinde (x, y, z); küre üzerinde en yakın = 3B'de en yakın'''
+    lats, lons = np.radians(lats), np.radians(lons)
+    return np.column_stack([np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)])
+
+
+def load_stations(path=None):
+    '''İstasyon tablosu: CSV verilirse oradan (zorunlu sütunlar: station, lat, lon, altitude), yoksa STATIONS'''
+    if not path:
+        return STATIONS
+    stations = pd.read_csv(path)
+    missing = [c for c in STATIONS.columns if c not in stations.columns]
+    if missing:
+        raise ValueError(f"❌ İstasyon listesinde eksik sütun(lar): {', '.join(missing)} ({path})")
+    return stations.dropna(subset=list(STATIONS.columns)).reset_index(drop=True)
+
+
+class StationIndex:
+    '''
+    İstasyonlar üzerinde KD-ağacı (birim küre koordinatlarında).
+    Bir ya da milyonlarca koordinat tek çağrıda: en yakın k istasyon, mesafe (km) ve
+    mesafe + rakım farkına göre ters mesafe ağırlıkları. Ağaç bir kez kurulur, ağa hiç çıkılmaz.
+    '''
+
+    def __init__(self, stations=STATIONS):
+        self.stations = stations.reset_index(drop=True)
+        self.altitudes = self.stations['altitude'].values.astype('float64')
+        self.tree = cKDTree(unit_vectors(self.stations['lat'].values, self.stations['lon'].values))
+
+    def __len__(self):
+        return len(self.stations)
+
+    def query(self, lats, lons, k=K_NEIGHBORS, altitudes=None):
+        '''
+        (M,) koordinat -> (M, k) istasyon indeksi, mesafe (km), ağırlık (satır toplamı 1), yakından uzağa.
+        altitudes verilirse rakım farkı etkin mesafeye eklenir (vadideki tarla vadideki istasyona daha yakın sayılır).
+        '''
+        lats = np.atleast_1d(np.asarray(lats, dtype='float64'))
+        lons = np.atleast_1d(np.asarray(lons, dtype='float64'))
+        k = min(k, len(self))
+        # Liste halinde k: k=1'de de (M, 1) döner
+        chord, index = self.tree.query(unit_vectors(lats, lons), k=list(range(1, k + 1)))
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+        effective = distance
+        if altitudes is not None:
+            altitudes = np.atleast_1d(np.asarray(altitudes, dtype='float64'))[:, np.newaxis]
+            effective = np.hypot(distance, ELEVATION_KM_PER_M * (self.altitudes[index] - altitudes))
+        weights = np.maximum(effective, MIN_DISTANCE_KM) ** -IDW_POWER
+        return index, distance, weights / weights.sum(axis=1, keepdims=True)
+
+    def nearest(self, lats, lons):
+        '''Her koordinat için en yakın istasyonun satır indeksi ve mesafesi (km): (M,), (M,)'''
+        index, distance, _ = self.query(lats, lons, k=1)
+        return index[:, 0], distance[:, 0]
+
+
+def nearest_station(lats, lons, stations=STATIONS):
+    '''Her koordinat için en yakın istasyonun satır indeksi ve mesafesi (km): (M,), (M,)'''
+    return StationIndex(stations).nearest(lats, lons)
+
+
+_default_index = None
+
+
+def get_station_index():
+    '''Süreç genelinde paylaşılan istasyon indeksi (AGROFROST_STATIONS ayarlıysa o listeden)'''
+    global _default_index
+    if _default_index is None:
+        _default_index = StationIndex(load_stations(STATIONS_PATH))
+    return _default_index
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from src.numpy_lstm import NumpyLSTM
+from src.model_bundle import ForecastBundle, BUNDLE_FORMAT
+from src.weather_store import FEATURES
+
+
+def synthetic_daily(n_days, start='2000-01-01', seed=0, station_offset=0.0):
+    '''
+    Meteostat Daily şeklinde (time indeksli) sentetik veri: mevsimsel sıcaklık + gürültü.
+    Benchmark ve çevrimdışı denemeler için; gerçek iklim istatistiği iddiası yok.
+    '''
+    # Her sütun ayrı akıştan: aynı gün, istenen aralığın uzunluğundan bağımsız olarak aynı değeri alır
+    temp, spread_rng, rain, wet, wind = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(5))
+    index = pd.date_range(start, periods=n_days, freq='D', name='time')
+    season = -np.cos(2 * np.pi * index.dayofyear.values / 365.25)
+
+    tavg = 11.0 + 12.0 * season + station_offset + temp.normal(0, 2.5, n_days)
+    spread = np.abs(spread_rng.normal(6.5, 2.0, n_days))
+    df = pd.DataFrame({
+        'tavg': tavg,
+        'tmin': tavg - spread,
+        'tmax': tavg + spread,
+        'prcp': rain.exponential(1.0, n_days) * (wet.random(n_days) < 0.25),
+        'wspd': np.abs(wind.normal(9.0, 4.0, n_days)),
+    }, index=index)
+    return df.round(1)
+
+
+class SyntheticProvider:
+    '''WeatherStore için ağsız kaynak: her nokta için koordinattan türeyen sabit tohumlu veri'''
+
+    def fetch(self, lat, lon, start, end):
+        seed = int(abs(lat * 1000) + abs(lon * 10))
+        full = synthetic_daily((pd.Timestamp(end) - pd.Timestamp('2000-01-01')).days + 1, seed=seed)
+        return full.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+
+class SyntheticHourlyProvider:
+    '''
+    Saatlik kaynak (Meteostat Hourly sütunları: temp, dwpt, rhum, wspd): sentetik günlük veriden
+    günlük döngüyle türetilir. Minimum sabaha karşı 05:00, maksimum 15:00. Aynı saat, istenen aralıktan
+    bağımsız olarak hep aynı değeri alır (parça parça çekim tutarlı).
+    '''
+
+    def fetch(self, lat, lon, start, end):
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        # Akşam saatleri ertesi sabahın tmin'ine doğru soğur: bir gün sonrası da gerekli
+        daily = SyntheticProvider().fetch(lat, lon, start, end + pd.Timedelta(days=1))
+        index = pd.date_range(start, end + pd.Timedelta(hours=23), freq='h', name='time')
+        if daily.empty:
+            return pd.DataFrame(index=index[:0], columns=['temp', 'dwpt', 'rhum', 'wspd'])
+
+        day = index.normalize()
+        hour = index.hour.values
+        tmin = daily['tmin'].reindex(day).values
+        tmax = daily['tmax'].reindex(day).values
+        # 05:00'dan sonra tmax'a ısınma, 15:00'ten sonra ertesi sabahın tmin'ine soğuma
+        next_tmin = daily['tmin'].shift(-1).reindex(day).fillna(daily['tmin'].reindex(day)).values
+        warming = (hour >= 5) & (hour < 15)
+        phase = np.where(warming, (hour - 5) / 10.0, ((hour - 15) % 24) / 14.0)
+        curve = 0.5 - 0.5 * np.cos(np.pi * phase)
+        temp = np.where(warming, tmin + (tmax - tmin) * curve, tmax + (next_tmin - tmax) * curve)
+
+        # Çiğ noktası: gün içinde sabit, yağışlı günlerde havaya yakın
+        wet = daily['prcp'].reindex(day).values > 0
+        dwpt = tmin - 2.0 - 0.25 * (tmax - tmin) + 1.5 * wet
+        a, b = 17.27, 237.7
+        rhum = 100 * np.exp(a * dwpt / (b + dwpt) - a * temp / (b + temp))
+        # Rüzgar gece sakinleşir
+        wspd = daily['wspd'].reindex(day).values * np.where((hour >= 9) & (hour <= 18), 1.3, 0.5)
+
+        hourly = pd.DataFrame({'temp': temp, 'dwpt': dwpt, 'rhum': np.clip(rhum, 1, 100), 'wspd': wspd},
+                              index=index)
+        return hourly.loc[start:end + pd.Timedelta(hours=23)].round(1)
+
+
+def synthetic_bundle(window_size=7, units=50, seed=0, dtype='float32', horizon=1):
+    '''
+    build_lstm_model ile aynı mimaride (LSTM 50 -> LSTM 50 -> Dense H) rastgele ağırlıklı paket.
+    TensorFlow gerektirmez; hız ölçümü için doğruluk önemsizdir.
+    '''
+    rng = np.random.default_rng(seed)
+    n_features = len(FEATURES)
+
+    def init(*shape):
+        return rng.normal(0, 0.1, shape).astype(dtype)
+
+    layers = [
+        {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': True},
+        {'type': 'LSTM', 'activation': 'tanh', 'recurrent_activation': 'sigmoid', 'return_sequences': False},
+        {'type': 'Dense', 'activation': 'linear'},
+    ]
+    arrays = {
+        '0_kernel': init(n_features, 4 * units), '0_recurrent': init(units, 4 * units), '0_bias': init(4 * units),
+        '1_kernel': init(units, 4 * units), '1_recurrent': init(units, 4 * units), '1_bias': init(4 * units),
+        '2_kernel': init(units, horizon), '2_bias': init(horizon),
+    }
+
+    # Ölçekleyici: sentetik verinin kabaca aralığı
+    data_min = np.array([-20.0, -30.0, -10.0, 0.0, 0.0])
+    data_max = np.array([35.0, 25.0, 45.0, 40.0, 40.0])
+    scale = 1.0 / (data_max - data_min)
+    meta = {
+        'format': BUNDLE_FORMAT,
+        'version': 'synthetic',
+        'features': FEATURES,
+        'target': 'tmin',
+        'window_size': window_size,
+        'horizon': horizon,
+        'scaler': {'min': (-data_min * scale).tolist(), 'scale': scale.tolist()},
+    }
+    return ForecastBundle(None, meta, NumpyLSTM(layers, arrays, dtype=dtype))
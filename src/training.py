@@ -0,0 +1,215 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+from src.ai_engine import create_streaming_dataset, create_cached_dataset, build_lstm_model, ThroughputLogger
+from src.model_bundle import save_bundle, read_bundle_meta, MODEL_FILE
+from src.instrumentation import stage, count
+
+# Varsayılan eğitim ayarları (main.py'deki orijinal değerler)
+DEFAULT_PARAMS = {
+    'window_size': 7,
+    'epochs': 20,
+    'batch_size': 32,
+    'validation_split': 0.1,
+    'streaming': False,
+    'horizon': 1,      # Tek geçişte tahmin edilen gün sayısı (1: sadece yarın)
+    'learning_rate': 0.001,
+    'lr_schedule': None,   # None | 'plateau' (val_loss durunca yarıya) | 'cosine' (epoch'lar boyunca azalan)
+    'patience': 0,         # > 0: val_loss bu kadar epoch iyileşmezse erken durdur, en iyi ağırlıklar kalır
+    'threads': None,       # TensorFlow CPU thread sayısı (None: TensorFlow karar verir)
+}
+
+# Hızlı eğitim: büyük batch + yüksek başlangıç öğrenme oranı + erken durdurma.
+# `epochs` sadece üst sınır; genelde val_loss 15-25. epoch civarında durur.
+FAST_PARAMS = {
+    'epochs': 60,
+    'batch_size': 256,
+    'learning_rate': 0.003,
+    'lr_schedule': 'plateau',
+    'patience': 6,
+}
+
+# Checkpoint kökü; her eğitim (veri + ayar parmak izi) kendi alt klasörüne yazar
+CHECKPOINT_DIR = 'models/checkpoints'
+BEST_WEIGHTS = 'best.weights.h5'
+HISTORY_FILE = 'history.jsonl'
+
+
+def configure_threads(n_threads):
+    '''TensorFlow CPU thread sayısı; TensorFlow ilk işlemi çalıştırdıktan sonra değiştirilemez'''
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(min(2, n_threads))
+    except RuntimeError:
+        print(f"⚠️ TensorFlow zaten başlatılmış, thread sayısı ({n_threads}) uygulanamadı.")
+
+
+def limit_threads(n_threads):
+    '''İşçi süreç başlatıcısı: TensorFlow import edilmeden önce thread sayılarını sabitler'''
+    for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[var] = str(n_threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_fingerprint(df, params):
+    '''Aynı veri + aynı ayarlar = aynı checkpoint klasörü (yarıda kalan eğitim oradan devam eder)'''
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(str(list(df.columns)).encode())
+    digest.update(df.index.values.tobytes())
+    digest.update(np.ascontiguousarray(df.values).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def read_history(run_dir):
+    path = os.path.join(run_dir, HISTORY_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def make_callbacks(params, run_dir, monitor, n_train, verbose):
+    '''Erken durdurma, öğrenme oranı takvimi, checkpoint/devam ve epoch ölçümleri'''
+    from tensorflow.keras.callbacks import BackupAndRestore, EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
+
+    callbacks = []
+    history_path = None
+    if run_dir:
+        # Her epoch sonunda model + optimizer durumu; kesilirse sonraki çalıştırma kaldığı epoch'tan sürer
+        callbacks.append(BackupAndRestore(os.path.join(run_dir, 'backup')))
+        # En iyi ağırlıklar ayrı dosyada: devam eden eğitimde önceki en iyi değerin altına inilmedikçe ezilmez
+        previous = [epoch[monitor] for epoch in read_history(run_dir) if monitor in epoch]
+        callbacks.append(ModelCheckpoint(os.path.join(run_dir, BEST_WEIGHTS), monitor=monitor,
+                                         save_best_only=True, save_weights_only=True,
+                                         initial_value_threshold=min(previous) if previous else None))
+        history_path = os.path.join(run_dir, HISTORY_FILE)
+
+    if params['patience'] > 0:
+        callbacks.append(EarlyStopping(monitor=monitor, patience=params['patience'],
+                                       restore_best_weights=not run_dir, verbose=verbose))
+    if params['lr_schedule'] == 'plateau':
+        callbacks.append(ReduceLROnPlateau(monitor=monitor, factor=0.5, patience=max(1, params['patience'] // 2),
+                                           min_lr=1e-5, verbose=verbose))
+
+    def append_history(record):
+        with open(history_path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    logger = ThroughputLogger(n_train, on_epoch=append_history if history_path else None, verbose=verbose)
+    callbacks.append(logger)
+    return callbacks, logger
+
+
+def train_bundle(df, bundle_path, params=None, version=None, verbose=1, checkpoint_dir=None, init_bundle=None):
+    '''
+    Tek seri için: scaler fit + pencereleme + LSTM eğitimi + model paketi kaydı.
+    checkpoint_dir verilirse her epoch kaydedilir ve aynı veri/ayarlarla tekrar çağrıldığında kaldığı yerden sürer.
+    init_bundle verilirse (ince ayar) eğitim o paketin ağırlıklarından başlar ve scaler'ı yeniden fit edilmez.
+    Dönen sözlük: eğitim özeti (pencere sayısı, loss / val_loss, epoch süresi, örnek/sn).
+    '''
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    window_size = params['window_size']
+    horizon = params['horizon']
+    batch_size = params['batch_size']
+    if params['lr_schedule'] not in (None, 'plateau', 'cosine'):
+        raise ValueError(f"❌ Bilinmeyen öğrenme oranı takvimi: {params['lr_schedule']}")
+    if params['threads']:
+        configure_threads(params['threads'])
+
+    # Ön İşleme
+    with stage('scale', rows=len(df)):
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        if init_bundle:
+            # Başlangıç ağırlıkları bu ölçeğe göre öğrenildi: min/max iki satırlık "veriden" aynen kurulur
+            meta = read_bundle_meta(init_bundle)
+            if list(meta['features']) != list(df.columns):
+                raise ValueError(f"❌ Başlangıç paketinin özellikleri farklı: {meta['features']}")
+            scaler.fit(np.array([meta['scaler']['data_min'], meta['scaler']['data_max']]))
+            scaled_data = scaler.transform(df.values)
+        else:
+            scaled_data = scaler.fit_transform(df.values)
+
+    # Eğitim verisi akışı: bellek içi (önbellekli tf.data) ya da akış (pencereler batch batch)
+    with stage('pipeline'):
+        if params['streaming']:
+            train_ds, val_ds, n_windows = create_streaming_dataset(
+                scaled_data, window_size=window_size, batch_size=batch_size,
+                validation_split=params['validation_split'], horizon=horizon)
+        else:
+            train_ds, val_ds, n_windows = create_cached_dataset(
+                scaled_data, window_size=window_size, batch_size=batch_size,
+                validation_split=params['validation_split'], horizon=horizon)
+    n_train = n_windows - int(n_windows * params['validation_split'])
+    steps_per_epoch = int(np.ceil(n_train / batch_size))
+    monitor = 'val_loss' if params['validation_split'] > 0 else 'loss'
+
+    with stage('build_model'):
+        learning_rate = params['learning_rate']
+        if params['lr_schedule'] == 'cosine':
+            from tensorflow.keras.optimizers.schedules import CosineDecay
+            learning_rate = CosineDecay(learning_rate, decay_steps=params['epochs'] * steps_per_epoch, alpha=0.05)
+        model = build_lstm_model((window_size, scaled_data.shape[1]), horizon=horizon, learning_rate=learning_rate)
+        if init_bundle:
+            from tensorflow.keras.models import load_model
+            model.set_weights(load_model(os.path.join(init_bundle, MODEL_FILE), compile=False).get_weights())
+
+    run_dir = None
+    if checkpoint_dir:
+        run_dir = os.path.join(checkpoint_dir, run_fingerprint(df, {**params, 'init_bundle': init_bundle}
+                                                               if init_bundle else params))
+        os.makedirs(run_dir, exist_ok=True)
+        done = len(read_history(run_dir))
+        if done:
+            print(f"♻️ Yarıda kalan eğitim bulundu ({run_dir}): {done} epoch tamamlanmış, kaldığı yerden devam ediliyor...")
+
+    # Eğitim
+    with stage('fit', epochs=params['epochs']) as fit_stage:
+        callbacks, logger = make_callbacks(params, run_dir, monitor, n_train, verbose)
+        # Karıştırma veri akışının içinde (tf.data shuffle / üretici); fit'in ayrıca karıştırmasına gerek yok
+        model.fit(train_ds, epochs=params['epochs'], validation_data=val_ds, callbacks=callbacks,
+                  shuffle=False, verbose=verbose)
+        # Checkpoint'li eğitimde en iyi ağırlıklar diskten (kesintiden önceki epoch'lar dahil)
+        best_path = os.path.join(run_dir, BEST_WEIGHTS) if run_dir else None
+        if best_path and os.path.exists(best_path):
+            model.load_weights(best_path)
+
+        epochs = read_history(run_dir) if run_dir else logger.epochs
+        # Bu çalıştırmada ölçülen epoch'lar (devam eden eğitimde öncekiler başka süreçteydi)
+        measured = logger.epochs or epochs
+        seconds_per_epoch = float(np.mean([e['seconds'] for e in measured])) if measured else None
+        samples_per_second = float(np.mean([e['samples_per_second'] for e in measured])) if measured else None
+        fit_stage.update(windows=int(n_windows), epochs=len(epochs), samples_per_second=samples_per_second)
+    count(rows=len(df), windows=n_windows)
+
+    # Kayıt (Model + Scaler + Özellik sırası tek pakette)
+    with stage('save'):
+        save_bundle(bundle_path, model, scaler, features=df.columns, window_size=window_size,
+                    version=version, horizon=horizon)
+    # Paket yazıldı; checkpoint artık gereksiz
+    if run_dir:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    best = min(epochs, key=lambda e: e.get(monitor, np.inf)) if epochs else {}
+    if verbose and measured:
+        print(f"📈 {len(epochs)} epoch (en iyi: {best.get('epoch')}), "
+              f"ortalama {seconds_per_epoch:.2f} sn/epoch, {samples_per_second:,.0f} örnek/sn")
+
+    return {
+        'windows': int(n_windows),
+        'epochs': len(epochs),
+        'best_epoch': best.get('epoch'),
+        'stopped_early': len(epochs) < params['epochs'],
+        'loss': best.get('loss'),
+        'val_loss': best.get('val_loss'),
+        'seconds_per_epoch': round(seconds_per_epoch, 3) if seconds_per_epoch else None,
+        'samples_per_second': round(samples_per_second, 1) if samples_per_second else None,
+    }
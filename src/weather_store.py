@@ -0,0 +1,340 @@
+import io
+import os
+import json
+import tempfile
+import threading
+import contextlib
+import pandas as pd
+from datetime import datetime, timedelta
+from src.instrumentation import stage
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası kilit yok, sadece süreç içi kilit
+    fcntl = None
+
+# Modelin kullandığı sütunlar (Meteostat isimleri)
+FEATURES = ['tavg', 'tmin', 'tmax', 'prcp', 'wspd']
+
+DEFAULT_STORE_DIR = os.environ.get('AGROFROST_STORE_DIR', 'data/weather')
+DEFAULT_FIXTURE_DIR = os.environ.get('AGROFROST_FIXTURE_DIR', 'data/fixtures')
+
+# Son günler Meteostat'ta geç yayınlanabiliyor; kuyruğu en fazla bu sıklıkla yeniden soruyoruz
+TAIL_REFRESH = timedelta(hours=6)
+
+
+def point_key(lat, lon):
+    '''Depodaki anahtar: 4 ondalığa yuvarlanmış koordinat (≈10 m)'''
+    return f"{lat:.4f}_{lon:.4f}"
+
+
+def _as_day(value):
+    return pd.Timestamp(value).normalize()
+
+
+@contextlib.contextmanager
+def point_lock(folder):
+    '''
+    Bir noktanın klasörü için süreçler arası özel kilit (`.lock` üzerinde fcntl.flock).
+    Uygulama, serve.py, alarm servisi ve doğrulayıcılar aynı depoyu paylaşır: meta okuma -> birleştirme -> yazma
+    boyunca tutulur, böylece iki süreç birbirinin eklediği günleri ezmez.
+    '''
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, '.lock'), 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield  # Dosya kapanınca kilit bırakılır
+
+
+def write_atomic(path, write):
+    '''write(geçici_yol) ile benzersiz bir geçici dosyaya yazar, sonra os.replace ile yerine koyar'''
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class MeteostatProvider:
+    '''Canlı kaynak: Meteostat Daily (ağ erişimi gerekir)'''
+
+    def fetch(self, lat, lon, start, end):
+        # Import burada: çevrimdışı modda meteostat kurulu olmasa da çalışsın
+        from meteostat import Point, Daily
+        data = Daily(Point(lat, lon), start.to_pydatetime(), end.to_pydatetime())
+        return data.fetch()
+
+
+class FixtureProvider:
+    '''Çevrimdışı kaynak: `<fixture_dir>/<anahtar>.csv` (Meteostat formatında, `time` sütunlu)'''
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+
+    def fetch(self, lat, lon, start, end):
+        path = os.path.join(self.fixture_dir, f"{point_key(lat, lon)}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        df = pd.read_csv(path, index_col='time', parse_dates=['time'])
+        return df.loc[start:end]
+
+
+class HttpProvider:
+    '''
+    HTTP kaynağı: `<base_url>/daily?lat=..&lon=..&start=..&end=..` -> CSV (`time` sütunlu).
+    Tek requests.Session: bağlantılar (keep-alive) istekler ve thread'ler arasında yeniden kullanılır.
+    Havuz eşzamanlılık kadar açılır; AsyncFetcher kendi eşzamanlılığıyla resize() çağırır.
+    '''
+
+    def __init__(self, base_url, concurrency=8, timeout=30):  # concurrency: async_fetch.CONCURRENCY ile aynı
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.concurrency = None
+        self.resize(concurrency)
+
+    def resize(self, concurrency):
+        '''Bağlantı havuzunu eşzamanlı istek sayısına ayarlar (azsa fazla bağlantılar kapatılıp yeniden açılır)'''
+        from requests.adapters import HTTPAdapter
+        if concurrency == self.concurrency:
+            return
+        self.concurrency = concurrency
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, lat, lon, start, end):
+        params = {'lat': lat, 'lon': lon, 'start': str(start.date()), 'end': str(end.date())}
+        response = self.session.get(f"{self.base_url}/daily", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        if not response.text.strip():
+            return pd.DataFrame()
+        return pd.read_csv(io.StringIO(response.text), index_col='time', parse_dates=['time'])
+
+
+class WeatherStore:
+    '''
+    Meteostat günlük verisi için yerel Parquet deposu.
+    Her nokta için ham veri + interpolate edilmiş veri tutulur, sadece eksik günler çekilir.
+    '''
+
+    def __init__(self, root=DEFAULT_STORE_DIR, provider=None, offline=False, nightly=None):
+        self.root = root
+        self.offline = offline
+        # Gece özellikleri (src/hourly.py) istenirse kullanılan depo; verilmezse süreç geneli
+        self.nightly = nightly
+        if provider is None:
+            provider = FixtureProvider() if offline else MeteostatProvider()
+        self.provider = provider
+        self._frames = {}  # anahtar -> (meta.json mtime, interpolate edilmiş DataFrame) (süreç içi önbellek)
+        self._lock = threading.Lock()
+
+    # --- Dosya yolları ---
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _read_meta(self, key):
+        path = os.path.join(self._dir(key), 'meta.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _read_raw(self, key):
+        path = os.path.join(self._dir(key), 'raw.parquet')
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def _write(self, key, raw, meta):
+        folder = self._dir(key)
+        os.makedirs(folder, exist_ok=True)
+
+        # Interpolasyon sadece burada, veri değiştiğinde bir kez yapılır
+        with stage('interpolate', rows=len(raw)):
+            daily = raw.interpolate(method='linear')
+
+        for name, frame in (('raw', raw), ('daily', daily)):
+            write_atomic(os.path.join(folder, f'{name}.parquet'), frame.to_parquet)
+
+        self._write_meta(key, meta)
+        return daily
+
+    def _write_meta(self, key, meta):
+        folder = self._dir(key)
+        os.makedirs(folder, exist_ok=True)
+        def dump(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(meta, f)
+        write_atomic(os.path.join(folder, 'meta.json'), dump)
+
+    def _stamp(self, key):
+        '''meta.json en son yazılan dosya: değiştiyse (başka süreç depoyu uzattıysa) bellekteki kopya eskidir'''
+        path = os.path.join(self._dir(key), 'meta.json')
+        return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+    def _load_daily(self, key):
+        stamp = self._stamp(key)
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        path = os.path.join(self._dir(key), 'daily.parquet')
+        if not os.path.exists(path):
+            return None
+        # memory_map: dosya sayfaları doğrudan okunur, ara kopya yok
+        daily = pd.read_parquet(path, memory_map=True)
+        self._frames[key] = (stamp, daily)
+        return daily
+
+    # --- Güncelleme ---
+    def _missing_ranges(self, meta, start, end):
+        if 'first' not in meta:
+            return [(start, end)]
+
+        ranges = []
+        first, last = pd.Timestamp(meta['first']), pd.Timestamp(meta['last'])
+        checked_from = pd.Timestamp(meta.get('checked_from', first))
+        if start < checked_from:
+            ranges.append((start, first - timedelta(days=1)))
+        if end > last:
+            checked_until = pd.Timestamp(meta.get('checked_until', last))
+            checked_at = pd.Timestamp(meta.get('checked_at', '1970-01-01'))
+            # Aynı kuyruğu kısa süre içinde tekrar tekrar sorma (rate limit)
+            if end > checked_until or datetime.now() - checked_at > TAIL_REFRESH:
+                ranges.append((last + timedelta(days=1), end))
+        return ranges
+
+    def plan(self, lat, lon, start, end):
+        '''Depoda olmayan aralıklar (ağa çıkmadan, sadece meta.json'a bakarak)'''
+        key = point_key(lat, lon)
+        with self._lock:
+            return self._missing_ranges(self._read_meta(key), _as_day(start), _as_day(end))
+
+    def update(self, lat, lon, start, end):
+        '''Depoda olmayan günleri (baş/kuyruk) kaynaktan çeker ve kaydeder'''
+        key = point_key(lat, lon)
+        start, end = _as_day(start), _as_day(end)
+
+        with self._lock, point_lock(self._dir(key)):
+            # Karar sadece küçük meta dosyasından verilir; ham veri yalnızca eksik varsa okunur.
+            # Meta kilit alındıktan sonra okunur: beklerken başka süreç depoyu uzatmış olabilir
+            meta = self._read_meta(key)
+            ranges = self._missing_ranges(meta, start, end)
+            if not ranges:
+                return key
+
+            parts = []
+            for gap_start, gap_end in ranges:
+                print(f"📡 Veri çekiliyor: {lat}, {lon} ({gap_start.date()} - {gap_end.date()})...")
+                with stage('network_fetch') as fetch_stage:
+                    fetched = self.provider.fetch(lat, lon, gap_start, gap_end)
+                    fetch_stage['rows'] = len(fetched)
+                parts.append(fetched)
+
+            self._merge(key, lat, lon, start, end, meta, parts)
+        return key
+
+    def ingest(self, lat, lon, start, end, parts):
+        '''
+        Dışarıda (örn. eşzamanlı indirici ile) çekilmiş parçaları depoya yazar.
+        [start, end] sorulan aralıktır; veri gelmeyen günler de "soruldu" olarak işaretlenir.
+        '''
+        key = point_key(lat, lon)
+        with self._lock, point_lock(self._dir(key)):
+            self._merge(key, lat, lon, _as_day(start), _as_day(end), self._read_meta(key), parts)
+        return key
+
+    def _merge(self, key, lat, lon, start, end, meta, parts):
+        parts = [part for part in parts if part is not None and not part.empty]
+        if not parts and 'first' not in meta:
+            return
+
+        # Sorduğumuz aralığı işaretle (veri gelmese bile aynı boşluğu tekrar sormayalım)
+        meta['checked_from'] = str(min(start, pd.Timestamp(meta.get('checked_from', start))).date())
+        meta['checked_until'] = str(max(end, pd.Timestamp(meta.get('checked_until', end))).date())
+        meta['checked_at'] = datetime.now().isoformat(timespec='seconds')
+        meta['lat'], meta['lon'] = lat, lon
+
+        if not parts:
+            self._write_meta(key, meta)
+            return
+
+        raw = self._read_raw(key)
+        if raw is not None:
+            parts.insert(0, raw)
+        raw = pd.concat(parts)
+        raw = raw[~raw.index.duplicated(keep='last')].sort_index()
+        raw.index.name = 'time'
+
+        meta['first'], meta['last'] = str(raw.index[0].date()), str(raw.index[-1].date())
+        daily = self._write(key, raw, meta)
+        self._frames[key] = (self._stamp(key), daily)
+
+    # --- Okuma ---
+    def daily(self, lat, lon, start, end, columns=FEATURES):
+        '''
+        [start, end] aralığındaki interpolate edilmiş günlük veriyi döner.
+        Eksik günler varsa (ve çevrimdışı değilse ya da fixture varsa) önce onları çeker.
+        '''
+        key = self.update(lat, lon, start, end)
+        daily = self._load_daily(key)
+        if daily is None or daily.empty:
+            return pd.DataFrame(columns=columns)
+
+        # Tarih dilimi: ardışık satırlar, kopya yerine görünüm döner
+        window = daily.loc[_as_day(start):_as_day(end)]
+        if columns is not None and any(column not in window.columns for column in columns):
+            window = self._with_nightly(lat, lon, start, end, window, columns)
+        return window[columns] if columns is not None else window
+
+    def _with_nightly(self, lat, lon, start, end, window, columns):
+        '''Saatlik veriden gece özelliklerini (night_tmin, night_rhum...) günlük tabloya ekler'''
+        from src.hourly import NIGHT_FEATURES, get_nightly_store
+        extra = [column for column in columns if column in NIGHT_FEATURES]
+        if not extra:
+            return window
+        if self.nightly is None:
+            self.nightly = get_nightly_store()
+        nights = self.nightly.nightly(lat, lon, start, end)
+        window = window.join(nights.reindex(columns=extra), how='left')
+        # Saatlik verisi henüz yayınlanmamış son gece(ler) bir önceki geceyle doldurulur
+        window[extra] = window[extra].ffill()
+        # Saatlik kapsam günlükten geç başlıyorsa baştaki günlerin gece özelliği yok: NaN modele gitmesin
+        covered = window[extra].notna().all(axis=1)
+        if not covered.any():
+            raise ValueError(f"❌ {lat}, {lon}: {window.index[0].date()} - {window.index[-1].date()} "
+                             f"için saatlik veri (gece özellikleri) yok.")
+        if not covered.iloc[0]:
+            first = covered.idxmax()
+            print(f"⚠️ {lat}, {lon}: saatlik veri {first.date()} tarihinde başlıyor; "
+                  f"öncesindeki {int((~covered).sum())} gün gece özellikleri olmadan kullanılamaz, atlanıyor.")
+            window = window.loc[first:]
+        return window
+
+    def recent(self, lat, lon, days, columns=FEATURES):
+        '''Bugünden geriye `days` günlük veri (canlı tahmin scriptleri için)'''
+        end = datetime.now()
+        return self.daily(lat, lon, end - timedelta(days=days), end, columns=columns)
+
+
+_default_store = None
+
+
+def get_store():
+    '''
+    Süreç genelinde paylaşılan depo.
+    AGROFROST_OFFLINE=1 ise ağa hiç çıkılmaz, eksikler fixture klasöründen okunur.
+    AGROFROST_WEATHER_URL ayarlıysa veri Meteostat yerine o HTTP kaynağından çekilir.
+    '''
+    global _default_store
+    if _default_store is None:
+        offline = os.environ.get('AGROFROST_OFFLINE', '0') == '1'
+        weather_url = os.environ.get('AGROFROST_WEATHER_URL')
+        provider = HttpProvider(weather_url) if weather_url and not offline else None
+        _default_store = WeatherStore(provider=provider, offline=offline)
+    return _default_store
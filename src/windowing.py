@@ -0,0 +1,83 @@
+import numpy as np
+
+TARGET_INDEX = 1  # tmin (FEATURES sırasında 1. indeks)
+
+
+def sliding_windows(data, window_size=7):
+    '''
+    (T, özellik) seriden (T - window_size + 1, window_size, özellik) pencere GÖRÜNÜMÜ.
+    Kopya yok: sadece stride'lar değişir, bellek T * özellik olarak kalır.
+    '''
+    data = np.asarray(data)
+    view = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=0)
+    return view.transpose(0, 2, 1)
+
+
+def windowed_views(data, window_size=7, target_index=TARGET_INDEX, horizon=1):
+    '''
+    Eğitim çiftleri (X, y) görünüm olarak: X[i] = data[i:i+w], y[i] = data[i+w, hedef].
+    horizon > 1: y[i] = data[i+w : i+w+H, hedef], (N, H); son H-1 pencerenin hedefi tam olmadığı için dışarıda.
+    '''
+    data = np.asarray(data)
+    n_windows = len(data) - window_size - horizon + 1
+    if n_windows <= 0:
+        y_shape = (0,) if horizon == 1 else (0, horizon)
+        return (np.empty((0, window_size, data.shape[1]), dtype=data.dtype),
+                np.empty(y_shape, dtype=data.dtype))
+    X = sliding_windows(data, window_size)[:n_windows]
+    if horizon == 1:
+        return X, data[window_size:, target_index]
+    return X, np.lib.stride_tricks.sliding_window_view(data[window_size:, target_index], horizon)
+
+
+class WindowedSeries:
+    '''
+    Bir ya da daha çok (istasyon) serisi üzerinde sanal pencere kümesi.
+    Pencereler sadece batch istendiğinde (batch_size kadar) kopyalanır;
+    seri sınırlarını aşan pencere üretilmez.
+    '''
+
+    def __init__(self, arrays, window_size=7, target_index=TARGET_INDEX, horizon=1):
+        if isinstance(arrays, np.ndarray):
+            arrays = [arrays]
+        self.window_size = window_size
+        self.horizon = horizon
+        self.views = [windowed_views(a, window_size, target_index, horizon) for a in arrays]
+        counts = np.array([len(y) for _, y in self.views], dtype='int64')
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.n_features = self.views[0][0].shape[2]
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def take(self, indices):
+        '''Global pencere indeksleri -> (X, y) batch kopyası'''
+        indices = np.asarray(indices, dtype='int64')
+        series = np.searchsorted(self.offsets, indices, side='right') - 1
+        X = np.empty((len(indices), self.window_size, self.n_features), dtype='float32')
+        y = np.empty((len(indices),) + self.views[0][1].shape[1:], dtype='float32')
+        for s in np.unique(series):
+            mask = series == s
+            local = indices[mask] - self.offsets[s]
+            X_view, y_view = self.views[s]
+            X[mask] = X_view[local]
+            y[mask] = y_view[local]
+        return X, y
+
+    def split(self, validation_split=0.1):
+        '''Her serinin son %validation_split kısmı doğrulama (Keras validation_split gibi, karıştırmadan)'''
+        train, val = [], []
+        for s in range(len(self.views)):
+            start, end = self.offsets[s], self.offsets[s + 1]
+            cut = end - int((end - start) * validation_split)
+            train.append(np.arange(start, cut))
+            val.append(np.arange(cut, end))
+        return np.concatenate(train), np.concatenate(val)
+
+    def batches(self, indices, batch_size=32, shuffle=False, seed=None):
+        '''İndeks kümesinden (X, y) batch üreticisi'''
+        indices = np.asarray(indices)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for i in range(0, len(indices), batch_size):
+            yield self.take(indices[i:i + batch_size])
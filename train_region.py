@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.stations import get_station_index
+from src.data_loader import fetch_many_historical
+from src.training import limit_threads
+
+# --- AYARLAR ---
+REGION_DIR = 'models/region'
+MANIFEST_PATH = os.path.join(REGION_DIR, 'manifest.json')
+START_YEAR = 2000
+END_YEAR = 2025
+THREADS_PER_WORKER = 2  # Her işçi süreç en fazla bu kadar CPU thread'i kullanır
+FETCH_CONCURRENCY = 8   # Veri indirmede aynı anda en fazla bu kadar istek
+
+CHECKPOINT_DIR = os.path.join(REGION_DIR, 'checkpoints')  # Kesilen istasyon eğitimleri buradan sürer
+
+# Bölge eğitimi hiperparametreleri (değişirse tüm istasyonlar yeniden eğitilir)
+# Hızlı mod (src/training.py FAST_PARAMS): büyük batch + erken durdurma; epochs sadece üst sınır
+PARAMS = {
+    'window_size': 7,
+    'epochs': 60,
+    'batch_size': 256,
+    'validation_split': 0.1,
+    'streaming': False,
+    'learning_rate': 0.003,
+    'lr_schedule': 'plateau',
+    'patience': 6,
+}
+
+def params_fingerprint(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+def data_fingerprint(df):
+    digest = hashlib.sha256(str(list(df.columns)).encode())
+    digest.update(df.index.values.tobytes())
+    digest.update(df.to_numpy().tobytes())
+    return digest.hexdigest()
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {'stations': {}}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    os.makedirs(REGION_DIR, exist_ok=True)
+    tmp = MANIFEST_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, MANIFEST_PATH)
+
+def train_station(station, df, bundle_path, params, version):
+    '''İşçi süreçte çalışır: tek istasyon için model paketi üretir'''
+    from src.training import train_bundle
+
+    started = time.perf_counter()
+    summary = train_bundle(df, bundle_path, params=params, version=version, verbose=0,
+                           checkpoint_dir=CHECKPOINT_DIR)
+    summary['seconds'] = round(time.perf_counter() - started, 1)
+    return station, summary
+
+def run_region_training(stations=None, workers=None, threads=THREADS_PER_WORKER, force=False):
+    print("🗺️ AgroFrost Bölgesel Eğitim Başlatılıyor...")
+    # Tahmin ve birleştirmede kullanılan liste (AGROFROST_STATIONS ayarlıysa o CSV)
+    if stations is None:
+        stations = get_station_index().stations
+    manifest = load_manifest()
+    params_hash = params_fingerprint(PARAMS)
+
+    # 1. Veri (ana süreçte; sadece eksik günler, tüm istasyonlar için eşzamanlı indirilir)
+    frames = fetch_many_historical(list(zip(stations['lat'], stations['lon'])), START_YEAR, END_YEAR,
+                                   concurrency=FETCH_CONCURRENCY)
+    jobs = []
+    for row in stations.itertuples():
+        df = frames.get((row.lat, row.lon))
+        if df is None:
+            print(f"⚠️ {row.station}: veri yok, atlanıyor.")
+            continue
+        data_hash = data_fingerprint(df)
+
+        entry = manifest['stations'].get(row.station, {})
+        unchanged = (entry.get('data_hash') == data_hash and entry.get('params_hash') == params_hash
+                     and os.path.exists(entry.get('bundle', '')))
+        if unchanged and not force:
+            print(f"⏭️ {row.station}: veri ve ayarlar değişmemiş, atlanıyor ({entry['bundle']})")
+            continue
+
+        # Sürüm = veri + ayar parmak izi: aynı girdiler aynı klasöre, yeni girdiler yeni klasöre
+        version = f"{row.station}_{data_hash[:8]}{params_hash[:4]}"
+        jobs.append((row, df, os.path.join(REGION_DIR, row.station, version), data_hash, version))
+
+    if not jobs:
+        print("✅ Tüm istasyon modelleri güncel.")
+        return manifest
+
+    # 2. Paralel Eğitim (her süreç kendi TensorFlow'u ile, thread sayısı sınırlı)
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    print(f"🧠 {len(jobs)} istasyon eğitilecek ({workers} süreç x {threads} thread)...")
+
+    # 'spawn': ana süreçteki durum (ve olası TF thread'leri) işçilere kopyalanmaz
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=limit_threads, initargs=(threads,)) as pool:
+        futures = {pool.submit(train_station, row.station, df, path, PARAMS, version): (row, path, data_hash, version)
+                   for row, df, path, data_hash, version in jobs}
+
+        for future in as_completed(futures):
+            row, path, data_hash, version = futures[future]
+            try:
+                _, summary = future.result()
+            except Exception as exc:
+                print(f"❌ {row.station}: eğitim başarısız ({exc})")
+                continue
+
+            manifest['stations'][row.station] = {
+                'bundle': path,
+                'version': version,
+                'lat': float(row.lat),
+                'lon': float(row.lon),
+                'altitude': float(row.altitude),
+                'data_hash': data_hash,
+                'params_hash': params_hash,
+                'params': PARAMS,
+                'trained_at': datetime.now().isoformat(timespec='seconds'),
+                **summary,
+            }
+            # Her biten istasyondan sonra kaydet: yarıda kesilirse biten işler kaybolmaz
+            save_manifest(manifest)
+            print(f"✅ {row.station}: {summary['seconds']} sn, {summary['epochs']} epoch, "
+                  f"{summary['samples_per_second']} örnek/sn, val_loss={summary['val_loss']}")
+
+    print(f"\n📒 Manifest: {MANIFEST_PATH}")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost istasyon başına paralel model eğitimi")
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: CPU / thread)")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_WORKER, help="Süreç başına CPU thread")
+    parser.add_argument("--stations", nargs="*", help="Sadece bu istasyonlar (örn: konya karaman)")
+    parser.add_argument("--force", action="store_true", help="Değişmemiş istasyonları da yeniden eğit")
+    args = parser.parse_args()
+
+    stations = get_station_index().stations
+    selected = stations if not args.stations else stations[stations['station'].isin(args.stations)]
+    unknown = sorted(set(args.stations or []) - set(stations['station']))
+    if unknown:
+        print(f"⚠️ İstasyon listesinde olmayanlar atlanıyor: {', '.join(unknown)}")
+    run_region_training(selected, workers=args.workers, threads=args.threads, force=args.force)
@@ -1,10 +1,14 @@
+import argparse
 import numpy as np
-import pandas as pd
-from datetime import timedelta, datetime
-from meteostat import Point, Daily
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
-from src.physics_engine import apply_lapse_rate
+from datetime import datetime
+from src.backtest import run_backtest
+from src.model_bundle import load_bundle
+from src.weather_store import get_store, point_key
+from src.prediction_cache import get_prediction_cache
+from src.event_store import get_event_store
+from src.instrumentation import track_run, stage
+from src.evaluation import (caught_frosts, consensus_frosts, missed_frosts,
+                            render_events, confusion_summary, threshold_sweep, format_rate, NO_RATE)
 
 # --- AYARLAR ---
 LAT = 37.8714
@@ -14,76 +18,159 @@ TEST_FARM_ALT = 1250 # Test Tarlası (Biraz daha yüksekte)
 START_DATE = datetime(2000, 1, 1) # Son 1-2 yılı test edelim
 END_DATE = datetime(2024, 12, 31)
 
-def run_validation_test():
-    print("🕵️‍♂️ AgroFrost Dedektifi Geçmiş Kayıtları İnceliyor...")
-    
-    # 1. Gerçek Verileri Çek
-    location = Point(LAT, LON)
-    data = Daily(location, START_DATE, END_DATE)
-    df = data.fetch()
-    df = df.interpolate(method='linear')
-    
-    # 2. Modeli Hazırla
-    model = load_model('models/konya_lstm_v1.h5')
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    
-    # Tüm veriyi ölçeklendir (Scaler'ı eğitmek için)
-    scaled_data = scaler.fit_transform(df[['tavg', 'tmin', 'tmax', 'prcp', 'wspd']].values)
-    
-    caught_events = [] # Yakalanan olayları buraya atacağız
-    
+# Eşik taraması ızgarası (app.py'deki safety_margin slider'ı ile aynı aralık)
+SWEEP_MARGINS = np.arange(0.0, 3.01, 0.5)
+SWEEP_ALTITUDES = [STATION_ALT, 1100, 1250, 1400, 1600]
+SWEEP_THRESHOLDS = [0.0, -1.0, -2.0]
+
+def load_backtest(start_date=START_DATE, end_date=END_DATE):
+    '''Veriyi bir kez çeker, modeli bir kez çalıştırır; tüm raporlar bu tabloyu kullanır'''
+    # 1. Modeli Hazırla (Scaler eğitimdeki haliyle paketten gelir)
+    with stage('load_bundle'):
+        bundle = load_bundle()
+
+    # 2. Gerçek Verileri Çek (gece özellikli modelde saatlik veriden gece özetleri de)
+    with stage('fetch') as fetch_stage:
+        df = get_store().daily(LAT, LON, start_date, end_date, columns=bundle.features)
+        fetch_stage['rows'] = len(df)
+
     print(f"Toplam {len(df)} gün taranıyor...")
-    
-    # 3. Gün Gün Gez ve Tahmin Yap
-    # İlk 7 günü atlıyoruz çünkü geçmiş veriye ihtiyacımız var
-    for i in range(7, len(df)):
-        # Girdi: Önceki 7 gün
-        input_seq = scaled_data[i-7:i]
-        input_reshaped = input_seq.reshape(1, 7, 5)
-        
-        # Tahmin (Model ne dedi?)
-        pred_scaled = model.predict(input_reshaped, verbose=0)
-        
-        # Ölçeği geri çevir
-        dummy = np.zeros((1, 5))
-        dummy[0, 1] = pred_scaled[0, 0]
-        model_station_pred = scaler.inverse_transform(dummy)[0, 1]
-        
-        # --- GERÇEKLER VS AGROFROST ---
-        actual_station_temp = df.iloc[i]['tmin'] # O gün gerçekten ne oldu?
-        date = df.index[i].strftime('%d-%m-%Y')
-        
-        # Fizik Motorunu Uygula (Tarlaya uyarla)
-        farm_prediction = apply_lapse_rate(model_station_pred, STATION_ALT, TEST_FARM_ALT)
-        
-        # --- DEDEKTİF MANTIĞI (THE CATCH) ---
-        # Kriter: İstasyon > 0.5°C (Güvenli) AMA AgroFrost < 0°C (Risk)
-        # 0.5 derece marj koydum ki sınır durumları eyleyelim, net hataları bulalım.
-        if actual_station_temp > 0.5 and farm_prediction < 0:
-            diff = actual_station_temp - farm_prediction
-            caught_events.append({
-                "Tarih": date,
-                "MGM_İstasyon (Gerçek)": f"{actual_station_temp:.1f}°C",
-                "AgroFrost_Tarla (Tahmin)": f"{farm_prediction:.1f}°C",
-                "Fark": f"{diff:.1f}°C",
-                "Durum": "⚠️ GİZLİ DON YAKALANDI"
-            })
+
+    # 3. Tüm Günler Tek Seferde (Toplu Backtest)
+    # Önbellek: aynı model + aynı girdi penceresi için daha önce hesaplanan günler tekrar çalıştırılmaz
+    with stage('backtest'):
+        results = run_backtest(df, bundle, cache=get_prediction_cache(), station=point_key(LAT, LON))
+    # Olay deposuna yazarken hangi istasyon / model olduğu buradan okunur
+    results.attrs.update(station=point_key(LAT, LON), model_version=bundle.version)
+    return results
+
+def store_events(results, category, events, altitude, safety_margin=0.0):
+    '''
+    Olayları sayısal haliyle (tarih, °C, rakım, model, çalıştırma) olay deposuna ekler.
+    CSV/konsol tablosu bu tipli kayıttan üretilir; CSV artık saklama biçimi değil.
+    '''
+    with stage('store_events', rows=len(events)):
+        return get_event_store().append(events, category, station=results.attrs['station'],
+                                        model_version=results.attrs['model_version'],
+                                        altitude=altitude, safety_margin=safety_margin)
+
+def report_caught(results):
+    # --- DEDEKTİF MANTIĞI (THE CATCH) ---
+    # Kriter: İstasyon > 0.5°C (Güvenli) AMA AgroFrost < 0°C (Risk)
+    # 0.5 derece marj koydum ki sınır durumları eyleyelim, net hataları bulalım.
+    events = store_events(results, 'caught', caught_frosts(results, STATION_ALT, TEST_FARM_ALT), TEST_FARM_ALT)
+    caught_events = render_events(events, {
+        'actual': "MGM_İstasyon (Gerçek)",
+        'predicted': "AgroFrost_Tarla (Tahmin)",
+        'diff': "Fark",
+    }, "⚠️ GİZLİ DON YAKALANDI")
 
     # --- RAPORLAMA ---
     print("\n" + "="*60)
     print(f"🎉 TEST SONUCU: {len(caught_events)} adet Kritik 'Gizli Don' olayı yakalandı!")
     print("="*60)
-    
+
     if len(caught_events) > 0:
-        results_df = pd.DataFrame(caught_events)
-        print(results_df.to_string(index=False))
-        
+        print(caught_events.to_string(index=False))
+
         # CSV olarak da kaydet, yatırımcıya gösteririz
-        results_df.to_csv("AgroFrost_Yakalanan_Donlar.csv", index=False)
+        caught_events.to_csv("AgroFrost_Yakalanan_Donlar.csv", index=False)
         print("\n✅ Detaylı liste 'AgroFrost_Yakalanan_Donlar.csv' dosyasına kaydedildi.")
     else:
         print("Taranan aralıkta bu kriterlere uyan keskin bir ayrım bulunamadı.")
         print("Not: Rakım farkını artırarak (TEST_FARM_ALT) tekrar deneyebilirsin.")
 
+def report_consensus(results):
+    # --- MUTABAKAT MANTIĞI ---
+    # Hem MGM (Gerçek) < 0 hem de AgroFrost (Tahmin) < 0 ve fark 3 dereceden az
+    events = store_events(results, 'consensus', consensus_frosts(results, STATION_ALT, TEST_FARM_ALT), TEST_FARM_ALT)
+    match_events = render_events(events, {
+        'actual': "MGM_Gerçek",
+        'predicted': "AgroFrost_Tahmin",
+    }, "✅ DOĞRULANDI")
+
+    print("\n" + "="*60)
+    print(f"🎯 GÜVENİLİRLİK RAPORU: {len(match_events)} gün boyunca başarıyla 'Don' tespiti yapıldı.")
+    print("="*60)
+
+    if len(match_events) > 0:
+        # Son 10 başarılı tahmini gösterelim
+        print(match_events.tail(10).to_string(index=False))
+
+        match_events.to_csv("AgroFrost_Dogrulanmis_Donlar.csv", index=False)
+        print("\n✅ Tam liste 'AgroFrost_Dogrulanmis_Donlar.csv' dosyasına kaydedildi.")
+
+def report_missed(results):
+    # --- KRİTİK HATA MANTIĞI ---
+    # Gerçekte DON VAR (< 0) ama Model DON YOK (> 0.5) demiş. (İstasyon ölçeğinde)
+    # Depoda tarih sırasıyla; rapor en büyük hatadan başlar
+    events = store_events(results, 'missed', missed_frosts(results), STATION_ALT)
+    events = events.sort_values(by='diff', ascending=False)
+    missed_events = render_events(events, {
+        'actual': "Gerçek_MGM",
+        'predicted': "Hatalı_Tahmin",
+        'diff': "Hata_Payı",
+    }, "❌ RİSKLİ HATA")
+
+    print("\n" + "="*60)
+    print(f"⚠️ DİKKAT: Toplam {len(missed_events)} kritik don olayı tahmin edilemedi.")
+    print("="*60)
+
+    if len(missed_events) > 0:
+        print(missed_events.head(10).to_string(index=False))
+
+        missed_events.to_csv("AgroFrost_Kacirilan_Donlar.csv", index=False)
+        print("\n✅ Hata raporu 'AgroFrost_Kacirilan_Donlar.csv' dosyasına kaydedildi.")
+    else:
+        print("Mükemmel! Model belirtilen kriterlerde hiçbir don olayını kaçırmadı.")
+
+def report_confusion(results, safety_margin=0.0):
+    summary = confusion_summary(results, STATION_ALT, TEST_FARM_ALT, safety_margin=safety_margin)
+
+    print("\n" + "="*60)
+    print(f"🧮 KARIŞIKLIK MATRİSİ (Tarla {TEST_FARM_ALT}m, Güvenlik Payı -{safety_margin}°C)")
+    print("="*60)
+    print(f"{'':<18} | {'Tahmin: DON':>12} | {'Tahmin: YOK':>12}")
+    print("-" * 48)
+    print(f"{'Gerçek: DON':<18} | {summary['tp']:>12} | {summary['fn']:>12}")
+    print(f"{'Gerçek: YOK':<18} | {summary['fp']:>12} | {summary['tn']:>12}")
+    print("-" * 48)
+    print(f"🎯 Yakalama Oranı (Hit Rate)      : {format_rate(summary['hit_rate'])}")
+    print(f"🔔 Yanlış Alarm Oranı (POFD)      : {format_rate(summary['false_alarm_rate'])}")
+    print(f"📣 Boşa Çıkan Alarm Payı (FAR)    : {format_rate(summary['false_alarm_ratio'])}")
+
+def report_sweep(results):
+    sweep = threshold_sweep(results, STATION_ALT, SWEEP_MARGINS, SWEEP_ALTITUDES, SWEEP_THRESHOLDS)
+
+    print("\n" + "="*60)
+    print(f"🎚️ EŞİK TARAMASI: {len(sweep)} kombinasyon değerlendirildi")
+    print("="*60)
+    farm = sweep[(sweep['farm_alt'] == TEST_FARM_ALT) & (sweep['threshold'] == 0.0)]
+    print(farm[['safety_margin', 'tp', 'fn', 'fp', 'tn', 'hit_rate', 'false_alarm_rate']].to_string(index=False, na_rep=NO_RATE))
+
+    sweep.to_csv("AgroFrost_Esik_Taramasi.csv", index=False)
+    print("\n✅ Tüm ızgara 'AgroFrost_Esik_Taramasi.csv' dosyasına kaydedildi.")
+
+def run_validation_test(safety_margin=0.0, sweep=False):
+    print("🕵️‍♂️ AgroFrost Dedektifi Geçmiş Kayıtları İnceliyor...")
+
+    with track_run('validate', safety_margin=safety_margin, sweep=sweep) as run:
+        # Tek çıkarım, tüm kategoriler
+        results = load_backtest()
+
+        with run.stage('reports', rows=len(results)):
+            report_caught(results)
+            report_consensus(results)
+            report_missed(results)
+            report_confusion(results, safety_margin)
+
+        if sweep:
+            with run.stage('sweep'):
+                report_sweep(results)
+
 if __name__ == "__main__":
-    run_validation_test()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="AgroFrost birleşik geçmiş doğrulama")
+    parser.add_argument("--margin", type=float, default=0.0, help="Karışıklık matrisi için güvenlik payı (°C)")
+    parser.add_argument("--sweep", action="store_true", help="Güvenlik payı / rakım / eşik taraması yap")
+    args = parser.parse_args()
+    run_validation_test(safety_margin=args.margin, sweep=args.sweep)
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.data_loader import fetch_historical_data
+from src.training import limit_threads, FAST_PARAMS
+from src.instrumentation import track_run
+
+# --- AYARLAR ---
+LAT = 37.8714
+LON = 32.4846
+STATION_ALT = 1016   # Konya Merkez
+START_YEAR = 2000
+END_YEAR = 2025
+MIN_TRAIN_YEARS = 1  # İlk katman en az bu kadar yılla eğitilir (1: 2000 -> 2001 testinden itibaren her yıl)
+WORK_DIR = 'models/walk_forward'
+OUTPUT = 'AgroFrost_Walk_Forward.csv'
+THREADS_PER_WORKER = 2
+SAFETY_MARGIN = 0.0
+THRESHOLD = 0.0
+
+# Her katman sıfırdan (retrain): hızlı mod ayarları, epochs sadece üst sınır
+PARAMS = {'window_size': 7, 'validation_split': 0.1, 'streaming': False, **FAST_PARAMS}
+# İnce ayar (finetune): ortak başlangıç modeli + katman verisiyle kısa eğitim
+FINETUNE_PARAMS = {**PARAMS, 'epochs': 15, 'learning_rate': 0.001, 'patience': 3}
+
+# Kullanım:
+#   python walk_forward.py                         # 2001..2025 her yıl için: <= Y-1 ile eğit, Y'yi puanla
+#   python walk_forward.py --mode finetune --workers 4 --threads 2
+#   python walk_forward.py --start-year 2010 --min-train-years 5 -o wf.csv
+
+def share_data(df, folder):
+    '''
+    Seriyi bir kez diske (.npy) yazar; işçiler np.load(mmap_mode='r') ile salt okunur paylaşır.
+    25 katmana 25 kopya pickle'lamak yerine her süreç aynı sayfaları işletim sisteminden okur.
+    '''
+    os.makedirs(folder, exist_ok=True)
+    values_path = os.path.join(folder, 'values.npy')
+    dates_path = os.path.join(folder, 'dates.npy')
+    np.save(values_path + '.tmp.npy', np.ascontiguousarray(df.values, dtype='float64'))
+    os.replace(values_path + '.tmp.npy', values_path)
+    np.save(dates_path, df.index.values.astype('datetime64[D]'))
+    return {'values': values_path, 'dates': dates_path, 'columns': list(df.columns)}
+
+def open_shared(shared):
+    '''İşçi tarafı: memmap üzerinde kopyasız DataFrame'''
+    values = np.load(shared['values'], mmap_mode='r')
+    dates = pd.DatetimeIndex(np.load(shared['dates']), name='time')
+    return pd.DataFrame(values, index=dates, columns=shared['columns'], copy=False)
+
+def fold_key(shared, test_year, params, mode, base=None):
+    '''Katman sonucunun parmak izi: veri + ayarlar + (ince ayarda) başlangıç modelinin kesim yılı ve ayarları'''
+    digest = hashlib.sha256(json.dumps([params, mode, test_year, base], sort_keys=True).encode())
+    with open(shared['values'], 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def score_year(results, station_alt=STATION_ALT, safety_margin=SAFETY_MARGIN, threshold=THRESHOLD):
+    '''Bir test yılının backtest tablosu -> don isabet/kaçırma istatistikleri (istasyon ölçeğinde)'''
+    from src.evaluation import confusion_summary, missed_frosts
+    summary = confusion_summary(results, station_alt, station_alt, safety_margin, threshold)
+    error = results['predicted_tmin'] - results['actual_tmin']
+    return {
+        'test_days': len(results),
+        'frost_days': int((results['actual_tmin'] < threshold).sum()),
+        'tp': summary['tp'], 'fn': summary['fn'], 'fp': summary['fp'], 'tn': summary['tn'],
+        'hit_rate': summary['hit_rate'],
+        'false_alarm_ratio': summary['false_alarm_ratio'],
+        'missed_frosts': len(missed_frosts(results, threshold)),
+        'mae': float(error.abs().mean()),
+        'rmse': float(np.sqrt((error ** 2).mean())),
+    }
+
+def train_base(shared, train_end, bundle_path, params):
+    '''İşçi süreçte: ince ayar modunun ortak başlangıç modeli (ilk katmanın eğitim verisiyle)'''
+    from src.training import train_bundle
+    df = open_shared(shared)
+    train_bundle(df.loc[:train_end], bundle_path, params=params, version='walk_forward_base', verbose=0)
+    return bundle_path
+
+def run_fold(shared, test_year, params, fold_dir, checkpoint_dir, init_bundle=None, keep_model=False):
+    '''
+    İşçi süreçte: [başlangıç, Y-1] ile eğit (ya da ince ayar yap), Y yılını puanla.
+    Test yılının verisi eğitime hiç girmez; ilk pencere için önceki `window_size` gün sadece girdi olarak kullanılır.
+    '''
+    from src.training import train_bundle
+    from src.model_bundle import load_bundle
+    from src.backtest import run_backtest
+
+    started = time.perf_counter()
+    df = open_shared(shared)
+    train_end = pd.Timestamp(f"{test_year - 1}-12-31")
+    train = df.loc[:train_end]
+    bundle_path = os.path.join(fold_dir, 'bundle')
+    summary = train_bundle(train, bundle_path, params=params, version=f"wf_{test_year}", verbose=0,
+                           checkpoint_dir=checkpoint_dir, init_bundle=init_bundle)
+
+    bundle = load_bundle(bundle_path)
+    window_size = bundle.window_size
+    first = df.index.searchsorted(pd.Timestamp(f"{test_year}-01-01"))
+    last = df.index.searchsorted(pd.Timestamp(f"{test_year + 1}-01-01"))
+    test = df.iloc[max(0, first - window_size):last]
+    results = run_backtest(test, bundle)
+    results = results.loc[str(test_year)]
+    if not keep_model:
+        shutil.rmtree(fold_dir, ignore_errors=True)
+
+    return {
+        'test_year': test_year,
+        'train_days': len(train),
+        'epochs': summary['epochs'],
+        'val_loss': summary['val_loss'],
+        **score_year(results),
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+def total_row(folds):
+    '''Tüm katmanların birleşik (gün ağırlıklı) özeti'''
+    total = {'test_year': 'toplam', 'train_days': np.nan, 'epochs': folds['epochs'].sum(), 'val_loss': np.nan}
+    for column in ('test_days', 'frost_days', 'tp', 'fn', 'fp', 'tn', 'missed_frosts', 'seconds'):
+        total[column] = folds[column].sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total['hit_rate'] = total['tp'] / (total['tp'] + total['fn'])
+        total['false_alarm_ratio'] = total['fp'] / (total['tp'] + total['fp'])
+    days = folds['test_days'] / folds['test_days'].sum()
+    total['mae'] = (folds['mae'] * days).sum()
+    total['rmse'] = float(np.sqrt((folds['rmse'] ** 2 * days).sum()))
+    return total
+
+def run_walk_forward(start_year=START_YEAR, end_year=END_YEAR, min_train_years=MIN_TRAIN_YEARS, mode='retrain',
+                     workers=None, threads=THREADS_PER_WORKER, output=OUTPUT, hourly=False, keep_models=False,
+                     force=False, work_dir=WORK_DIR):
+    print("🧪 AgroFrost Walk-Forward Değerlendirmesi Başlıyor...")
+    if mode not in ('retrain', 'finetune'):
+        raise ValueError(f"❌ Bilinmeyen mod: {mode} (retrain | finetune)")
+    params = PARAMS if mode == 'retrain' else FINETUNE_PARAMS
+    test_years = list(range(start_year + min_train_years, end_year + 1))
+    if not test_years:
+        raise ValueError("❌ Test yılı yok: aralık en az min_train_years + 1 yıl olmalı.")
+
+    with track_run('walk_forward', mode=mode, folds=len(test_years)) as run:
+        # 1. Veri bir kez (ana süreçte), işçiler için memmap'lenebilir dosyaya
+        with run.stage('fetch') as fetch_stage:
+            df = fetch_historical_data(LAT, LON, start_year, end_year, hourly=hourly)
+            fetch_stage['rows'] = len(df)
+        with run.stage('share'):
+            shared = share_data(df, os.path.join(work_dir, 'data'))
+
+        # Daha önce aynı veri + ayarla puanlanmış katmanlar tekrar eğitilmez
+        # İnce ayar sonucu başlangıç modeline de bağlı: kesimi (ilk test yılı - 1) değişirse katmanlar yeniden
+        base = {'train_end': test_years[0] - 1, 'params': PARAMS} if mode == 'finetune' else None
+        done, jobs = {}, []
+        for year in test_years:
+            key = fold_key(shared, year, params, mode, base)
+            path = os.path.join(work_dir, 'folds', f"{year}.json")
+            if not force and os.path.exists(path):
+                with open(path) as f:
+                    cached = json.load(f)
+                if cached.get('key') == key:
+                    done[year] = cached['result']
+                    continue
+            jobs.append((year, key, path))
+        if done:
+            print(f"⏭️ {len(done)} katman önceki çalıştırmadan (veri ve ayarlar değişmemiş).")
+
+        workers = workers or max(1, (os.cpu_count() or 1) // threads)
+        if jobs:
+            print(f"🧠 {len(jobs)} katman ({mode}) eğitilip puanlanacak ({workers} süreç x {threads} thread)...")
+        # 'spawn': ana süreçteki durum işçilere kopyalanmaz; veri sadece memmap dosyası olarak paylaşılır
+        context = multiprocessing.get_context('spawn')
+        with run.stage('folds', folds=len(jobs)), \
+                ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                    initializer=limit_threads, initargs=(threads,)) as pool:
+            init_bundle = None
+            if mode == 'finetune' and jobs:
+                # Ortak başlangıç: ilk test yılından önceki veri; her katmanın eğitim verisinin alt kümesi (sızıntı yok)
+                init_bundle = pool.submit(train_base, shared, pd.Timestamp(f"{base['train_end']}-12-31"),
+                                          os.path.join(work_dir, 'base'), PARAMS).result()
+
+            futures = {pool.submit(run_fold, shared, year, params, os.path.join(work_dir, 'folds', str(year)),
+                                   os.path.join(work_dir, 'checkpoints'), init_bundle, keep_models): (year, key, path)
+                       for year, key, path in jobs}
+            for future in as_completed(futures):
+                year, key, path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    print(f"❌ {year}: katman başarısız ({exc})")
+                    continue
+                # Her biten katmandan sonra kaydet: yarıda kesilirse biten işler kaybolmaz
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as f:
+                    json.dump({'key': key, 'result': result}, f, indent=2, default=float)
+                done[year] = result
+                print(f"✅ {year}: isabet {result['tp']}/{result['tp'] + result['fn']} don, "
+                      f"{result['missed_frosts']} kaçırılan, MAE {result['mae']:.2f}°C ({result['seconds']} sn)")
+
+        folds = pd.DataFrame([done[year] for year in sorted(done)])
+        run.count(folds=len(folds))
+
+    if folds.empty:
+        print("❌ Hiçbir katman tamamlanamadı.")
+        return folds
+    report = pd.concat([folds, pd.DataFrame([total_row(folds)])], ignore_index=True)
+    report.to_csv(output, index=False)
+
+    from src.evaluation import NO_RATE
+    print("\n" + "="*60)
+    print(f"📊 WALK-FORWARD SONUÇLARI ({mode}, {len(folds)} katman, güvenlik payı {SAFETY_MARGIN}°C)")
+    print("="*60)
+    print(report[['test_year', 'train_days', 'frost_days', 'tp', 'fn', 'fp', 'missed_frosts',
+                  'hit_rate', 'false_alarm_ratio', 'mae']].to_string(index=False, float_format='%.3f', na_rep=NO_RATE))
+    print(f"\n✅ Sonuçlar '{output}' dosyasına kaydedildi.")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AgroFrost walk-forward (yıl yıl ileri kayan) değerlendirme")
+    parser.add_argument("--mode", choices=['retrain', 'finetune'], default='retrain',
+                        help="Her katmanda sıfırdan eğitim ya da ortak modelden ince ayar")
+    parser.add_argument("--start-year", type=int, default=START_YEAR)
+    parser.add_argument("--end-year", type=int, default=END_YEAR)
+    parser.add_argument("--min-train-years", type=int, default=MIN_TRAIN_YEARS)
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı (varsayılan: CPU / thread)")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_WORKER, help="Süreç başına CPU thread")
+    parser.add_argument("--hourly", action="store_true", help="Saatlik veriden gece özellikleriyle")
+    parser.add_argument("--keep-models", action="store_true", help="Katman modellerini silme")
+    parser.add_argument("--force", action="store_true", help="Önceden puanlanmış katmanları da yeniden çalıştır")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="Paylaşılan veri, katman sonuçları ve modeller")
+    parser.add_argument("-o", "--output", default=OUTPUT)
+    args = parser.parse_args()
+    run_walk_forward(args.start_year, args.end_year, args.min_train_years, args.mode, args.workers, args.threads,
+                     args.output, args.hourly, args.keep_models, args.force, args.work_dir)